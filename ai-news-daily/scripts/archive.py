@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+滚动归档 - 旧日报、条目和原始 RSS 打包为压缩段文件，按日期随机读取
+分层保留（--tiers）：
+    pack     超过 N 天的文件从 reports/ 打包进按天的段（day-YYYYMMDD）
+    compact  超过 N 天的按天小段合并为按周的段（week-YYYY-Www）
+    drop     超过 N 天的整日删除（0 表示永久保留）
+
+每个文件在段内单独压缩（有 zstandard 时用 zstd，否则 gzip），index.json 记录
+日期 → 段文件、偏移、长度，读取某天的日报只需一次 seek 和一次解压。
+
+目录结构：
+    DIR/index.json
+    DIR/segments/<段名>.<序号>.zst|gz
+
+用法：
+    python scripts/archive.py run --reports reports --tiers pack=7,compact=30,drop=0
+    python scripts/archive.py show 2026-02-10            # 输出当天日报（md）
+    python scripts/archive.py show 2026-02-10 --kind jsonl
+    python scripts/archive.py list
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+INDEX_VERSION = 1
+DEFAULT_TIERS = {"pack": 7, "compact": 30, "drop": 0}
+
+# reports/ 下按天归档的文件：ai-daily-YYYYMMDD.<kind>，多语言报告为 <语言>.md / <语言>.html
+_REPORT_RE = re.compile(r'^ai-daily-(\d{8})\.((?:[\w-]+\.)?(?:md|html)|jsonl|run\.json)$')
+# 原始 RSS 录制目录（fetch_ai_news.py --record reports/feeds-YYYYMMDD），成员名为 tape/<相对路径>
+_FEEDS_RE = re.compile(r'^feeds-(\d{8})$')
+
+_EXTENSIONS = {"zstd": "zst", "gzip": "gz"}
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("该段使用 zstd 压缩，需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def parse_tiers(spec: Optional[str]) -> Dict[str, int]:
+    """解析保留分层：'pack=7,compact=30,drop=365'，未给出的取默认值"""
+    tiers = dict(DEFAULT_TIERS)
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in tiers:
+            raise ValueError(f"未知的保留分层：{name}（可选 {', '.join(DEFAULT_TIERS)}）")
+        tiers[name] = int(value)
+    return tiers
+
+
+def parse_day(text: str) -> date:
+    """接受 YYYY-MM-DD 或 YYYYMMDD"""
+    return datetime.strptime(text.replace("-", ""), "%Y%m%d").date()
+
+
+def _week_label(day: date) -> str:
+    year, week, _ = day.isocalendar()
+    return f"week-{year}-W{week:02d}"
+
+
+class Archive:
+    """段文件 + 索引；写操作先写新段、再原子替换索引、最后删除旧段，中途失败不会损坏已归档内容"""
+
+    def __init__(self, directory: str, codec: Optional[str] = None):
+        self.directory = directory
+        self.codec = codec or ("zstd" if ZSTD_AVAILABLE else "gzip")
+        if self.codec == "zstd" and not ZSTD_AVAILABLE:
+            raise RuntimeError("未安装 zstandard，无法使用 zstd 压缩")
+        self._index_path = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        self._pending_delete: List[str] = []
+        self.index = self._load_index()
+
+    # ---------- 索引 ----------
+
+    def _load_index(self) -> Dict:
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"version": INDEX_VERSION, "next_id": 1, "segments": {}, "days": {}}
+
+    def _save_index(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{self._index_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(f"{self._index_path}.tmp", self._index_path)
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.directory, "segments", name)
+
+    def days(self) -> List[str]:
+        return sorted(self.index["days"])
+
+    # ---------- 读取 ----------
+
+    def read(self, day: date, kind: str = "md") -> Optional[bytes]:
+        """读取某天的一个成员，不存在时返回 None"""
+        for attempt in range(2):
+            entry = self.index["days"].get(day.isoformat(), {}).get(kind)
+            if entry is None:
+                return None
+            segment, offset, length, _ = entry
+            try:
+                with open(self._segment_path(segment), "rb") as f:
+                    f.seek(offset)
+                    data = f.read(length)
+                return _decompress(self.index["segments"][segment]["codec"], data)
+            except FileNotFoundError:
+                if attempt:
+                    raise
+                # 段已被其他进程合并，重新加载索引后再试
+                self.index = self._load_index()
+        return None
+
+    def members(self, day: date) -> List[str]:
+        return sorted(self.index["days"].get(day.isoformat(), {}))
+
+    # ---------- 写入 ----------
+
+    def _write_segment(self, label: str, members: List[Tuple[str, str, bytes]]) -> str:
+        """写一个新段：members 为 (日期, 成员名, 原始内容)，返回段名"""
+        name = f"{label}.{self.index['next_id']}.{_EXTENSIONS[self.codec]}"
+        self.index["next_id"] += 1
+        path = self._segment_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        locations = []
+        offset = 0
+        with open(f"{path}.tmp", "wb") as f:
+            for day, kind, data in members:
+                blob = _compress(self.codec, data)
+                f.write(blob)
+                locations.append((day, kind, [name, offset, len(blob), len(data)]))
+                offset += len(blob)
+        os.replace(f"{path}.tmp", path)
+
+        self.index["segments"][name] = {"codec": self.codec, "bytes": offset,
+                                        "days": sorted({day for day, _, _ in members})}
+        for day, kind, entry in locations:
+            self.index["days"].setdefault(day, {})[kind] = entry
+        return name
+
+    def _day_members(self, day: str) -> List[Tuple[str, str, bytes]]:
+        return [(day, kind, self.read(date.fromisoformat(day), kind)) for kind in sorted(self.index["days"].get(day, {}))]
+
+    def _release(self, segments) -> None:
+        """删除不再被索引引用的段"""
+        referenced = {entry[0] for kinds in self.index["days"].values() for entry in kinds.values()}
+        for name in segments:
+            if name not in referenced and name in self.index["segments"]:
+                del self.index["segments"][name]
+                self._pending_delete.append(name)
+
+    def _commit(self) -> None:
+        self._save_index()
+        for name in self._pending_delete:
+            try:
+                os.remove(self._segment_path(name))
+            except FileNotFoundError:
+                pass
+        self._pending_delete = []
+
+    def pack(self, reports_dir: str, older_than: int, today: Optional[date] = None) -> int:
+        """把 reports_dir 中超过 older_than 天的文件打包，返回打包的天数"""
+        cutoff = (today or date.today()) - timedelta(days=older_than)
+        pending: Dict[str, List[Tuple[str, str]]] = {}
+        feed_dirs: List[str] = []
+        for name in sorted(os.listdir(reports_dir)) if os.path.isdir(reports_dir) else []:
+            path = os.path.join(reports_dir, name)
+            match = _REPORT_RE.match(name)
+            if match and os.path.isfile(path):
+                day = parse_day(match.group(1))
+                if day < cutoff:
+                    pending.setdefault(day.isoformat(), []).append((match.group(2), path))
+                continue
+            match = _FEEDS_RE.match(name)
+            if match and os.path.isdir(path):
+                day = parse_day(match.group(1))
+                if day < cutoff:
+                    feed_dirs.append(path)
+                    for root, _, files in os.walk(path):
+                        for filename in sorted(files):
+                            member = os.path.join(root, filename)
+                            kind = "tape/" + os.path.relpath(member, path).replace(os.sep, "/")
+                            pending.setdefault(day.isoformat(), []).append((kind, member))
+
+        with self._lock:
+            for day, files in sorted(pending.items()):
+                # 同一天已有归档时合并（如补跑产生的文件）
+                members = {kind: data for _, kind, data in self._day_members(day)}
+                for kind, path in files:
+                    with open(path, "rb") as f:
+                        members[kind] = f.read()
+                old_segments = {entry[0] for entry in self.index["days"].get(day, {}).values()}
+                self._write_segment(f"day-{day.replace('-', '')}",
+                                    [(day, kind, data) for kind, data in sorted(members.items())])
+                self._release(old_segments)
+            self._commit()
+
+        # 索引落盘后再删除原文件
+        for files in pending.values():
+            for _, path in files:
+                os.remove(path)
+        for path in feed_dirs:
+            shutil.rmtree(path, ignore_errors=True)
+        return len(pending)
+
+    def compact(self, older_than: int, today: Optional[date] = None) -> int:
+        """把超过 older_than 天的按天段合并为按周段，返回合并掉的段数"""
+        cutoff = (today or date.today()) - timedelta(days=older_than)
+        weeks: Dict[str, List[str]] = {}
+        for name, meta in self.index["segments"].items():
+            if not name.startswith("day-"):
+                continue
+            days = [date.fromisoformat(d) for d in meta["days"]]
+            if days and max(days) < cutoff:
+                weeks.setdefault(_week_label(days[0]), []).append(name)
+
+        merged = 0
+        with self._lock:
+            for label, day_segments in sorted(weeks.items()):
+                # 该周已有的周段也一并重写，保证每周只有一个段
+                week_segments = [n for n in self.index["segments"] if n.startswith(f"{label}.")]
+                sources = day_segments + week_segments
+                days = sorted({d for n in sources for d in self.index["segments"][n]["days"]})
+                members = [m for day in days for m in self._day_members(day)]
+                self._write_segment(label, members)
+                self._release(sources)
+                merged += len(day_segments)
+            self._commit()
+        return merged
+
+    def drop(self, older_than: int, today: Optional[date] = None) -> int:
+        """删除超过 older_than 天的整日归档，返回删除的天数"""
+        if older_than <= 0:
+            return 0
+        cutoff = ((today or date.today()) - timedelta(days=older_than)).isoformat()
+        expired = [day for day in self.index["days"] if day < cutoff]
+        if not expired:
+            return 0
+
+        with self._lock:
+            touched = {entry[0] for day in expired for entry in self.index["days"][day].values()}
+            for day in expired:
+                del self.index["days"][day]
+            # 段内还有未过期的日期时重写该段
+            for name in sorted(touched):
+                remaining = [d for d in self.index["segments"][name]["days"] if d in self.index["days"]]
+                if remaining:
+                    self._write_segment(name.split(".", 1)[0], [m for day in remaining for m in self._day_members(day)])
+            self._release(touched)
+            self._commit()
+        return len(expired)
+
+    def run(self, reports_dir: str, tiers: Dict[str, int], today: Optional[date] = None) -> Dict[str, int]:
+        return {
+            "packed_days": self.pack(reports_dir, tiers["pack"], today),
+            "compacted_segments": self.compact(tiers["compact"], today),
+            "dropped_days": self.drop(tiers["drop"], today),
+        }
+
+    def summary(self) -> Dict[str, int]:
+        stored = sum(meta["bytes"] for meta in self.index["segments"].values())
+        raw = sum(entry[3] for kinds in self.index["days"].values() for entry in kinds.values())
+        return {"days": len(self.index["days"]), "segments": len(self.index["segments"]),
+                "raw_bytes": raw, "stored_bytes": stored}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="日报滚动归档")
+    parser.add_argument("--reports", default="reports", help="日报目录")
+    parser.add_argument("--dir", help="归档目录（默认与日报目录同级的 archive）")
+    parser.add_argument("--codec", choices=["zstd", "gzip"], help="新段的压缩方式（默认有 zstandard 时用 zstd）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="按保留分层打包、合并、过期")
+    run.add_argument("--tiers", help="保留分层（天），如 pack=7,compact=30,drop=365")
+
+    show = sub.add_parser("show", help="输出某天的归档内容")
+    show.add_argument("day", help="YYYY-MM-DD 或 YYYYMMDD")
+    show.add_argument("--kind", default="md", help="md、jsonl、run.json、en.md 等多语言报告，或 tape/feeds/<源>.xml")
+
+    sub.add_parser("list", help="列出已归档的日期")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    directory = args.dir or os.path.join(os.path.dirname(os.path.abspath(args.reports)), "archive")
+    archive = Archive(directory, codec=args.codec)
+
+    if args.command == "run":
+        stats = archive.run(args.reports, parse_tiers(args.tiers))
+        summary = archive.summary()
+        print(f"归档完成：打包 {stats['packed_days']} 天，合并 {stats['compacted_segments']} 个段，"
+              f"过期 {stats['dropped_days']} 天；共 {summary['days']} 天 / {summary['segments']} 个段，"
+              f"{summary['raw_bytes'] / 1024:.0f} KB → {summary['stored_bytes'] / 1024:.0f} KB")
+    elif args.command == "show":
+        day = parse_day(args.day)
+        # 尚未打包的日期直接读 reports/ 中的原文件
+        path = os.path.join(args.reports, f"ai-daily-{day.strftime('%Y%m%d')}.{args.kind}")
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                sys.stdout.buffer.write(f.read())
+            return
+        data = archive.read(day, args.kind)
+        if data is None:
+            print(f"未找到 {args.day} 的 {args.kind}（已归档：{', '.join(archive.members(day)) or '无'}）")
+            sys.exit(1)
+        sys.stdout.buffer.write(data)
+    elif args.command == "list":
+        for day in archive.days():
+            print(f"{day}  {', '.join(archive.members(date.fromisoformat(day)))}")
+
+
+if __name__ == "__main__":
+    main()
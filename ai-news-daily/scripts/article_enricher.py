@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+文章全文补全 - 为精选新闻抓取原文正文
+特点：有界并发 + 按域名限流，正文按 URL 缓存在磁盘，有效期内同一篇文章只抓取一次；
+过期的记录重新抓取（文章发布后可能被更新），并在每次补全后清理
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import wait
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from run_budget import DaemonThreadPool
+
+try:
+    import requests
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+# 正文提取时整体丢弃的节点
+NOISE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg"]
+
+# 正文最多保留的字符数
+MAX_CONTENT_CHARS = 5000
+
+# 缓存正文的默认有效期（秒）
+DEFAULT_MAX_AGE = 3 * 86400
+
+
+def extract_main_text(html: str) -> str:
+    """用 lxml 提取网页正文：优先 <article>，否则取段落文字最多的容器"""
+    if not html or not LXML_AVAILABLE:
+        return ""
+
+    try:
+        doc = lxml.html.fromstring(html)
+    except Exception:
+        return ""
+
+    for el in doc.xpath("//" + " | //".join(NOISE_TAGS)):
+        el.drop_tree()
+
+    candidates = doc.xpath("//article")
+    if not candidates:
+        # 按父容器累计 <p> 文本长度，得分最高者视为正文区域
+        scores: Dict = {}
+        for p in doc.iter("p"):
+            parent = p.getparent()
+            if parent is not None:
+                scores[parent] = scores.get(parent, 0) + len(p.text_content().strip())
+        if scores:
+            candidates = [max(scores, key=scores.get)]
+        else:
+            candidates = [doc]
+
+    root = max(candidates, key=lambda el: len(el.text_content()))
+    paragraphs = [p.text_content().strip() for p in root.iter("p")]
+    paragraphs = [p for p in paragraphs if p]
+    text = "\n".join(paragraphs) if paragraphs else root.text_content()
+    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+    return text[:MAX_CONTENT_CHARS]
+
+
+class ArticleCache:
+    """正文磁盘缓存：以 URL 的 sha256 为键，按前两位分目录存放；超过 max_age 秒的记录视为过期"""
+
+    def __init__(self, cache_dir: str, max_age: Optional[float] = DEFAULT_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+
+    def _expired(self, path: str, now: float) -> bool:
+        return self.max_age is not None and now - os.path.getmtime(path) > self.max_age
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        path = self._path(self.key_for(url))
+        try:
+            if self._expired(path, time.time()):
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, record: Dict) -> None:
+        path = self._path(self.key_for(url))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再原子替换，避免并发写出半个文件
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def prune(self) -> int:
+        """删除过期记录（及中断遗留的临时文件），返回删除的文件数"""
+        if self.max_age is None or not os.path.isdir(self.cache_dir):
+            return 0
+        now = time.time()
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if self._expired(path, now):
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+class ArticleEnricher:
+    """为前 K 条新闻抓取原文正文，补全摘要并重新识别公司"""
+
+    def __init__(self, cache_dir: str, max_workers: int = 8, per_host: int = 2, timeout: int = 15,
+                 max_age: Optional[float] = DEFAULT_MAX_AGE):
+        self.cache = ArticleCache(cache_dir, max_age=max_age)
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self._host_limits: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self.stats = {"cached": 0, "fetched": 0, "failed": 0, "timed_out": 0, "evicted": 0}
+
+    def _host_semaphore(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.Semaphore(self.per_host)
+            return self._host_limits[host]
+
+    def fetch_article(self, url: str) -> str:
+        """获取单篇文章正文（先查缓存）"""
+        record = self.cache.get(url)
+        if record is not None:
+            with self._lock:
+                self.stats["cached"] += 1
+            return record.get("text", "")
+
+        try:
+            with self._host_semaphore(url):
+                resp = requests.get(url, timeout=self.timeout, headers={
+                    "User-Agent": "Mozilla/5.0 (compatible; AI News Bot)"
+                })
+            resp.raise_for_status()
+            text = extract_main_text(resp.text)
+        except Exception:
+            with self._lock:
+                self.stats["failed"] += 1
+            return ""
+
+        self.cache.put(url, {"url": url, "text": text})
+        with self._lock:
+            self.stats["fetched"] += 1
+        return text
+
+    def enrich_items(self, items: List[Dict], top_k: int = 10, timeout: Optional[float] = None) -> List[Dict]:
+        """并发补全前 top_k 条新闻的正文；timeout 秒内未完成的条目保持原样"""
+        if not REQUESTS_AVAILABLE or not LXML_AVAILABLE:
+            print("警告：未安装 requests 或 lxml，跳过全文补全")
+            return items
+
+        # 延迟导入，避免与 fetch_ai_news 循环依赖
+        from fetch_ai_news import normalize_summary
+        from text_analysis import analyze
+
+        targets = [item for item in items[:top_k] if item.get("link")]
+        if not targets:
+            return items
+
+        print(f"正在补全 {len(targets)} 篇文章正文...")
+        pool = DaemonThreadPool(max_workers=self.max_workers)
+        futures = [pool.submit(self.fetch_article, item["link"]) for item in targets]
+        done, _ = wait(futures, timeout=timeout)
+        pool.shutdown(wait=timeout is None, cancel_futures=True)
+        texts = [future.result() if future in done else None for future in futures]
+        self.stats["timed_out"] += len(futures) - len(done)
+
+        for item, text in zip(targets, texts):
+            if not text:
+                continue
+            item["content"] = text
+            if len(text) > len(item.get("summary", "")):
+                # 与入库时的摘要同样规范化（合并空白、在句末或词间截断）
+                item["summary"] = normalize_summary(text)
+            # 摘要已变，重新分析；公司按正文识别
+            analyze(item, content=text)
+
+        self.stats["evicted"] += self.cache.prune()
+        evicted = f"，清理过期缓存 {self.stats['evicted']} 篇" if self.stats["evicted"] else ""
+        print(f"补全完成：新抓取 {self.stats['fetched']} 篇，缓存命中 {self.stats['cached']} 篇，"
+              f"失败 {self.stats['failed']} 篇{evicted}")
+        return items
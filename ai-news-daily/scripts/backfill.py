@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+历史回填 - 把大量已保存的 RSS 快照重新解析、分析并计入公司提及趋势
+快照来源：录制目录（fetch_ai_news.py --record，含 manifest.json 与 feeds/*.xml）
+以及归档中的原始 RSS（archive.py 的 tape/feeds/*.xml 成员）。
+
+快照按分片分给进程池，每个 worker 独立完成 解析 → 日期归一 → 入库分析 → 分片内去重，
+只把趋势需要的字段传回主进程；主进程每收到一个分片就批量写入 TrendStore
+（每个涉及的日期表只写一次），再更新检查点。中断后重新运行会跳过已完成的快照，
+新增的快照也只处理新增部分。公司词表变化后用 --rebuild 在临时目录重建再替换；
+没有快照可重建的日期（如未开启 ARCHIVE_FEEDS 时 --trends 实时计入的日期）保留原表。
+
+用法：
+    python scripts/backfill.py --recordings 'reports/feeds-*' --archive archive --workers 8
+    python scripts/backfill.py --archive archive --rebuild          # 公司词表变化后重建趋势
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from fetch_ai_news import CACHE_DIR, COMPANY_KEYWORDS, FEEDPARSER_AVAILABLE
+
+
+CHECKPOINT_FILE = "backfill.json"
+# 已完成的快照 id，每完成一个分片追加一批（每行一个）
+CHECKPOINT_LOG = "backfill.done"
+
+# 传回主进程的字段（趋势计数与去重所需）
+KEEP_FIELDS = ("title", "link", "source", "category", "companies", "_parsed_date")
+
+# 趋势目录中的日期表文件（见 trends.TrendStore）
+_DAY_FILE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}\.json$')
+
+# worker 进程内复用已打开的归档（读取索引只需一次）
+_ARCHIVES: Dict[str, object] = {}
+
+
+def dictionary_digest() -> str:
+    """公司词表的摘要；词表变化后旧检查点失效"""
+    data = json.dumps(COMPANY_KEYWORDS, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _source_info(registry, key: str, url: str = "") -> Dict:
+    source = registry.get(key) if registry is not None else None
+    return dict(source) if source else {"name": key, "url": url, "category": "general", "language": "en"}
+
+
+def discover(recordings: List[str], archive_dir: Optional[str] = None, registry=None) -> List[Dict]:
+    """列出全部快照，按 id 排序；每个快照记录读取方式、新闻源和录制日期"""
+    snapshots = []
+    for pattern in recordings:
+        for directory in sorted(glob.glob(pattern)):
+            manifest_path = os.path.join(directory, "manifest.json")
+            if not os.path.exists(manifest_path):
+                continue
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            recorded_at = manifest.get("recorded_at") or datetime.now().isoformat()
+            for key, meta in manifest.get("sources", {}).items():
+                path = os.path.join(directory, meta.get("file", f"feeds/{key}.xml"))
+                snapshots.append({
+                    "id": f"file:{os.path.abspath(path)}",
+                    "path": path,
+                    "source": _source_info(registry, key, meta.get("url", "")),
+                    "recorded_at": recorded_at,
+                })
+
+    if archive_dir:
+        from archive import Archive
+        archive = Archive(archive_dir)
+        for day in archive.days():
+            feeds = [m for m in archive.members(date.fromisoformat(day)) if m.startswith("tape/feeds/")]
+            if not feeds:
+                continue
+            raw = archive.read(date.fromisoformat(day), "tape/manifest.json")
+            manifest = json.loads(raw) if raw else {}
+            recorded_at = manifest.get("recorded_at") or f"{day}T23:59:59"
+            for member in feeds:
+                key = os.path.splitext(os.path.basename(member))[0]
+                snapshots.append({
+                    "id": f"archive:{day}:{member}",
+                    "archive": os.path.abspath(archive_dir),
+                    "day": day,
+                    "member": member,
+                    "source": _source_info(registry, key, manifest.get("sources", {}).get(key, {}).get("url", "")),
+                    "recorded_at": recorded_at,
+                })
+    return sorted(snapshots, key=lambda s: s["id"])
+
+
+def _read_snapshot(snapshot: Dict) -> Optional[str]:
+    if "path" in snapshot:
+        if not os.path.exists(snapshot["path"]):
+            return None
+        with open(snapshot["path"], "r", encoding="utf-8") as f:
+            return f.read()
+    if snapshot["archive"] not in _ARCHIVES:
+        from archive import Archive
+        _ARCHIVES[snapshot["archive"]] = Archive(snapshot["archive"])
+    data = _ARCHIVES[snapshot["archive"]].read(date.fromisoformat(snapshot["day"]), snapshot["member"])
+    return data.decode("utf-8") if data is not None else None
+
+
+def process_shard(snapshots: List[Dict]) -> Tuple[List[str], List[Dict], Dict[str, int]]:
+    """worker：解析并分析一个分片，返回 (完成的快照 id, 去重后的条目, 统计)"""
+    import feedparser
+    from fetch_ai_news import entries_to_items, parse_date
+    from pipeline import dedup_key
+
+    seen = set()
+    items: List[Dict] = []
+    stats = {"snapshots": 0, "missing": 0, "parsed": 0, "duplicates": 0}
+    for snapshot in snapshots:
+        text = _read_snapshot(snapshot)
+        if text is None:
+            stats["missing"] += 1
+            continue
+        stats["snapshots"] += 1
+        recorded_at = datetime.fromisoformat(snapshot["recorded_at"]).replace(tzinfo=None)
+        for item in entries_to_items(feedparser.parse(text).entries, snapshot["source"], limit=None):
+            stats["parsed"] += 1
+            key = dedup_key(item)
+            if key in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(key)
+            # 日期归一：无法解析的按快照录制时间计
+            pub_date = parse_date(item.get("published", ""))
+            item["_parsed_date"] = pub_date.replace(tzinfo=None) if pub_date else recorded_at
+            items.append({field: item[field] for field in KEEP_FIELDS if field in item})
+    return [snapshot["id"] for snapshot in snapshots], items, stats
+
+
+class Checkpoint:
+    """已完成的快照 id 与累计统计；每批写入趋势后更新
+
+    完成的 id 追加写入日志（与快照总数无关，每个分片只写新增部分），
+    累计统计和词表摘要存于小的 JSON 文件，原子替换。
+    """
+
+    def __init__(self, path: str, dictionary: str):
+        self.path = path
+        self.log_path = os.path.join(os.path.dirname(path), CHECKPOINT_LOG)
+        self.data = {"dictionary": dictionary, "items": 0, "added": 0}
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("dictionary") == dictionary:
+                # 旧版检查点把 id 列表存在 JSON 中，迁移到日志
+                legacy = saved.pop("done", [])
+                self.data = saved
+                self.done = self._read_log() | set(legacy)
+                if legacy:
+                    self._append(legacy)
+                    self._save()
+                return
+            print("公司词表已变化，检查点作废（需要重新计数请使用 --rebuild）")
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+    def _read_log(self) -> set:
+        if not os.path.exists(self.log_path):
+            return set()
+        with open(self.log_path, "r+", encoding="utf-8") as f:
+            text = f.read()
+            complete = text.rfind("\n") + 1
+            if complete < len(text):
+                # 最后一行没有换行说明写入被中断：截掉，该分片会重做（重复条目由表内去重处理）
+                f.truncate(len(text[:complete].encode("utf-8")))
+        return {line for line in text[:complete].split("\n") if line}
+
+    def _append(self, snapshot_ids: List[str]) -> None:
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{snapshot_id}\n" for snapshot_id in snapshot_ids))
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def update(self, snapshot_ids: List[str], items: int, added: int) -> None:
+        self.done.update(snapshot_ids)
+        self._append(snapshot_ids)
+        self.data["items"] += items
+        self.data["added"] += added
+        self._save()
+
+
+def backfill(snapshots: List[Dict], store, checkpoint: Checkpoint, workers: int = 4,
+             shard_size: int = 50) -> Dict[str, float]:
+    """分片并行解析，逐分片批量写入 store；返回统计"""
+    pending = [s for s in snapshots if s["id"] not in checkpoint.done]
+    shards = [pending[i:i + shard_size] for i in range(0, len(pending), shard_size)]
+    totals = {"snapshots": 0, "missing": 0, "parsed": 0, "duplicates": 0, "items": 0, "added": 0,
+              "skipped": len(snapshots) - len(pending), "shards": len(shards)}
+    print(f"共 {len(snapshots)} 个快照，已完成 {totals['skipped']} 个，"
+          f"待处理 {len(pending)} 个（{len(shards)} 个分片，{workers} 个进程）")
+    if not shards:
+        totals["seconds"] = 0.0
+        return totals
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_shard, shard) for shard in shards]
+        for n, future in enumerate(as_completed(futures), 1):
+            snapshot_ids, items, stats = future.result()
+            # 一个分片的条目一次写入：每个涉及的日期表只保存一次，跨分片的重复由表内去重处理
+            added = store.ingest(items)
+            checkpoint.update(snapshot_ids, len(items), added)
+            for key, value in stats.items():
+                totals[key] += value
+            totals["items"] += len(items)
+            totals["added"] += added
+            elapsed = time.perf_counter() - start
+            rate = totals["parsed"] / elapsed if elapsed else 0.0
+            eta = elapsed / n * (len(shards) - n)
+            print(f"  [{n}/{len(shards)}] 快照 {totals['snapshots']}，解析 {totals['parsed']} 条，"
+                  f"新计入 {totals['added']} 条，{rate:.0f} 条/秒，预计剩余 {eta:.0f} 秒")
+    totals["seconds"] = time.perf_counter() - start
+    return totals
+
+
+def keep_unrebuilt_days(directory: str, target: str) -> List[str]:
+    """把原目录中重建结果没有覆盖的日期表复制到重建目录，返回这些日期
+
+    趋势也可由 --trends 实时计入，而原始 RSS 只在开启 ARCHIVE_FEEDS 时保存；
+    没有快照的日期无法重建，直接保留原表，否则替换后这些天的数据就丢了。"""
+    if not os.path.isdir(directory):
+        return []
+    os.makedirs(target, exist_ok=True)
+    kept = []
+    for name in sorted(os.listdir(directory)):
+        if not _DAY_FILE_RE.match(name) or os.path.exists(os.path.join(target, name)):
+            continue
+        shutil.copy2(os.path.join(directory, name), os.path.join(target, name))
+        kept.append(name[:-len(".json")])
+    return kept
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="历史 RSS 快照回填公司提及趋势")
+    parser.add_argument("--recordings", action="append", default=[],
+                        help="录制目录（支持通配符，如 'reports/feeds-*'），可重复")
+    parser.add_argument("--archive", help="归档目录（archive.py），读取其中的原始 RSS")
+    parser.add_argument("--dir", help="趋势聚合表目录（默认缓存目录下的 trends）")
+    parser.add_argument("--registry", action="append", default=[], help="新闻源注册表，用于补全来源名称与分类")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数")
+    parser.add_argument("--shard-size", type=int, default=50, help="每个分片的快照数")
+    parser.add_argument("--rebuild", action="store_true", help="在临时目录重建全部趋势，完成后替换原目录")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not FEEDPARSER_AVAILABLE:
+        print("错误：未安装 feedparser，无法解析 RSS")
+        return
+    if not args.recordings and not args.archive:
+        print("错误：需要 --recordings 或 --archive")
+        return
+
+    from source_registry import SourceRegistry
+    from trends import TrendStore
+
+    registry = SourceRegistry(args.registry)
+    directory = args.dir or os.path.join(CACHE_DIR, "trends")
+    target = f"{directory}.rebuild" if args.rebuild else directory
+    snapshots = discover(args.recordings, args.archive, registry)
+
+    checkpoint = Checkpoint(os.path.join(target, CHECKPOINT_FILE), dictionary_digest())
+    totals = backfill(snapshots, TrendStore(target), checkpoint, workers=args.workers, shard_size=args.shard_size)
+    rate = totals["parsed"] / totals["seconds"] if totals["seconds"] else 0.0
+    print(f"回填完成：快照 {totals['snapshots']} 个（缺失 {totals['missing']}），解析 {totals['parsed']} 条，"
+          f"分片内去重 {totals['duplicates']} 条，新计入 {totals['added']} 条；"
+          f"用时 {totals['seconds']:.1f} 秒，{rate:.0f} 条/秒")
+
+    if args.rebuild:
+        kept = keep_unrebuilt_days(directory, target)
+        if kept:
+            print(f"保留 {len(kept)} 天没有快照可重建的原有数据（按旧词表计数）："
+                  f"{kept[0]} ~ {kept[-1]}")
+        # 全部完成后整体替换，查询方不会看到半成品
+        if os.path.exists(directory):
+            shutil.rmtree(f"{directory}.old", ignore_errors=True)
+            os.replace(directory, f"{directory}.old")
+        os.replace(target, directory)
+        shutil.rmtree(f"{directory}.old", ignore_errors=True)
+        print(f"趋势已重建：{directory}")
+
+
+if __name__ == "__main__":
+    main()
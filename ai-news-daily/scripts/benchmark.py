@@ -0,0 +1,1005 @@
+#!/usr/bin/env python3
+"""
+性能基准 - 离线衡量流水线各阶段耗时
+用法：
+    python scripts/benchmark.py e2e --replay recordings/20260210 --repeat 5 --json bench.json
+    python scripts/benchmark.py e2e --replay recordings/20260210 --latency feed=0.3,translate=0.05 --overlap
+    python scripts/benchmark.py hot --sizes 100,1000,10000 --json bench/hot.json
+    python scripts/benchmark.py compare bench/base.json bench/hot.json
+    python scripts/benchmark.py queue --workers 1,4,16 --jobs 400
+    python scripts/benchmark.py cluster --sizes 1000,10000,20000
+    python scripts/benchmark.py fanout --languages 1,2,4 --recipients 10,1000
+    python scripts/benchmark.py analyze --sizes 1000,10000,100000
+    python scripts/benchmark.py format --items 10000,100000
+    python scripts/benchmark.py budget --budget 2 --hang 8
+    python scripts/benchmark.py site --days 100,1000,3000
+    python scripts/benchmark.py farm --hosts 500 --feeds-per-host 2 --workers 8,32
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import feed_farm
+import fetch_ai_news as fan
+import send_email as se
+from record_replay import Tape, parse_latency
+import text_analysis
+from translation_plan import TranslationPlan
+
+
+def _environment() -> Dict:
+    """记录运行环境，便于跨提交对比"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "generated_at": datetime.now().isoformat(),
+    }
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "max": max(samples),
+    }
+
+
+@contextlib.contextmanager
+def _quiet():
+    """屏蔽流水线自身的进度输出"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+class StageTimer:
+    """按阶段累计耗时"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def run_e2e_once(replay_dir: str, latency: Dict[str, float], days: int, max_items: int,
+                 translate: bool, recipients: int, sources: List[str], overlap: bool = False) -> Dict[str, float]:
+    """离线跑一遍 获取 → 翻译 → 格式化 → 渲染 → 发信，返回各阶段耗时"""
+    timer = StageTimer()
+    tape = Tape(replay_dir, mode="replay", latency=latency)
+    sources = sources or list(tape.manifest.get("sources", {}).keys())
+
+    with _quiet():
+        translator = fan.NewsTranslator(tape=tape) if translate else None
+        limits = fan.NewsFormatter.rendered_chars([("markdown", "newsletter")])
+        with timer.stage("fetch"):
+            fetcher = fan.NewsFetcher(sources=sources, tape=tape, now=tape.recorded_at)
+            if overlap:
+                from pipeline import OverlappedPipeline
+                news = OverlappedPipeline(fetcher, translator, top_k=max_items,
+                                          limits=limits).run(days=days)[:max_items]
+            else:
+                news = fetcher.fetch_all(days=days)[:max_items]
+
+        with timer.stage("translate"):
+            if translator is not None:
+                news = translator.translate_items(news, max_items=max_items, limits=limits)
+
+        with timer.stage("format"):
+            markdown = fan.NewsFormatter(news).to_markdown(format_type="newsletter")
+
+        with timer.stage("render"):
+            html = se.markdown_to_html(markdown)
+
+        with timer.stage("email"):
+            sender = se.EmailSender(username="bench@example.com", password="replay",
+                                    smtp_class=tape.smtp_class())
+            for i in range(recipients):
+                sender.send_email(f"reader{i}@example.com", "AI 日报", html)
+
+    timer.stages["total"] = sum(timer.stages.values())
+    timer.stages["items"] = len(news)
+    return timer.stages
+
+
+# ============================================
+# 合成负载
+# ============================================
+_EN_WORDS = ("model", "agent", "inference", "benchmark", "open-source", "reasoning", "training",
+             "dataset", "robotics", "chip", "startup", "release", "paper", "safety", "policy")
+_ZH_WORDS = ("大模型", "智能体", "推理", "开源", "发布", "融资", "论文", "算力", "芯片",
+             "多模态", "安全", "监管", "应用", "训练", "数据集")
+_SYNTHETIC_SOURCES = [(key, src) for key, src in fan.SOURCES.items()]
+
+
+def _company_mentions() -> List[str]:
+    return [keywords[0] for keywords in fan.COMPANY_KEYWORDS.values()]
+
+
+def _date_string(rng: random.Random, when: datetime) -> str:
+    """混合多种 RSS 常见日期格式，含少量无法解析的值"""
+    choice = rng.random()
+    if choice < 0.45:
+        return when.strftime("%a, %d %b %Y %H:%M:%S +0000")
+    if choice < 0.75:
+        return when.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if choice < 0.9:
+        return when.strftime("%Y-%m-%dT%H:%M:%S+08:00")
+    if choice < 0.97:
+        return when.strftime("%B %d, %Y")
+    return "未知"
+
+
+def synthetic_items(n: int, seed: int = 42, zh_ratio: float = 0.3) -> Iterator[Dict]:
+    """生成 n 条中英混合的合成新闻（确定性，可复现）"""
+    rng = random.Random(seed)
+    companies = _company_mentions()
+    now = datetime(2026, 2, 10, 20, 0, 0)
+
+    for i in range(n):
+        key, source = _SYNTHETIC_SOURCES[i % len(_SYNTHETIC_SOURCES)]
+        is_zh = rng.random() < zh_ratio
+        words = _ZH_WORDS if is_zh else _EN_WORDS
+        sep = "" if is_zh else " "
+        mention = rng.choice(companies)
+        title = sep.join([mention] + rng.choices(words, k=rng.randint(4, 10)))
+        summary = sep.join(rng.choices(words, k=rng.randint(20, 60)) + [rng.choice(companies)])
+        item = {
+            "title": title,
+            "link": f"https://{key}.example.com/{i}",
+            "summary": summary[:400],
+            "published": _date_string(rng, now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))),
+            "source": source["name"],
+            "category": source.get("category", "general"),
+            "language": "zh" if is_zh else "en",
+        }
+        item["companies"] = fan.detect_companies(f"{title} {summary}")
+        yield item
+
+
+def _hot_functions() -> Dict[str, Tuple[Callable[[List[Dict]], Any], Callable[[Any], Any]]]:
+    """热点函数：名称 → (准备输入, 被测调用)，准备阶段不计时"""
+    translator = fan.NewsTranslator()
+
+    def each(fn):
+        def run(values):
+            for value in values:
+                fn(value)
+        return run
+
+    return {
+        "detect_companies": (
+            lambda items: [f"{it['title']} {it['summary']}" for it in items],
+            each(fan.detect_companies),
+        ),
+        "parse_date": (
+            lambda items: [it["published"] for it in items],
+            each(fan.parse_date),
+        ),
+        "is_mostly_chinese": (
+            lambda items: [text for it in items for text in (it["title"], it["summary"])],
+            each(translator._is_mostly_chinese),
+        ),
+        "analyze": (
+            lambda items: [dict(it) for it in items],
+            each(text_analysis.analyze),
+        ),
+        "translation_plan": (
+            lambda items: items,
+            lambda items: TranslationPlan(items, ["title", "summary"],
+                                          fan.NewsFormatter.rendered_chars([("markdown", "newsletter")])),
+        ),
+        "to_markdown": (
+            lambda items: fan.NewsFormatter(items),
+            lambda formatter: formatter.to_markdown(format_type="newsletter"),
+        ),
+        "parse_news_items": (
+            lambda items: fan.NewsFormatter(items).to_markdown(format_type="newsletter"),
+            se.parse_news_items,
+        ),
+        "get_category_icon": (
+            lambda items: [it["title"] for it in items],
+            each(se.get_category_icon),
+        ),
+        "generate_professional_html": (
+            lambda items: [dict(it, url=it["link"]) for it in items],
+            lambda parsed: se.generate_professional_html(parsed, "2026年02月10日"),
+        ),
+    }
+
+
+def measure(fn: Callable[[Any], Any], arg: Any, repeat: int) -> Dict[str, float]:
+    """计时（多次取统计值）+ 单独一次 tracemalloc 测峰值内存"""
+    fn(arg)  # 预热
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = _summarize(samples)
+    result["peak_bytes"] = peak
+    return result
+
+
+def bench_hot(args) -> Dict:
+    sizes = [int(x) for x in args.sizes.split(",")]
+    functions = _hot_functions()
+    selected = args.functions.split(",") if args.functions else list(functions)
+    unknown = [name for name in selected if name not in functions]
+    if unknown:
+        raise SystemExit(f"未知函数：{', '.join(unknown)}（可选 {', '.join(functions)}）")
+
+    results: Dict[str, Dict] = {}
+    for size in sizes:
+        items = list(synthetic_items(size, seed=args.seed))
+        for name in selected:
+            setup, fn = functions[name]
+            with _quiet():
+                stats = measure(fn, setup(items), args.repeat)
+            stats["per_item_us"] = stats["median"] / size * 1e6
+            results[f"{name}@{size}"] = stats
+            print(f"  {name:<28}{size:>9}  {stats['median'] * 1000:>10.2f} ms", file=sys.stderr)
+        del items
+
+    return {
+        "benchmark": "hot",
+        "environment": _environment(),
+        "params": {"sizes": sizes, "repeat": args.repeat, "seed": args.seed},
+        "results": results,
+    }
+
+
+def bench_compare(args) -> None:
+    """对比两份结果，中位耗时超过阈值即视为回归（有回归时退出码为 1）"""
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.candidate, "r", encoding="utf-8") as f:
+        cand = json.load(f)
+
+    regressions = []
+    print(f"{'基准项':<40}{'基线(ms)':>12}{'当前(ms)':>12}{'比值':>8}")
+    for name, stats in cand["results"].items():
+        if name not in base["results"]:
+            continue
+        before = base["results"][name]["median"]
+        after = stats["median"]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > 1 + args.threshold:
+            regressions.append(name)
+            flag = "  ⚠"
+        print(f"{name:<40}{before * 1000:>12.2f}{after * 1000:>12.2f}{ratio:>8.2f}{flag}")
+
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项回归（阈值 +{args.threshold:.0%}）")
+        sys.exit(1)
+    print("\n未发现回归")
+
+
+# 子进程：翻译引擎卡住 hang 秒，在 budget 秒的运行预算下翻译后直接结束
+_BUDGET_CHILD = """
+import sys, time
+import fetch_ai_news as fan
+from run_budget import RunBudget
+
+mode, budget_seconds, hang = sys.argv[1], float(sys.argv[2]), float(sys.argv[3])
+
+class HangingTranslator(fan.NewsTranslator):
+    available = True
+    def _translate_remote(self, text, source="en", target="zh"):
+        time.sleep(hang)
+        return text
+
+items = [{"title": f"Model {i} released", "summary": "An update to the model.", "language": "en"}
+         for i in range(5)]
+budget = RunBudget(budget_seconds)
+if mode == "multilang":
+    from multilang import translate_languages
+    translate_languages(HangingTranslator(), items, ["zh", "ja"], max_items=5, budget=budget)
+else:
+    HangingTranslator().translate_items(items, max_items=5, budget=budget)
+"""
+
+
+def bench_budget(args) -> Dict:
+    """运行预算：翻译引擎卡住时，进程须在预算内退出（而非等卡住的调用返回）；超出时退出码为 1"""
+    results: Dict[str, Dict] = {}
+    failures = []
+    limit = args.budget + args.margin
+    for mode in ("translate", "multilang"):
+        t = time.perf_counter()
+        subprocess.run([sys.executable, "-c", _BUDGET_CHILD, mode, str(args.budget), str(args.hang)],
+                       cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL, check=True)
+        elapsed = time.perf_counter() - t
+        results[f"exit:{mode}"] = dict(_summarize([elapsed]), limit=limit)
+        ok = elapsed <= limit
+        if not ok:
+            failures.append(mode)
+        print(f"  {mode:<10} 预算 {args.budget:.0f} 秒，引擎卡住 {args.hang:.0f} 秒：进程 {elapsed:.1f} 秒退出"
+              f"{'' if ok else f'  ⚠ 超过 {limit:.1f} 秒'}", file=sys.stderr)
+
+    report = {
+        "benchmark": "budget",
+        "environment": _environment(),
+        "params": {"budget": args.budget, "hang": args.hang, "margin": args.margin},
+        "results": results,
+    }
+    if failures:
+        print_table(report)
+        print(f"\n进程未在预算内退出：{', '.join(failures)}")
+        sys.exit(1)
+    return report
+
+
+def bench_queue(args) -> Dict:
+    """任务队列吞吐：固定任务量下，不同 worker 数的完成耗时"""
+    import job_queue
+
+    results: Dict[str, Dict] = {}
+    for workers in [int(x) for x in args.workers.split(",")]:
+        samples = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = os.path.join(tmp, "queue.db")
+                queue = job_queue.JobQueue(db_path)
+                start = time.perf_counter()
+                queue.enqueue("bench", "sleep", [{"seconds": args.job_seconds}] * args.jobs)
+                procs = job_queue.spawn_workers(db_path, workers, idle_exit=0.5, quiet=True)
+                counts = queue.wait("bench", "sleep", poll=0.02)
+                samples.append(time.perf_counter() - start)
+                queue.close()
+                for proc in procs:
+                    proc.join(timeout=10)
+            if counts.get("done", 0) != args.jobs:
+                raise SystemExit(f"任务未全部完成：{counts}")
+        stats = _summarize(samples)
+        stats["jobs_per_second"] = args.jobs / stats["median"]
+        results[f"queue@{workers}"] = stats
+        print(f"  {workers:>3} workers: {stats['jobs_per_second']:>8.1f} jobs/s", file=sys.stderr)
+
+    return {
+        "benchmark": "queue",
+        "environment": _environment(),
+        "params": {"jobs": args.jobs, "job_seconds": args.job_seconds, "repeat": args.repeat},
+        "results": results,
+    }
+
+
+def bench_cluster(args) -> Dict:
+    """话题聚类的规模曲线：向量化与 k-means 分别计时"""
+    import topic_cluster
+    if not topic_cluster.NUMPY_AVAILABLE:
+        raise SystemExit("话题聚类基准需要安装 numpy")
+
+    results: Dict[str, Dict] = {}
+    for size in [int(x) for x in args.sizes.split(",")]:
+        items = list(synthetic_items(size, seed=args.seed))
+        texts = [f"{it['title']} {it['title']} {it['summary']}" for it in items]
+        k = args.k or topic_cluster.default_k(size)
+        with _quiet():
+            vectorized = measure(topic_cluster.vectorize, texts, args.repeat)
+            matrix = topic_cluster.vectorize(texts)
+            clustered = measure(lambda m: topic_cluster.minibatch_kmeans(m, k), matrix, args.repeat)
+            total = measure(lambda its: topic_cluster.cluster_items(its, max_items=30, k=k), items, args.repeat)
+        for name, stats in (("vectorize", vectorized), ("kmeans", clustered), ("cluster_items", total)):
+            stats["items_per_second"] = size / stats["median"]
+            results[f"{name}@{size}"] = stats
+        print(f"  {size:>9} 条  k={k:<4} 向量化 {vectorized['median'] * 1000:>9.1f} ms  "
+              f"k-means {clustered['median'] * 1000:>9.1f} ms  合计 {total['median'] * 1000:>9.1f} ms",
+              file=sys.stderr)
+        del items, texts, matrix
+
+    return {
+        "benchmark": "cluster",
+        "environment": _environment(),
+        "params": {"sizes": args.sizes, "k": args.k, "repeat": args.repeat, "seed": args.seed},
+        "results": results,
+    }
+
+
+def _legacy_scans(items: List[Dict], query: str) -> List[Dict]:
+    """原方式：每个环节各自扫描文本（公司识别、中文检测、邮件分类、搜索、去重键）"""
+    translator = fan.NewsTranslator()
+    keyword = query.lower()
+    hits = []
+    for item in items:
+        item["companies"] = fan.detect_companies(f"{item['title']} {item['summary']}")
+        translator._is_mostly_chinese(item["title"])
+        translator._is_mostly_chinese(item["summary"])
+        se.get_category_icon(item["title"])
+        text_analysis._TITLE_KEY_RE.sub("", item["title"].lower())
+        if keyword in item["title"].lower() or keyword in item["summary"].lower():
+            hits.append(item)
+    return hits
+
+
+def _engine_scans(items: List[Dict], query: str) -> List[Dict]:
+    """统一分析：入库时分析一次，搜索等环节只读结果"""
+    terms = text_analysis.query_terms(query)
+    hits = []
+    for item in items:
+        text_analysis.analyze(item)
+        if text_analysis.matches(item, query, terms):
+            hits.append(item)
+    return hits
+
+
+# 检索语义须与原来的子串查找一致：(查询, 标题, 摘要, 应否命中)
+_SEARCH_CASES = [
+    ("gpt", "ChatGPT 更新", "", True),
+    ("AI", "OpenAI releases a new model", "", True),
+    ("字", "汉字识别模型开源", "", True),
+    ("谷", "谷歌发布新模型", "", True),
+    ("谷歌", "", "据谷歌介绍", True),
+    ("open", "OpenAI", "", True),
+    ("pen", "OpenAI", "", True),
+    ("open ai", "OpenAI", "", False),
+    ("gpt", "Claude 发布", "Anthropic", False),
+    ("歌谷", "谷歌发布新模型", "", False),
+]
+
+
+def check_search() -> None:
+    """检索结果与原子串查找逐条比对，不一致时抛出 AssertionError"""
+    for query, title, summary, expected in _SEARCH_CASES:
+        item = {"title": title, "summary": summary}
+        legacy = query.lower() in title.lower() or query.lower() in summary.lower()
+        assert legacy == expected, (query, title, summary)
+        assert text_analysis.matches(item, query) == expected, (query, title, summary)
+
+
+def bench_analyze(args) -> Dict:
+    """文本分析吞吐（条/秒）：原方式的多次扫描 vs. 入库时统一分析一次"""
+    check_search()
+    results: Dict[str, Dict] = {}
+    for size in [int(x) for x in args.sizes.split(",")]:
+        items = list(synthetic_items(size, seed=args.seed))
+        for name, fn in (("legacy", _legacy_scans), ("engine", _engine_scans)):
+            copies = [dict(it) for it in items]
+            hits = {id(it) for it in fn(copies, args.query)}
+            if name == "legacy":
+                expected = [i for i, it in enumerate(copies) if id(it) in hits]
+            else:
+                assert [i for i, it in enumerate(copies) if id(it) in hits] == expected, "检索结果与原方式不一致"
+            stats = measure(lambda its: fn(its, args.query), copies, args.repeat)
+            stats["items_per_second"] = size / stats["median"]
+            results[f"{name}@{size}"] = stats
+            del copies
+        legacy, engine = results[f"legacy@{size}"], results[f"engine@{size}"]
+        print(f"  {size:>9} 条  原方式 {legacy['items_per_second']:>10.0f} 条/秒  "
+              f"统一分析 {engine['items_per_second']:>10.0f} 条/秒（另得检索词、指纹、分类）", file=sys.stderr)
+        del items
+
+    return {
+        "benchmark": "analyze",
+        "environment": _environment(),
+        "params": {"sizes": args.sizes, "query": args.query, "repeat": args.repeat, "seed": args.seed},
+        "results": results,
+    }
+
+
+# --check 只比较拼接峰值超过该值的输出（纯文本只列前若干条，篇幅与条目数无关）
+_FORMAT_CHECK_MIN_BYTES = 1024 * 1024
+
+
+def bench_format(args) -> Dict:
+    """报告输出的峰值内存：流式 NewsFormatter.write vs. 原方式先拼出整篇再写入
+
+    --check 时，最大一批中流式峰值须低于拼接峰值的 --max-ratio，否则退出码为 1。"""
+    outputs = [tuple(view.split(":")) if ":" in view else (view, "standard") for view in args.outputs.split(",")]
+    results: Dict[str, Dict] = {}
+    sizes = [int(x) for x in args.items.split(",")]
+    failures = []
+    with open(os.devnull, "w", encoding="utf-8") as sink:
+        for size in sizes:
+            formatter = fan.NewsFormatter(list(synthetic_items(size, seed=args.seed)))
+            for output, format_type in outputs:
+                joined = measure(lambda f: sink.write("".join(f.iter_chunks(output, format_type))),
+                                 formatter, args.repeat)
+                streamed = measure(lambda f: f.write(sink, output, format_type), formatter, args.repeat)
+                label = output if output != "markdown" else f"markdown:{format_type}"
+                results[f"joined:{label}@{size}"] = joined
+                results[f"streamed:{label}@{size}"] = streamed
+                flagged = (args.check and size == max(sizes)
+                           and joined["peak_bytes"] >= _FORMAT_CHECK_MIN_BYTES
+                           and streamed["peak_bytes"] > joined["peak_bytes"] * args.max_ratio)
+                if flagged:
+                    failures.append(f"{label}@{size}")
+                print(f"  {size:>9} 条  {label:<20}  峰值内存：拼接 {joined['peak_bytes'] / 1024 / 1024:>8.2f} MB  "
+                      f"流式 {streamed['peak_bytes'] / 1024 / 1024:>8.2f} MB"
+                      f"{f'  ⚠ 超过拼接的 {args.max_ratio:.0%}' if flagged else ''}", file=sys.stderr)
+            del formatter
+
+    report = {
+        "benchmark": "format",
+        "environment": _environment(),
+        "params": {"items": args.items, "outputs": args.outputs, "repeat": args.repeat, "seed": args.seed},
+        "results": results,
+    }
+    if failures:
+        print_table(report)
+        print(f"\n流式输出峰值内存未明显低于拼接：{', '.join(failures)}")
+        sys.exit(1)
+    return report
+
+
+class _CountingTranslator(fan.NewsTranslator):
+    """模拟翻译引擎：每次远程调用计数并等待固定时长，不联网"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.calls = 0
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def _translate_remote(self, text: str, source: str = "en", target: str = "zh") -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        return f"[{target}] {text}"
+
+
+def bench_fanout(args) -> Dict:
+    """多语言扇出：翻译调用数随去重后的原文数增长，与 语言数 × 收件人数 无关"""
+    import digest
+    import multilang
+
+    all_languages = ["zh", "en", "ja", "ko", "fr", "de", "es", "pt"]
+    # 合成条目中有一半与其他条目的标题/摘要重复（同一新闻被多个源转载）
+    base = list(synthetic_items(args.items // 2 or 1, seed=args.seed))
+    limits = fan.NewsFormatter.rendered_chars([("markdown", "newsletter")])
+    results: Dict[str, Dict] = {}
+    for n_languages in [int(x) for x in args.languages.split(",")]:
+        languages = all_languages[:n_languages]
+        for recipients in [int(x) for x in args.recipients.split(",")]:
+            items = [dict(item, link=f"{item['link']}?via={i}") for i, item in
+                     enumerate((base * 2)[:args.items])]
+            store = digest.SubscriberStore([{"email": f"u{i}@example.com", "language": languages[i % n_languages]}
+                                            for i in range(recipients)])
+            translator = _CountingTranslator(args.delay)
+            # 不去重时每种语言需要翻译的段数；逐人翻译则每位收件人都要付出其语言的这份开销
+            planned = {lang: len(translator.plan(items, None, limits, target=lang).tasks) for lang in languages}
+            naive = sum(planned[languages[i % n_languages]] for i in range(recipients))
+            start = time.perf_counter()
+            with _quiet():
+                multilang.translate_languages(translator, items, languages, max_items=args.items, limits=limits,
+                                              max_workers=args.workers)
+            translated = time.perf_counter() - start
+            builder = digest.DigestBuilder(items)
+            with _quiet(), tempfile.TemporaryDirectory() as tmp:
+                stats = digest.send_digests(builder, store, out_dir=tmp)
+            elapsed = time.perf_counter() - start
+            results[f"fanout@{n_languages}x{recipients}"] = {
+                "min": elapsed, "median": elapsed, "mean": elapsed, "max": elapsed,
+                "translate_seconds": translated,
+                "engine_calls": translator.calls,
+                "planned_texts": sum(planned.values()),
+                "per_recipient_calls": naive,
+                "emails_rendered": stats["groups"],
+                "fragments_rendered": builder.rendered,
+            }
+            print(f"  {n_languages} 种语言 × {recipients:>5} 位收件人：翻译调用 {translator.calls:>5}"
+                  f"（去重前 {sum(planned.values())} 段，逐人翻译需 {naive}）  "
+                  f"邮件 {stats['groups']} 封  片段 {builder.rendered}  {elapsed:.2f}s", file=sys.stderr)
+
+    return {
+        "benchmark": "fanout",
+        "environment": _environment(),
+        "params": {"items": args.items, "languages": args.languages, "recipients": args.recipients,
+                   "delay": args.delay, "workers": args.workers, "seed": args.seed},
+        "results": results,
+    }
+
+
+def _write_history(reports_dir: str, start: datetime, n_days: int, per_day: int, seed: int) -> None:
+    """合成 n_days 天的条目 JSONL（ai-daily-YYYYMMDD.jsonl），每天 per_day 条"""
+    os.makedirs(reports_dir, exist_ok=True)
+    items = list(synthetic_items(per_day * min(n_days, 50), seed=seed))
+    for d in range(n_days):
+        day = start + timedelta(days=d)
+        chunk = items[(d % 50) * per_day:(d % 50 + 1) * per_day]
+        with open(os.path.join(reports_dir, f"ai-daily-{day.strftime('%Y%m%d')}.jsonl"), "w", encoding="utf-8") as f:
+            for item in chunk:
+                f.write(json.dumps(dict(item, title=f"{item['title']} #{d}"), ensure_ascii=False) + "\n")
+
+
+def bench_site(args) -> Dict:
+    """静态站点：全量构建随历史天数线性增长；每日增量构建只渲染新增的一天，
+    其余开销（列出来源、读写清单、逐天比对）与无变化时的构建一样随天数线性增长，但远小于全量"""
+    import static_site
+
+    start = datetime(2018, 1, 1)
+    results: Dict[str, Dict] = {}
+    for n_days in [int(x) for x in args.days.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            reports, out = os.path.join(tmp, "reports"), os.path.join(tmp, "site")
+            _write_history(reports, start, n_days, args.items, args.seed)
+            t = time.perf_counter()
+            full = static_site.StaticSite(out).build(static_site.discover(reports))
+            full_seconds = time.perf_counter() - t
+
+            samples = []
+            for r in range(args.repeat):
+                # 每次新增一天：渲染一页，更新一个月份页、一个检索分片和相关公司页
+                _write_history(reports, start + timedelta(days=n_days + r), 1, args.items, args.seed + r + 1)
+                t = time.perf_counter()
+                stats = static_site.StaticSite(out).build(static_site.discover(reports))
+                samples.append(time.perf_counter() - t)
+                assert stats["rendered"] == 1, stats
+
+            t = time.perf_counter()
+            noop = static_site.StaticSite(out).build(static_site.discover(reports))
+            noop_seconds = time.perf_counter() - t
+            assert noop["rendered"] == 0, noop
+
+        results[f"full@{n_days}"] = _summarize([full_seconds])
+        results[f"incremental@{n_days}"] = dict(_summarize(samples), rendered=1)
+        results[f"noop@{n_days}"] = dict(_summarize([noop_seconds]), rendered=noop["rendered"],
+                                         unchanged=noop["unchanged"])
+        print(f"  历史 {n_days:>6} 天  全量 {full_seconds * 1000:>9.0f} ms（{full['rendered']} 页）  "
+              f"新增一天 {statistics.median(samples) * 1000:>7.1f} ms  "
+              f"无变化 {noop_seconds * 1000:>7.1f} ms（比对 {noop['unchanged']} 天）",
+              file=sys.stderr)
+
+    return {
+        "benchmark": "site",
+        "environment": _environment(),
+        "params": {"days": args.days, "items": args.items, "repeat": args.repeat, "seed": args.seed},
+        "results": results,
+    }
+
+
+def _classify_error(error: Exception) -> str:
+    import requests
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.HTTPError):
+        return "http_error"
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+        return "connection"
+    return type(error).__name__
+
+
+class _FarmFetcher(fan.NewsFetcher):
+    """记录每个源的耗时、下载字节数与结果（按 URL）"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.samples: Dict[str, Dict] = {}
+
+    def _download(self, source: Dict, timeout: float = 30) -> str:
+        sample = self.samples.setdefault(source["url"], {})
+        start = time.perf_counter()
+        try:
+            text = super()._download(source, timeout)
+        except Exception as e:
+            sample["error"] = _classify_error(e)
+            raise
+        finally:
+            sample["download"] = time.perf_counter() - start
+        sample["bytes"] = len(text)
+        return text
+
+    def fetch_rss(self, source_key: str, timeout: float = 30) -> List[Dict]:
+        start = time.perf_counter()
+        items = super().fetch_rss(source_key, timeout)
+        sample = self.samples.setdefault(self._source(source_key)["url"], {})
+        sample["seconds"] = time.perf_counter() - start
+        sample["items"] = len(items)
+        return items
+
+
+@contextlib.contextmanager
+def _peak_rss(interval: float = 0.02):
+    """后台采样本进程 RSS，退出时 result["peak_mb"] 为峰值；不支持 /proc 时用 ru_maxrss"""
+    result: Dict[str, float] = {}
+    page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+    stop = threading.Event()
+
+    def rss() -> float:
+        try:
+            with open("/proc/self/statm", "r") as f:
+                return int(f.read().split()[1]) * page / 1024 / 1024
+        except (OSError, ValueError, IndexError):
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def sample():
+        while not stop.wait(interval):
+            result["peak_mb"] = max(result["peak_mb"], rss())
+
+    result["start_mb"] = result["peak_mb"] = rss()
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield result
+    finally:
+        stop.set()
+        thread.join()
+        result["peak_mb"] = max(result["peak_mb"], rss())
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+# 各故障类型下客户端应有的结果（truncate 可能解析出部分条目）
+_FARM_EXPECTED = {"ok": ("ok",), "timeout": ("timeout",), "error": ("http_error",), "304": ("empty",),
+                  "truncate": ("ok", "empty"), "reset": ("connection",)}
+
+
+def bench_farm(args) -> Dict:
+    """获取阶段压测：本地 feed 农场（见 feed_farm.py）在子进程中运行，
+    统计吞吐、单源耗时分位数、峰值内存，并按注入的故障类型核对错误处理"""
+    import multiprocessing
+    from source_registry import SourceRegistry
+
+    if not fan.REQUESTS_AVAILABLE or not fan.FEEDPARSER_AVAILABLE:
+        raise SystemExit("压测需要安装 requests 和 feedparser")
+    options = feed_farm.farm_options(args)
+    farm = feed_farm.FeedFarm(**options)
+    ctx = multiprocessing.get_context("spawn")
+    conn, child = ctx.Pipe()
+    server = ctx.Process(target=feed_farm.serve_in_process, args=(options, child), daemon=True)
+    server.start()
+    port = conn.recv()
+    expected = {farm.url(port, h, f): farm.mode(h, f) for h, f in farm.feeds()}
+    print(f"  feed 农场：{len(expected)} 个源（{farm.hosts} 个主机），端口 {port}", file=sys.stderr)
+
+    results: Dict[str, Dict] = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            registry_path = os.path.join(tmp, "farm.json")
+            with open(registry_path, "w", encoding="utf-8") as f:
+                json.dump(farm.registry(port), f)
+            registry = SourceRegistry([registry_path], cache_dir=tmp, include_builtin=False)
+            keys = [farm.key(h, f) for h, f in farm.feeds()]
+
+            for workers in [int(x) for x in args.workers.split(",")]:
+                fetcher = _FarmFetcher(sources=keys, registry=registry)
+                with _quiet(), _peak_rss() as memory:
+                    start = time.perf_counter()
+                    yielded = items = 0
+                    for _, fetched in fetcher.iter_fetch(max_workers=workers, timeout=args.timeout):
+                        yielded += 1
+                        items += len(fetched)
+                    elapsed = time.perf_counter() - start
+
+                latencies = [s["seconds"] for s in fetcher.samples.values() if "seconds" in s]
+                outcomes: Dict[str, Dict[str, int]] = {}
+                unexpected = 0
+                for url, mode in expected.items():
+                    sample = fetcher.samples.get(url, {})
+                    outcome = sample.get("error") or ("ok" if sample.get("items") else "empty")
+                    outcomes.setdefault(mode, {}).setdefault(outcome, 0)
+                    outcomes[mode][outcome] += 1
+                    unexpected += outcome not in _FARM_EXPECTED[mode]
+                downloaded = sum(s.get("bytes", 0) for s in fetcher.samples.values())
+                stats = dict(_summarize(latencies),
+                             p50=_percentile(latencies, 0.5), p90=_percentile(latencies, 0.9),
+                             p99=_percentile(latencies, 0.99), wall_seconds=elapsed,
+                             sources_per_second=len(keys) / elapsed, items_per_second=items / elapsed,
+                             mb_per_second=downloaded / elapsed / 1024 / 1024,
+                             peak_rss_mb=memory["peak_mb"], rss_growth_mb=memory["peak_mb"] - memory["start_mb"],
+                             items=items, sources=len(keys), yielded=yielded, unexpected=unexpected,
+                             outcomes=outcomes)
+                results[f"farm@{workers}"] = stats
+                print(f"  {workers:>4} 并发  {elapsed:>7.2f}s  {stats['sources_per_second']:>7.1f} 源/秒  "
+                      f"{stats['items_per_second']:>8.0f} 条/秒  单源 p50 {stats['p50'] * 1000:.0f} ms / "
+                      f"p90 {stats['p90'] * 1000:.0f} ms / p99 {stats['p99'] * 1000:.0f} ms  "
+                      f"峰值 RSS {memory['peak_mb']:.0f} MB（+{stats['rss_growth_mb']:.0f}）", file=sys.stderr)
+                for mode, counts in sorted(outcomes.items()):
+                    marks = "，".join(f"{outcome} {n}" + ("" if outcome in _FARM_EXPECTED[mode] else " ✗")
+                                     for outcome, n in sorted(counts.items()))
+                    print(f"        {mode:<9} → {marks}", file=sys.stderr)
+                if unexpected or yielded != len(keys):
+                    print(f"        ✗ {unexpected} 个源的处理结果与注入的行为不符，产出 {yielded}/{len(keys)} 个源",
+                          file=sys.stderr)
+    finally:
+        conn.send(None)
+        server.join(timeout=10)
+
+    return {
+        "benchmark": "farm",
+        "environment": _environment(),
+        "params": dict(options, workers=args.workers, timeout=args.timeout),
+        "results": results,
+    }
+
+
+def bench_e2e(args) -> Dict:
+    latency = parse_latency(args.latency)
+    sources = args.sources.split(",") if args.sources else []
+    runs = [
+        run_e2e_once(args.replay, latency, args.days, args.max_items,
+                     not args.no_translate, args.recipients, sources, args.overlap)
+        for _ in range(args.repeat)
+    ]
+
+    stages = [k for k in runs[0] if k != "items"]
+    results = {stage: _summarize([run[stage] for run in runs]) for stage in stages}
+    return {
+        "benchmark": "e2e",
+        "environment": _environment(),
+        "params": {
+            "replay": args.replay,
+            "latency": latency,
+            "days": args.days,
+            "max_items": args.max_items,
+            "recipients": args.recipients,
+            "repeat": args.repeat,
+            "overlap": args.overlap,
+        },
+        "items": runs[0]["items"],
+        "results": results,
+    }
+
+
+def print_table(report: Dict) -> None:
+    print(f"基准：{report['benchmark']}  提交：{report['environment'].get('commit') or '未知'}")
+    print(f"{'阶段':<40}{'最小(ms)':>12}{'中位(ms)':>12}{'平均(ms)':>12}")
+    for name, stats in report["results"].items():
+        print(f"{name:<40}{stats['min'] * 1000:>12.2f}{stats['median'] * 1000:>12.2f}{stats['mean'] * 1000:>12.2f}")
+
+
+def write_report(report: Dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"已保存至：{path}")
+
+
+COMMANDS: Dict[str, Callable] = {
+    "e2e": bench_e2e,
+    "hot": bench_hot,
+    "compare": bench_compare,
+    "queue": bench_queue,
+    "cluster": bench_cluster,
+    "fanout": bench_fanout,
+    "analyze": bench_analyze,
+    "format": bench_format,
+    "budget": bench_budget,
+    "site": bench_site,
+    "farm": bench_farm,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI 新闻流水线性能基准")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    e2e = sub.add_parser("e2e", help="基于录制内容离线跑完整流水线")
+    e2e.add_argument("--replay", required=True, metavar="DIR", help="录制目录（由 --record 生成）")
+    e2e.add_argument("--latency", help="注入延迟，如 0.2 或 feed=0.3,translate=0.05")
+    e2e.add_argument("--sources", help="只回放指定新闻源")
+    e2e.add_argument("--days", type=int, default=2)
+    e2e.add_argument("--max-items", type=int, default=20)
+    e2e.add_argument("--recipients", type=int, default=1, help="模拟收件人数")
+    e2e.add_argument("--no-translate", action="store_true")
+    e2e.add_argument("--overlap", action="store_true", help="使用重叠流水线（见 pipeline.py）")
+    e2e.add_argument("--repeat", type=int, default=5)
+    e2e.add_argument("--json", help="结果输出路径（JSON）")
+
+    hot = sub.add_parser("hot", help="合成负载下的热点函数基准")
+    hot.add_argument("--sizes", default="100,1000,10000", help="条目数，逗号分隔（最大可到 1000000）")
+    hot.add_argument("--functions", help="只测指定函数，逗号分隔")
+    hot.add_argument("--repeat", type=int, default=5)
+    hot.add_argument("--seed", type=int, default=42)
+    hot.add_argument("--json", help="结果输出路径（JSON）")
+
+    queue = sub.add_parser("queue", help="任务队列在不同 worker 数下的吞吐")
+    queue.add_argument("--workers", default="1,4,16", help="worker 数，逗号分隔")
+    queue.add_argument("--jobs", type=int, default=400)
+    queue.add_argument("--job-seconds", type=float, default=0.02, help="每个任务模拟的 I/O 等待")
+    queue.add_argument("--repeat", type=int, default=3)
+    queue.add_argument("--json", help="结果输出路径（JSON）")
+
+    cluster = sub.add_parser("cluster", help="话题聚类在不同规模下的耗时")
+    cluster.add_argument("--sizes", default="1000,5000,10000,20000", help="条目数，逗号分隔")
+    cluster.add_argument("--k", type=int, default=None, help="簇数（默认约为条目数的平方根）")
+    cluster.add_argument("--repeat", type=int, default=3)
+    cluster.add_argument("--seed", type=int, default=42)
+    cluster.add_argument("--json", help="结果输出路径（JSON）")
+
+    fanout = sub.add_parser("fanout", help="多语言扇出：翻译调用数与语言数、收件人数的关系")
+    fanout.add_argument("--items", type=int, default=40, help="条目数（其中一半为转载重复）")
+    fanout.add_argument("--languages", default="1,2,4", help="目标语言数，逗号分隔（最多 8）")
+    fanout.add_argument("--recipients", default="10,1000", help="收件人数，逗号分隔")
+    fanout.add_argument("--delay", type=float, default=0.005, help="每次翻译调用模拟的耗时（秒）")
+    fanout.add_argument("--workers", type=int, default=4, help="翻译并发数")
+    fanout.add_argument("--seed", type=int, default=42)
+    fanout.add_argument("--json", help="结果输出路径（JSON）")
+
+    analyze = sub.add_parser("analyze", help="文本分析吞吐：多次扫描 vs. 入库时统一分析")
+    analyze.add_argument("--sizes", default="1000,10000,100000", help="条目数，逗号分隔")
+    analyze.add_argument("--query", default="open", help="同时执行的搜索词")
+    analyze.add_argument("--repeat", type=int, default=3)
+    analyze.add_argument("--seed", type=int, default=42)
+    analyze.add_argument("--json", help="结果输出路径（JSON）")
+
+    fmt = sub.add_parser("format", help="报告输出峰值内存：流式写入 vs. 拼接整篇（tracemalloc）")
+    fmt.add_argument("--items", default="1000,10000,100000", help="条目数，逗号分隔")
+    fmt.add_argument("--outputs", default="markdown:standard,json,jsonl,text",
+                     help="输出类型，逗号分隔；Markdown 可带格式，如 markdown:newsletter")
+    fmt.add_argument("--repeat", type=int, default=3)
+    fmt.add_argument("--seed", type=int, default=42)
+    fmt.add_argument("--check", action="store_true", help="最大一批中流式峰值超过拼接峰值的 --max-ratio 时退出码为 1")
+    fmt.add_argument("--max-ratio", type=float, default=0.1, help="--check 允许的流式/拼接峰值比")
+    fmt.add_argument("--json", help="结果输出路径（JSON）")
+
+    budget = sub.add_parser("budget", help="运行预算：翻译卡住时进程能否按时退出（超时退出码 1）")
+    budget.add_argument("--budget", type=float, default=2.0, help="运行预算（秒）")
+    budget.add_argument("--hang", type=float, default=8.0, help="模拟翻译引擎卡住的秒数")
+    budget.add_argument("--margin", type=float, default=2.0, help="允许超出预算的秒数（含解释器启动与导入）")
+    budget.add_argument("--json", help="结果输出路径（JSON）")
+
+    site = sub.add_parser("site", help="静态站点：全量构建 vs. 每日增量构建随历史天数的变化")
+    site.add_argument("--days", default="100,1000,3000", help="历史天数，逗号分隔")
+    site.add_argument("--items", type=int, default=20, help="每天的条目数")
+    site.add_argument("--repeat", type=int, default=5, help="增量构建次数（每次新增一天）")
+    site.add_argument("--seed", type=int, default=42)
+    site.add_argument("--json", help="结果输出路径（JSON）")
+
+    farm = sub.add_parser("farm", help="获取阶段压测：本地 feed 农场下的吞吐、延迟分位数、峰值内存与错误处理")
+    feed_farm.add_farm_arguments(farm)
+    farm.add_argument("--workers", default="8,32", help="获取并发数，逗号分隔")
+    farm.add_argument("--timeout", type=float, default=5.0, help="单个源的请求超时（秒）")
+    farm.add_argument("--json", help="结果输出路径（JSON）")
+
+    compare = sub.add_parser("compare", help="对比两份基准结果")
+    compare.add_argument("baseline", help="基线结果 JSON")
+    compare.add_argument("candidate", help="当前结果 JSON")
+    compare.add_argument("--threshold", type=float, default=0.1, help="回归阈值（默认 0.1 即 +10%%）")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = COMMANDS[args.command](args)
+    if report is None:
+        return
+    print_table(report)
+    if args.json:
+        write_report(report, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -23,13 +23,31 @@ fi
 REPORTS_DIR="$PROJECT_DIR/reports"
 DATE=$(date +%Y%m%d)
 NEWS_FILE="$REPORTS_DIR/ai-daily-$DATE.md"
+ITEMS_FILE="$REPORTS_DIR/ai-daily-$DATE.jsonl"
+RUN_REPORT="$REPORTS_DIR/ai-daily-$DATE.run.json"
+# 整次生成的时间预算（秒），超时的环节降级（跳过慢源、摘要不翻译等），保证准时发出
+RUN_BUDGET="${RUN_BUDGET:-900}"
+# 旧文件归档的保留分层（见 archive.py）；设置 ARCHIVE_FEEDS=1 时同时录制并归档原始 RSS
+ARCHIVE_TIERS="${ARCHIVE_TIERS:-pack=7,compact=30,drop=0}"
+FETCH_EXTRA=()
+if [ -n "$ARCHIVE_FEEDS" ]; then
+    FETCH_EXTRA+=(--record "$REPORTS_DIR/feeds-$DATE")
+fi
+# 多语言报告，如 REPORT_LANGUAGES=zh,en（第一个为主语言）；个性化摘要按订阅者语言附上对应报告
+DIGEST_ATTACH="$NEWS_FILE"
+if [ -n "$REPORT_LANGUAGES" ]; then
+    FETCH_EXTRA+=(--languages "$REPORT_LANGUAGES")
+    DIGEST_ATTACH="$REPORTS_DIR/ai-daily-$DATE.{lang}.md"
+fi
 
 # 收件人列表文件路径（在 .env 同目录）
 # PROJECT_DIR 在脚本目录结构下是 ai-news-daily 的父目录
 if [ -f "$PROJECT_DIR/.env" ]; then
     EMAIL_LIST_FILE="$PROJECT_DIR/email_list"
+    SUBSCRIBERS_FILE="$PROJECT_DIR/subscribers.json"
 else
     EMAIL_LIST_FILE="$PROJECT_DIR/../email_list"
+    SUBSCRIBERS_FILE="$PROJECT_DIR/../subscribers.json"
 fi
 
 # 颜色输出
@@ -60,6 +78,10 @@ if [ -n "$1" ]; then
     # 如果提供了命令行参数，使用参数作为收件人
     RECIPIENTS=("$1")
     echo -e "${BLUE}📧 收件人(命令行指定): $1${NC}"
+elif [ -f "$SUBSCRIBERS_FILE" ]; then
+    # 有订阅者偏好文件时按偏好发送个性化摘要（见 digest.py）
+    echo -e "${BLUE}📧 使用订阅者偏好文件: $SUBSCRIBERS_FILE${NC}"
+    USE_DIGEST=1
 elif [ -f "$EMAIL_LIST_FILE" ]; then
     # 从 email_list 文件读取收件人
     echo -e "${BLUE}📧 从邮件列表读取收件人: $EMAIL_LIST_FILE${NC}"
@@ -76,15 +98,17 @@ else
     exit 1
 fi
 
-if [ ${#RECIPIENTS[@]} -eq 0 ]; then
-    echo -e "${RED}错误: 未找到有效的收件人邮箱${NC}"
-    exit 1
-fi
+if [ -z "$USE_DIGEST" ]; then
+    if [ ${#RECIPIENTS[@]} -eq 0 ]; then
+        echo -e "${RED}错误: 未找到有效的收件人邮箱${NC}"
+        exit 1
+    fi
 
-echo -e "${GREEN}✓ 共找到 ${#RECIPIENTS[@]} 个收件人${NC}"
-for email in "${RECIPIENTS[@]}"; do
-    echo "  - $email"
-done
+    echo -e "${GREEN}✓ 共找到 ${#RECIPIENTS[@]} 个收件人${NC}"
+    for email in "${RECIPIENTS[@]}"; do
+        echo "  - $email"
+    done
+fi
 echo ""
 
 # 创建报告目录
@@ -108,7 +132,13 @@ $VENV_PYTHON "$SCRIPT_DIR/fetch_ai_news.py" \
     --format newsletter \
     --title "🤖 AI 每日精选" \
     --max-items 20 \
-    --save-to "$NEWS_FILE"
+    --budget "$RUN_BUDGET" \
+    --run-cache \
+    --trends \
+    --run-report "$RUN_REPORT" \
+    --save-to "$NEWS_FILE" \
+    --save-items "$ITEMS_FILE" \
+    "${FETCH_EXTRA[@]}"
 
 if [ ! -f "$NEWS_FILE" ]; then
     echo -e "${RED}错误: 新闻报告生成失败${NC}"
@@ -123,6 +153,15 @@ SUCCESS_COUNT=0
 FAIL_COUNT=0
 
 echo -e "${BLUE}📧 步骤 2/3: 发送邮件...${NC}"
+if [ -n "$USE_DIGEST" ]; then
+    # 共用一次抓取结果，偏好相同的订阅者共用同一封邮件
+    $VENV_PYTHON "$SCRIPT_DIR/digest.py" \
+        --items "$ITEMS_FILE" \
+        --subscribers "$SUBSCRIBERS_FILE" \
+        --run-report "$RUN_REPORT" \
+        --attach "$DIGEST_ATTACH"
+    RECIPIENTS=()
+fi
 for RECIPIENT_EMAIL in "${RECIPIENTS[@]}"; do
     echo -e "${BLUE}  正在发送给: $RECIPIENT_EMAIL ...${NC}"
     
@@ -130,6 +169,7 @@ for RECIPIENT_EMAIL in "${RECIPIENTS[@]}"; do
         --to "$RECIPIENT_EMAIL" \
         --file "$NEWS_FILE" \
         --format html \
+        --run-report "$RUN_REPORT" \
         --subject "🤖 AI 日报 $(date '+%m月%d日')" \
         --attach; then
         echo -e "${GREEN}  ✓ 发送成功: $RECIPIENT_EMAIL${NC}"
@@ -141,17 +181,32 @@ for RECIPIENT_EMAIL in "${RECIPIENTS[@]}"; do
 done
 
 echo ""
-if [ $FAIL_COUNT -eq 0 ]; then
+if [ -n "$USE_DIGEST" ]; then
+    echo -e "${GREEN}✓ 个性化摘要发送完成${NC}"
+elif [ $FAIL_COUNT -eq 0 ]; then
     echo -e "${GREEN}✓ 所有邮件发送成功! ($SUCCESS_COUNT/${#RECIPIENTS[@]})${NC}"
 else
     echo -e "${YELLOW}⚠ 邮件发送完成: 成功 $SUCCESS_COUNT, 失败 $FAIL_COUNT${NC}"
 fi
 
-# 清理旧文件
+# 归档旧文件
 echo ""
-echo -e "${BLUE}步骤 3/3: 清理旧文件...${NC}"
-find "$REPORTS_DIR" -name "ai-daily-*.md" -mtime +7 -delete 2>/dev/null || true
-echo -e "${GREEN}✓ 已清理 7 天前的旧报告${NC}"
+echo -e "${BLUE}步骤 3/3: 归档旧文件...${NC}"
+if $VENV_PYTHON "$SCRIPT_DIR/archive.py" --reports "$REPORTS_DIR" run --tiers "$ARCHIVE_TIERS"; then
+    echo -e "${GREEN}✓ 已归档旧报告（查看：archive.py show YYYY-MM-DD）${NC}"
+else
+    echo -e "${YELLOW}⚠ 归档失败，旧报告保留在 $REPORTS_DIR${NC}"
+fi
+
+# 发布静态站点（设置 SITE_DIR 时；增量构建，只渲染新增或变化的日期，见 static_site.py）
+if [ -n "$SITE_DIR" ]; then
+    echo ""
+    if $VENV_PYTHON "$SCRIPT_DIR/static_site.py" --reports "$REPORTS_DIR" --out "$SITE_DIR"; then
+        echo -e "${GREEN}✓ 静态站点已更新: $SITE_DIR${NC}"
+    else
+        echo -e "${YELLOW}⚠ 静态站点更新失败${NC}"
+    fi
+fi
 
 echo ""
 echo "=========================================="
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+个性化摘要 - 按订阅者偏好（分类、公司、语言、条数）生成并发送日报邮件
+特点：所有订阅者共用一次抓取结果，条目按分类和公司建立索引；
+每条新闻的 HTML 片段只渲染一次，偏好相同的订阅者共用同一封邮件正文。
+
+订阅者文件（subscribers.json）：
+    {
+      "defaults": {"language": "zh", "max_items": 15},
+      "subscribers": [
+        {"email": "a@example.com", "categories": ["research"], "max_items": 8},
+        {"email": "b@example.com", "companies": ["OpenAI", "Anthropic"], "language": "en"}
+      ]
+    }
+categories 与 companies 取并集；都不填则接收全部新闻。
+
+用法：
+    python scripts/fetch_ai_news.py --translate --save-to reports/ai-daily.md --save-items reports/ai-daily.jsonl
+    python scripts/digest.py --items reports/ai-daily.jsonl --subscribers subscribers.json
+    python scripts/digest.py --items reports/ai-daily.jsonl --email-list email_list --out-dir /tmp/digests
+    python scripts/digest.py --items reports/ai-daily.jsonl --subscribers subscribers.json --attach 'reports/ai-daily.{lang}.md'
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from multilang import localize
+from run_budget import load_notes
+from send_email import EmailSender, generate_professional_html, parse_news_items, render_news_item_html
+
+
+DEFAULT_PREFERENCES = {
+    "categories": [],
+    "companies": [],
+    "language": "zh",
+    "max_items": 15,
+}
+
+SUBJECTS = {
+    "zh": "🤖 AI 日报 {date:%m月%d日}",
+    "en": "🤖 AI Daily {date:%b %d}",
+}
+
+
+def _names(value) -> List[str]:
+    """分类、公司列表：数组，或逗号分隔的字符串（如 "research,product"）"""
+    if isinstance(value, str):
+        value = value.split(",")
+    return sorted({c.strip() for c in value if c.strip()})
+
+
+class SubscriberStore:
+    """订阅者偏好存储：subscribers.json，或纯邮箱列表（email_list，使用默认偏好）"""
+
+    def __init__(self, subscribers: List[Dict], defaults: Optional[Dict] = None):
+        self.defaults = {**DEFAULT_PREFERENCES, **(defaults or {})}
+        self.subscribers = [self._normalize(sub) for sub in subscribers if sub.get("email")]
+
+    def _normalize(self, sub: Dict) -> Dict:
+        prefs = {**self.defaults, **{k: v for k, v in sub.items() if v is not None}}
+        return {
+            "email": prefs["email"].strip(),
+            "categories": _names(prefs["categories"]),
+            "companies": _names(prefs["companies"]),
+            "language": prefs["language"],
+            "max_items": int(prefs["max_items"]),
+        }
+
+    @classmethod
+    def load(cls, path: str) -> "SubscriberStore":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            return cls(data)
+        return cls(data.get("subscribers", []), data.get("defaults"))
+
+    @classmethod
+    def from_email_list(cls, path: str, defaults: Optional[Dict] = None) -> "SubscriberStore":
+        subscribers = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    subscribers.append({"email": line})
+        return cls(subscribers, defaults)
+
+    def groups(self) -> Dict[Tuple, List[str]]:
+        """按偏好分组：偏好完全相同的订阅者收到同一封邮件"""
+        grouped: Dict[Tuple, List[str]] = {}
+        for sub in self.subscribers:
+            key = (tuple(sub["categories"]), tuple(sub["companies"]), sub["language"], sub["max_items"])
+            grouped.setdefault(key, []).append(sub["email"])
+        return grouped
+
+
+class DigestBuilder:
+    """基于一次抓取结果为各订阅组挑选条目并拼装邮件"""
+
+    def __init__(self, items: List[Dict], date_str: Optional[str] = None, notes: Optional[List[str]] = None):
+        self.items = items
+        self.notes = notes or []
+        self.date_str = date_str or datetime.now().strftime('%Y年%m月%d日')
+        self.by_category: Dict[str, List[int]] = {}
+        self.by_company: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            self.by_category.setdefault(item.get("category", "general"), []).append(i)
+            for company in item.get("companies", []):
+                self.by_company.setdefault(company, []).append(i)
+        # (条目序号, 语言) -> HTML 片段
+        self._fragments: Dict[Tuple[int, str], str] = {}
+        self.rendered = 0
+
+    def select(self, categories=(), companies=(), max_items: int = 15) -> List[int]:
+        """按分类/公司挑选条目，保持原有排序"""
+        if not categories and not companies:
+            return list(range(min(max_items, len(self.items))))
+        picked = set()
+        for category in categories:
+            picked.update(self.by_category.get(category, ()))
+        for company in companies:
+            picked.update(self.by_company.get(company, ()))
+        return sorted(picked)[:max_items]
+
+    def fragment(self, index: int, language: str) -> str:
+        key = (index, language)
+        if key not in self._fragments:
+            self._fragments[key] = render_news_item_html(localize(self.items[index], language))
+            self.rendered += 1
+        return self._fragments[key]
+
+    def build(self, categories=(), companies=(), language: str = "zh", max_items: int = 15) -> Optional[str]:
+        indexes = self.select(categories, companies, max_items)
+        if not indexes:
+            return None
+        fragments = [self.fragment(i, language) for i in indexes]
+        return generate_professional_html([self.items[i] for i in indexes], self.date_str, fragments, self.notes)
+
+
+def load_items(path: str) -> List[Dict]:
+    """读取 fetch_ai_news.py --save-items 产出的 JSONL；也兼容 Markdown 日报"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".json")):
+            return [json.loads(line) for line in f if line.strip()]
+        return parse_news_items(f.read())
+
+
+def resolve_attachment(path: Optional[str], language: str) -> Optional[str]:
+    """附件路径可含 {lang}，按订阅语言选用对应报告；该语言的报告不存在时不附加"""
+    if not path or "{lang}" not in path:
+        return path
+    resolved = path.replace("{lang}", language)
+    if not os.path.exists(resolved):
+        print(f"  提示：没有 {language} 报告（{resolved}），不附加附件")
+        return None
+    return resolved
+
+
+def send_digests(builder: DigestBuilder, store: SubscriberStore, sender: Optional[EmailSender] = None,
+                 subject: Optional[str] = None, attachment_path: Optional[str] = None,
+                 out_dir: Optional[str] = None) -> Dict[str, int]:
+    """逐组渲染一次、逐人发送；out_dir 不为空时只写出 HTML 不发送"""
+    stats = {"groups": 0, "sent": 0, "failed": 0, "skipped": 0}
+    now = datetime.now()
+    for n, ((categories, companies, language, max_items), emails) in enumerate(store.groups().items(), 1):
+        html = builder.build(categories, companies, language, max_items)
+        if html is None:
+            print(f"  跳过 {len(emails)} 位订阅者：没有符合偏好的新闻")
+            stats["skipped"] += len(emails)
+            continue
+        stats["groups"] += 1
+
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+            path = os.path.join(out_dir, f"digest-{n:03d}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+            print(f"  {path} -> {', '.join(emails)}")
+            continue
+
+        group_subject = subject or SUBJECTS.get(language, SUBJECTS["zh"]).format(date=now)
+        group_attachment = resolve_attachment(attachment_path, language)
+        for email in emails:
+            if sender.send_email(email, group_subject, html, content_type="html",
+                                 attachment_path=group_attachment):
+                stats["sent"] += 1
+            else:
+                stats["failed"] += 1
+    return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="按订阅者偏好发送个性化 AI 日报")
+    parser.add_argument("--items", required=True, help="新闻条目文件（--save-items 产出的 JSONL，或 Markdown 日报）")
+    parser.add_argument("--subscribers", help="订阅者偏好文件（JSON）")
+    parser.add_argument("--email-list", help="纯邮箱列表，所有人使用默认偏好")
+    parser.add_argument("--subject", help="邮件主题（默认按订阅语言生成）")
+    parser.add_argument("--attach", metavar="PATH", help="附加文件（如 Markdown 日报）；可含 {lang}，按订阅语言选用 --languages 生成的报告")
+    parser.add_argument("--run-report", help="运行报告路径，其中的降级说明会显示在邮件中")
+    parser.add_argument("--out-dir", help="只把每组邮件写成 HTML 文件，不发送")
+    parser.add_argument("--record", metavar="DIR", help="录制 SMTP 投递内容")
+    parser.add_argument("--replay", metavar="DIR", help="离线回放，不连接 SMTP 服务器")
+    parser.add_argument("--replay-latency", help="回放时注入的延迟（秒）")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.subscribers:
+        store = SubscriberStore.load(args.subscribers)
+    elif args.email_list:
+        store = SubscriberStore.from_email_list(args.email_list)
+    else:
+        print("错误：需要 --subscribers 或 --email-list")
+        return
+
+    items = load_items(args.items)
+    if not items:
+        print("错误：没有可发送的新闻条目")
+        return
+
+    tape = None
+    if args.record or args.replay:
+        from record_replay import open_tape
+        tape = open_tape(args.record, args.replay, args.replay_latency)
+
+    builder = DigestBuilder(items, notes=load_notes(args.run_report))
+    groups = store.groups()
+    print(f"共 {len(store.subscribers)} 位订阅者，{len(groups)} 组不同偏好，{len(items)} 条新闻")
+
+    sender = None if args.out_dir else EmailSender(smtp_class=tape.smtp_class() if tape else None)
+    stats = send_digests(builder, store, sender, subject=args.subject,
+                         attachment_path=args.attach, out_dir=args.out_dir)
+    print(f"渲染新闻片段 {builder.rendered} 次，生成邮件 {stats['groups']} 封；"
+          f"发送成功 {stats['sent']}，失败 {stats['failed']}，跳过 {stats['skipped']}")
+
+    if tape is not None:
+        tape.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+本地 feed 农场 - 在本机模拟成百上千个新闻源，用于获取阶段的压测，不访问外网
+每个虚拟主机下有若干个 feed，内容为确定性生成的中英混合 RSS 2.0 / Atom：
+条目数、摘要长度、时间跨度可配置；响应延迟按对数正态分布，部分主机整体偏慢；
+部分 feed 固定出现某种故障（由 --seed 决定，压测端据此核对错误处理）：
+    timeout    长时间不响应（超过客户端超时）
+    error      返回 503
+    304        无条件返回 304、无正文（缓存层异常）
+    truncate   正文在中途截断（Content-Length 与截断后一致，客户端收到残缺的 XML）
+    reset      声明完整长度但中途断开连接
+正常 feed 支持 ETag / Last-Modified 条件请求。
+
+URL 形如 http://127.0.0.1:PORT/h0001/f00.xml；--loopback-hosts 时每个虚拟主机使用独立的回环地址
+（127.1.x.y，仅 Linux），客户端对每个主机建立独立连接，此时服务监听 0.0.0.0。
+
+用法：
+    python scripts/feed_farm.py serve --hosts 200 --feeds-per-host 5 --port 8300 --registry-out /tmp/farm.json
+    python scripts/fetch_ai_news.py --registry /tmp/farm.json --sources tag:farm --no-date-filter
+    python scripts/benchmark.py farm --hosts 500 --feeds-per-host 2 --workers 8,32 --failures timeout=0.02,truncate=0.05
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from fetch_ai_news import COMPANY_KEYWORDS
+
+
+# 故障类型（按此顺序累加概率分配给各 feed）
+FAILURE_MODES = ("timeout", "error", "304", "truncate", "reset")
+DEFAULT_FAILURES = {"timeout": 0.01, "error": 0.02, "304": 0.02, "truncate": 0.02, "reset": 0.01}
+
+_EN_VOCAB = ("model", "agent", "inference", "benchmark", "open-source", "reasoning", "training", "dataset",
+             "robotics", "chip", "startup", "release", "paper", "safety", "policy", "multimodal", "latency",
+             "compute", "cluster", "funding", "launch", "evaluation", "alignment", "fine-tuning")
+_ZH_VOCAB = ("大模型", "智能体", "推理", "开源", "发布", "融资", "论文", "算力", "芯片", "多模态",
+             "安全", "监管", "应用", "训练", "数据集", "评测", "对齐", "微调", "机器人", "集群")
+_COMPANIES = [keywords[0] for keywords in COMPANY_KEYWORDS.values()]
+
+
+def parse_range(spec: str) -> Tuple[int, int]:
+    """'10-50' → (10, 50)；'20' → (20, 20)"""
+    low, _, high = str(spec).partition("-")
+    return int(low), int(high or low)
+
+
+def parse_failures(spec: Optional[str]) -> Dict[str, float]:
+    """'timeout=0.02,truncate=0.05'；未列出的故障类型概率为 0，'none' 表示全部正常"""
+    if spec is None:
+        return dict(DEFAULT_FAILURES)
+    rates = {mode: 0.0 for mode in FAILURE_MODES}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part or part == "none":
+            continue
+        mode, _, value = part.partition("=")
+        if mode not in rates:
+            raise ValueError(f"未知的故障类型：{mode}（可选 {', '.join(FAILURE_MODES)}）")
+        rates[mode] = float(value)
+    if sum(rates.values()) > 1:
+        raise ValueError("故障概率之和不能超过 1")
+    return rates
+
+
+def _rng(*parts) -> random.Random:
+    seed = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).digest()
+    return random.Random(int.from_bytes(seed, "big"))
+
+
+class FeedFarm:
+    """虚拟主机与 feed 的定义；内容和故障分配只由参数与 seed 决定，服务端和压测端各自计算、结果一致"""
+
+    def __init__(self, hosts: int = 100, feeds_per_host: int = 3, entries: str = "10-40", summary_chars: str = "80-600",
+                 days: int = 3, zh_ratio: float = 0.3, atom_ratio: float = 0.3, latency: float = 0.05,
+                 latency_sigma: float = 0.6, slow_hosts: float = 0.05, slow_factor: float = 10.0,
+                 failures: Optional[Dict[str, float]] = None, hang: float = 30.0, seed: int = 42,
+                 loopback_hosts: bool = False):
+        self.hosts = hosts
+        self.feeds_per_host = feeds_per_host
+        self.entries = parse_range(entries)
+        self.summary_chars = parse_range(summary_chars)
+        self.days = days
+        self.zh_ratio = zh_ratio
+        self.atom_ratio = atom_ratio
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.slow_hosts = slow_hosts
+        self.slow_factor = slow_factor
+        self.failures = dict(DEFAULT_FAILURES) if failures is None else failures
+        self.hang = hang
+        self.seed = seed
+        self.loopback_hosts = loopback_hosts
+        # 条目时间以整点为基准，同一小时内重复请求内容不变（ETag 稳定）
+        self.anchor = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    # ---------- 定义 ----------
+
+    @staticmethod
+    def host_name(host: int) -> str:
+        return f"h{host:04d}"
+
+    def feeds(self) -> List[Tuple[int, int]]:
+        return [(h, f) for h in range(self.hosts) for f in range(self.feeds_per_host)]
+
+    def key(self, host: int, feed: int) -> str:
+        return f"farm-{self.host_name(host)}-f{feed:02d}"
+
+    def language(self, host: int, feed: int) -> str:
+        return "zh" if _rng(self.seed, "lang", host, feed).random() < self.zh_ratio else "en"
+
+    def mode(self, host: int, feed: int) -> str:
+        """该 feed 固定的行为：FAILURE_MODES 之一或 ok"""
+        r = _rng(self.seed, "mode", host, feed).random()
+        for mode in FAILURE_MODES:
+            r -= self.failures.get(mode, 0.0)
+            if r < 0:
+                return mode
+        return "ok"
+
+    def host_factor(self, host: int) -> float:
+        return self.slow_factor if _rng(self.seed, "slow", host).random() < self.slow_hosts else 1.0
+
+    def delay(self, host: int, rng: random.Random) -> float:
+        """一次请求的响应延迟（秒）：对数正态，中位数为 latency × 主机系数"""
+        if self.latency <= 0:
+            return 0.0
+        return self.latency * self.host_factor(host) * math.exp(rng.gauss(0, self.latency_sigma))
+
+    def address(self, host: int) -> str:
+        if not self.loopback_hosts:
+            return "127.0.0.1"
+        return f"127.1.{host // 250}.{host % 250 + 1}"
+
+    def url(self, port: int, host: int, feed: int) -> str:
+        return f"http://{self.address(host)}:{port}/{self.host_name(host)}/f{feed:02d}.xml"
+
+    def registry(self, port: int) -> Dict:
+        """注册表（source_registry.py 格式），tag:farm 选中全部，tag:farm-hNNNN 选中一个主机"""
+        sources = {}
+        for host, feed in self.feeds():
+            sources[self.key(host, feed)] = {
+                "name": f"Farm {self.host_name(host)}/f{feed:02d}",
+                "url": self.url(port, host, feed),
+                "category": "farm",
+                "language": self.language(host, feed),
+                "tags": ["farm", f"farm-{self.host_name(host)}"],
+            }
+        return {"sources": sources}
+
+    # ---------- 内容 ----------
+
+    def _text(self, rng: random.Random, zh: bool, low: int, high: int) -> str:
+        words, sep = (_ZH_VOCAB, "") if zh else (_EN_VOCAB, " ")
+        target = rng.randint(low, high)
+        parts = [rng.choice(_COMPANIES)]
+        length = len(parts[0])
+        while length < target:
+            word = rng.choice(words)
+            parts.append(word)
+            length += len(word) + len(sep)
+        return sep.join(parts)[:max(target, 1)]
+
+    def render(self, host: int, feed: int) -> Tuple[bytes, str]:
+        """生成 feed 正文，返回 (正文, Content-Type)"""
+        rng = _rng(self.seed, "feed", host, feed)
+        zh = self.language(host, feed) == "zh"
+        atom = rng.random() < self.atom_ratio
+        name = f"{self.host_name(host)}/f{feed:02d}"
+        base = f"https://{self.host_name(host)}.farm.example/f{feed:02d}"
+        entries = []
+        span = max(self.days, 1) * 86400
+        for i in range(rng.randint(*self.entries)):
+            # 中文 feed 中夹杂少量英文条目，反之亦然
+            entry_zh = zh if rng.random() < 0.9 else not zh
+            published = self.anchor - timedelta(seconds=rng.randint(0, span))
+            entries.append((self._text(rng, entry_zh, 12, 60), f"{base}/{i}",
+                            self._text(rng, entry_zh, *self.summary_chars), published))
+        entries.sort(key=lambda e: e[3], reverse=True)
+
+        if atom:
+            body = [f'<?xml version="1.0" encoding="utf-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">'
+                    f"<title>Farm {name}</title><link href=\"{base}\"/><id>{base}</id>"
+                    f"<updated>{self.anchor.isoformat()}</updated>"]
+            for title, link, summary, published in entries:
+                body.append(f"<entry><title>{escape(title)}</title><link href=\"{link}\"/><id>{link}</id>"
+                            f"<updated>{published.isoformat()}</updated><summary>{escape(summary)}</summary></entry>")
+            body.append("</feed>")
+            return "".join(body).encode("utf-8"), "application/atom+xml; charset=utf-8"
+
+        body = [f'<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0"><channel>'
+                f"<title>Farm {name}</title><link>{base}</link><ttl>60</ttl>"
+                f"<language>{'zh-cn' if zh else 'en'}</language>"]
+        for title, link, summary, published in entries:
+            body.append(f"<item><title>{escape(title)}</title><link>{link}</link><guid>{link}</guid>"
+                        f"<pubDate>{format_datetime(published)}</pubDate>"
+                        f"<description>{escape(summary)}</description></item>")
+        body.append("</channel></rss>")
+        return "".join(body).encode("utf-8"), "application/rss+xml; charset=utf-8"
+
+
+class FarmServer:
+    """feed 农场的 HTTP 服务（每个连接一个线程），/_stats 返回按行为分类的请求计数"""
+
+    def __init__(self, farm: FeedFarm, host: Optional[str] = None, port: int = 0):
+        self.farm = farm
+        self.stats: Dict[str, int] = {"requests": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        # 压测时同时到达的连接很多，加大 listen 队列
+        server_class = type("FarmHTTPServer", (ThreadingHTTPServer,), {"request_queue_size": 1024})
+        listen = host or ("0.0.0.0" if farm.loopback_hosts else "127.0.0.1")
+        self._server = server_class((listen, port), self._make_handler())
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def _count(self, outcome: str, sent: int = 0) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += sent
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+
+    def _make_handler(self):
+        server = self
+        farm = self.farm
+        feeds = {(farm.host_name(h), f"f{f:02d}.xml"): (h, f) for h, f in farm.feeds()}
+
+        class FarmHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/_stats":
+                    with server._lock:
+                        body = json.dumps(server.stats).encode("utf-8")
+                    self._respond(200, body, "application/json")
+                    return
+                parts = self.path.split("?", 1)[0].strip("/").split("/")
+                target = feeds.get(tuple(parts)) if len(parts) == 2 else None
+                if target is None:
+                    server._count("not_found")
+                    self._respond(404, b"not found", "text/plain")
+                    return
+                host, feed = target
+                rng = random.Random()
+                mode = farm.mode(host, feed)
+                if mode != "timeout":
+                    time.sleep(farm.delay(host, rng))
+
+                if mode == "timeout":
+                    server._count(mode)
+                    server._stopping.wait(farm.hang)
+                    self.close_connection = True
+                    return
+                if mode == "error":
+                    server._count(mode)
+                    self._respond(503, b"<html><body>Service Unavailable</body></html>", "text/html")
+                    return
+                if mode == "304":
+                    server._count(mode)
+                    self._respond(304, b"", None)
+                    return
+
+                body, content_type = farm.render(host, feed)
+                etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+                modified = format_datetime(farm.anchor, usegmt=True)
+                if mode == "ok" and (self.headers.get("If-None-Match") == etag or
+                                     self.headers.get("If-Modified-Since") == modified):
+                    server._count("not_modified")
+                    self._respond(304, b"", None)
+                    return
+                if mode == "truncate":
+                    body = body[:rng.randint(len(body) // 4, len(body) * 3 // 4)]
+                    server._count(mode, len(body))
+                    self._respond(200, body, content_type)
+                    return
+                if mode == "reset":
+                    cut = body[:len(body) // 2]
+                    server._count(mode, len(cut))
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(cut)
+                    self.close_connection = True
+                    return
+                server._count("ok", len(body))
+                self._respond(200, body, content_type, {"ETag": etag, "Last-Modified": modified})
+
+            def _respond(self, status: int, body: bytes, content_type: Optional[str],
+                         headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                if content_type:
+                    self.send_header("Content-Type", content_type)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return FarmHandler
+
+    def start(self) -> None:
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def serve_in_process(options: Dict, conn) -> None:
+    """在子进程中运行农场（压测时与被测进程隔离），启动后把端口发回，收到任意消息后退出"""
+    server = FarmServer(FeedFarm(**options))
+    server.start()
+    conn.send(server.port)
+    try:
+        conn.recv()
+    except EOFError:
+        pass
+    server.stop()
+
+
+def add_farm_arguments(parser: argparse.ArgumentParser) -> None:
+    """feed 农场参数，serve 与 benchmark.py farm 共用"""
+    parser.add_argument("--hosts", type=int, default=100, help="虚拟主机数")
+    parser.add_argument("--feeds-per-host", type=int, default=3, help="每个主机的 feed 数")
+    parser.add_argument("--entries", default="10-40", help="每个 feed 的条目数范围")
+    parser.add_argument("--summary-chars", default="80-600", help="摘要长度范围（字符）")
+    parser.add_argument("--days", type=int, default=3, help="条目时间分布在最近 N 天")
+    parser.add_argument("--zh-ratio", type=float, default=0.3, help="中文 feed 比例")
+    parser.add_argument("--atom-ratio", type=float, default=0.3, help="Atom 格式比例（其余为 RSS 2.0）")
+    parser.add_argument("--latency", type=float, default=0.05, help="响应延迟中位数（秒）")
+    parser.add_argument("--latency-sigma", type=float, default=0.6, help="延迟对数正态分布的 sigma")
+    parser.add_argument("--slow-hosts", type=float, default=0.05, help="整体偏慢的主机比例")
+    parser.add_argument("--slow-factor", type=float, default=10.0, help="慢主机的延迟倍数")
+    parser.add_argument("--failures", help="各故障类型的 feed 比例，如 timeout=0.02,error=0.02,304=0.02,"
+                                           "truncate=0.02,reset=0.01（none 为全部正常）")
+    parser.add_argument("--hang", type=float, default=30.0, help="timeout 类 feed 挂起的秒数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--loopback-hosts", action="store_true", help="每个虚拟主机使用独立回环地址（仅 Linux）")
+
+
+def farm_options(args) -> Dict:
+    return {
+        "hosts": args.hosts, "feeds_per_host": args.feeds_per_host, "entries": args.entries,
+        "summary_chars": args.summary_chars, "days": args.days, "zh_ratio": args.zh_ratio,
+        "atom_ratio": args.atom_ratio, "latency": args.latency, "latency_sigma": args.latency_sigma,
+        "slow_hosts": args.slow_hosts, "slow_factor": args.slow_factor, "failures": parse_failures(args.failures),
+        "hang": args.hang, "seed": args.seed, "loopback_hosts": args.loopback_hosts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 feed 农场：模拟大量新闻源")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="运行农场")
+    add_farm_arguments(serve)
+    serve.add_argument("--listen", help="监听地址（默认 127.0.0.1，--loopback-hosts 时为 0.0.0.0）")
+    serve.add_argument("--port", type=int, default=8300)
+    serve.add_argument("--registry-out", help="写出注册表 JSON，供 fetch_ai_news.py --registry 使用")
+    args = parser.parse_args()
+
+    farm = FeedFarm(**farm_options(args))
+    server = FarmServer(farm, args.listen, args.port)
+    if args.registry_out:
+        with open(args.registry_out, "w", encoding="utf-8") as f:
+            json.dump(farm.registry(server.port), f, ensure_ascii=False, indent=1)
+        print(f"注册表已写出：{args.registry_out}（--sources tag:farm）")
+    modes: Dict[str, int] = {}
+    for host, feed in farm.feeds():
+        mode = farm.mode(host, feed)
+        modes[mode] = modes.get(mode, 0) + 1
+    print(f"feed 农场已启动：{farm.hosts} 个主机 × {farm.feeds_per_host} 个 feed，端口 {server.port}；"
+          f"行为分布 {json.dumps(modes, ensure_ascii=False)}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,14 @@ AI 每日新闻 - 从专业 AI 媒体获取新闻
 """
 
 import argparse
+import html
 import json
 import os
 import re
+import sys
+from concurrent.futures import TimeoutError as FutureTimeoutError, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
 from urllib.parse import urljoin
 import time
 
@@ -26,6 +29,12 @@ try:
 except ImportError:
     REQUESTS_AVAILABLE = False
 
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
 # 翻译支持
 try:
     import translators as ts
@@ -145,6 +154,16 @@ SOURCES = {
     },
 }
 
+# 未指定 --sources 时使用的专业新闻网站（不包含 GitHub）
+DEFAULT_SOURCES = [
+    "marktechpost",
+    "mit-tech-review",
+    "venturebeat-ai",
+    "synced-review",
+    "jiqizhixin",
+    "qbitai",
+]
+
 # ============================================
 # 公司和机构识别配置
 # ============================================
@@ -195,6 +214,12 @@ COMPANY_KEYWORDS = {
     "UIUC": ["uiuc", "伊利诺伊"],
 }
 
+# 本地缓存目录（全文补全等）
+CACHE_DIR = os.environ.get(
+    "AI_NEWS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "ai-news-daily")
+)
+
 # 分类图标
 CATEGORY_ICONS = {
     "releases": "🚀",
@@ -231,6 +256,64 @@ def detect_companies(text: str) -> List[str]:
     return result[:5]  # 最多返回5个
 
 
+_TAG_RE = re.compile(r'<[^>]+>')
+# 块级元素前后补空格，行内元素（<b>、<a> 等）直接拼接，避免 Open<b>AI</b> 被拆成两个词
+_BLOCK_TAGS = ("p", "br", "div", "li", "ul", "ol", "tr", "td", "th", "table", "blockquote",
+               "h1", "h2", "h3", "h4", "h5", "h6", "hr", "section", "article")
+_BLOCK_TAG_RE = re.compile(r'</?(?:%s)\b[^>]*>' % "|".join(_BLOCK_TAGS), re.IGNORECASE)
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def clean_html(text: str, max_len: Optional[int] = None) -> str:
+    """去除 HTML 标签、解码实体、合并空白，最后再按字符截断
+
+    先清洗后截断，避免截断落在标签或实体中间。有 lxml 时走 C 实现的解析。
+    """
+    if not text:
+        return ""
+    
+    if "<" in text or "&" in text:
+        stripped = None
+        if LXML_AVAILABLE and "<" in text:
+            try:
+                fragment = lxml.html.fragment_fromstring(text, create_parent="div")
+                for element in fragment.iter(*_BLOCK_TAGS):
+                    element.text = " " + (element.text or "")
+                    element.tail = " " + (element.tail or "")
+                stripped = "".join(fragment.itertext())
+            except Exception:
+                stripped = None
+        if stripped is None:
+            stripped = html.unescape(_TAG_RE.sub("", _BLOCK_TAG_RE.sub(" ", text)))
+        text = stripped
+    
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    if max_len is not None and len(text) > max_len:
+        text = text[:max_len].rstrip()
+    return text
+
+
+SUMMARY_MAX_CHARS = 400
+_SENTENCE_END_RE = re.compile(r'[。！？.!?](?=\s|$)|[。！？]')
+
+
+def normalize_summary(text: str, max_len: int = SUMMARY_MAX_CHARS) -> str:
+    """摘要规范化：清洗（同 clean_html）后截断到 max_len 以内，尽量落在句末，其次落在词间空格处"""
+    text = clean_html(text)
+    if len(text) <= max_len:
+        return text
+    head = text[:max_len]
+    # 只在后半段找断点，避免摘要被截得过短
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(head, max_len // 2)]
+    if ends:
+        return head[:ends[-1]].rstrip()
+    space = head.rfind(" ", max_len // 2)
+    if space > 0 and text[max_len] != " ":
+        return head[:space].rstrip()
+    return head.rstrip()
+
+
 def parse_date(date_str: str) -> Optional[datetime]:
     """解析各种日期格式"""
     if not date_str or date_str == "未知":
@@ -260,108 +343,239 @@ def parse_date(date_str: str) -> Optional[datetime]:
     return None
 
 
+def entries_to_items(entries, source: Dict, limit: int = 30) -> List[Dict]:
+    """把 feedparser 条目转换为统一的新闻条目"""
+    from text_analysis import analyze
+    items = []
+    
+    for entry in entries[:limit]:
+        published = entry.get("published", entry.get("updated", "未知"))
+        
+        # 入库时统一清洗一次，下游格式化和公司识别无需再处理 HTML
+        item = {
+            "title": clean_html(entry.get("title", "")) or "无标题",
+            "link": entry.get("link", ""),
+            "summary": normalize_summary(entry.get("summary", entry.get("description", ""))),
+            "published": published,
+            "source": source["name"],
+            "category": source.get("category", "general"),
+            "language": source.get("language", "en")
+        }
+        
+        # 入库时分析一次：公司、标题分类、中文占比、检索词、去重指纹（见 text_analysis.py）
+        analyze(item)
+        
+        items.append(item)
+    
+    return items
+
+
 class NewsTranslator:
     """翻译新闻内容"""
     
-    def __init__(self, translator_engine: str = "bing"):
+    def __init__(self, translator_engine: str = "bing", tape=None):
         self.translator_engine = translator_engine
         self._cache: Dict[str, str] = {}
+        # 录制/回放（见 record_replay.py），回放时无需 translators 库
+        self.tape = tape
+        # 翻译计划的累计字符量（见 translation_plan.py）
+        # errors：远程翻译失败（保留原文）的次数，运行缓存据此决定是否缓存结果
+        self.stats = {"chars_sent": 0, "chars_saved": 0, "errors": 0}
+    
+    @property
+    def available(self) -> bool:
+        return TRANSLATOR_AVAILABLE or (self.tape is not None and self.tape.mode == "replay")
         
-    def translate(self, text: str) -> str:
-        if not text or not TRANSLATOR_AVAILABLE:
+    def translate(self, text: str, target: str = "zh", source: str = "en") -> str:
+        if not text or not self.available:
             return text
             
+        # 已是中文的文本无需译成中文；译成其他语言时按中文原文处理
         if self._is_mostly_chinese(text):
-            return text
+            if target == "zh":
+                return text
+            source = "zh"
             
-        cache_key = f"{text[:200]}"
+        # 译成中文时沿用原文作键，与已有录制文件兼容
+        cache_key = text if target == "zh" else f"[{target}] {text}"
         if cache_key in self._cache:
             return self._cache[cache_key]
             
         try:
-            result = ts.translate_text(
-                text, 
-                translator=self.translator_engine,
-                from_language='en', 
-                to_language='zh'
-            )
+            remote = lambda t: self._translate_remote(t, source, target)
+            if self.tape is not None:
+                result = self.tape.translation(text, remote, key=cache_key)
+            else:
+                result = remote(text)
             self._cache[cache_key] = result
             return result
-        except Exception as e:
+        except Exception:
+            self.stats["errors"] += 1
             return text
     
+    def _translate_remote(self, text: str, source: str = "en", target: str = "zh") -> str:
+        return ts.translate_text(
+            text, 
+            translator=self.translator_engine,
+            from_language=source, 
+            to_language=target
+        )
+    
     def _is_mostly_chinese(self, text: str) -> bool:
         if not text:
             return False
-        chinese_chars = sum(1 for char in text if '\u4e00' <= char <= '\u9fff')
-        return chinese_chars / len(text) > 0.4
+        return len(_CJK_RE.findall(text)) / len(text) > 0.4
+    
+    def plan(self, items: List[Dict], fields: Optional[List[str]] = None,
+             limits: Optional[Dict[str, Optional[int]]] = None, target: str = "zh"):
+        """翻译计划：跳过同语言源和已是目标语言的文本，按展示长度截断（见 translation_plan.py）"""
+        from translation_plan import TranslationPlan
+        return TranslationPlan(items, fields or ['title', 'summary'], limits, target=target)
     
-    def translate_items(self, items: List[Dict], fields: List[str] = None, max_items: int = 10) -> List[Dict]:
-        if not TRANSLATOR_AVAILABLE or not items:
+    def translate_items(self, items: List[Dict], fields: List[str] = None, max_items: int = 10,
+                        budget=None, limits: Optional[Dict[str, Optional[int]]] = None) -> List[Dict]:
+        """limits 为各字段在报告中展示的字数（NewsFormatter.rendered_chars），不传则按原长度截断"""
+        if not self.available or not items:
             return items
             
-        fields = fields or ['title', 'summary']
         items_to_translate = items[:max_items]
+        plan = self.plan(items_to_translate, fields, limits)
+        print(plan.summary())
+        self.stats["chars_sent"] += plan.stats["chars_sent"]
+        self.stats["chars_saved"] += plan.chars_saved
+        
+        if budget is not None:
+            return self._translate_with_deadline(items, plan, budget)
         
         print(f"正在翻译 {len(items_to_translate)} 条新闻...")
-        for i, item in enumerate(items_to_translate, 1):
-            print(f"  [{i}/{len(items_to_translate)}] {item.get('title', '')[:40]}...", end='\r')
-            for field in fields:
-                if field in item and item[field]:
-                    text = item[field][:800] if field == 'summary' else item[field][:200]
-                    item[field] = self.translate(text)
+        for i, (item, field, text) in enumerate(plan.tasks, 1):
+            print(f"  [{i}/{len(plan.tasks)}] {item.get('title', '')[:40]}...", end='\r')
+            self._apply(item, field, self.translate(text))
         print(f"\n翻译完成！")
         return items
+    
+    @staticmethod
+    def _apply(item: Dict, field: str, translated: str) -> None:
+        if translated != item[field]:
+            # 保留原文，个性化摘要可按订阅者语言选用（见 digest.py）；
+            # 嵌套字典整体替换而不原地修改，条目的浅拷贝不会改到缓存中的原件
+            i18n = {language: dict(texts) for language, texts in item.get("i18n", {}).items()}
+            i18n.setdefault(item.get("language", "en"), {})[field] = item[field]
+            item["i18n"] = i18n
+            # 入库时算的中文占比属于原文
+            result = item.get("_analysis")
+            if result and field in result["cjk"]:
+                item["_analysis"] = dict(result, cjk={k: v for k, v in result["cjk"].items() if k != field})
+        item[field] = translated
+    
+    def _translate_with_deadline(self, items: List[Dict], plan, budget) -> List[Dict]:
+        """先翻译全部标题再翻译其他字段；阶段超时后其余内容保留原文"""
+        from run_budget import DaemonThreadPool
+        stage = budget.stage("translate")
+        # 单线程执行，卡住的请求不会拖住整个阶段；守护线程，也不会拖住进程退出
+        pool = DaemonThreadPool(max_workers=1)
+        pending: Dict[str, List[Tuple[Dict, str]]] = {}
+        for item, field, text in plan.tasks:
+            pending.setdefault(field, []).append((item, text))
+        expired = False
+        
+        print(f"正在翻译 {len(plan.tasks)} 段（限时 {stage.remaining():.0f} 秒）...")
+        for field in sorted(pending, key=lambda f: f != 'title'):
+            while pending[field] and not expired:
+                item, text = pending[field][0]
+                future = pool.submit(self.translate, text)
+                try:
+                    self._apply(item, field, future.result(timeout=stage.remaining()))
+                except FutureTimeoutError:
+                    expired = True
+                    break
+                pending[field].pop(0)
+                expired = stage.expired()
+        pool.shutdown(wait=False, cancel_futures=True)
+        budget.finish(stage)
+        
+        field_names = {'title': '标题', 'summary': '摘要'}
+        for field in pending:
+            if pending[field]:
+                budget.degrade("translate", f"untranslated_{field}",
+                               f"{len(pending[field])} 条{field_names.get(field, field)}未翻译（保留原文）")
+        print("翻译完成！")
+        return items
 
 
 class NewsFetcher:
     """获取和处理 AI 新闻"""
     
-    def __init__(self, sources: Optional[List[str]] = None, translator: Optional[NewsTranslator] = None):
+    def __init__(self, sources: Optional[List[str]] = None, translator: Optional[NewsTranslator] = None,
+                 tape=None, now: Optional[datetime] = None, registry=None,
+                 fallback_dir: Optional[str] = None, run_cache=None, feed_ttl: float = 1800, parse_pool=None):
         self.sources = sources or list(SOURCES.keys())
+        # 外部新闻源注册表（见 source_registry.py），未指定时只用内置 SOURCES
+        self.registry = registry
         self.news_items: List[Dict] = []
         self.translator = translator
+        # 录制/回放（见 record_replay.py），回放时 now 固定为录制时刻
+        self.tape = tape
+        self.now = now
+        # 限时运行时保存每个源最近一次成功的结果，超时的源改用它（见 run_budget.py）
+        self.fallback_dir = fallback_dir
+        # 运行缓存（见 run_cache.py）：feed_ttl 秒内重复运行不再下载，原文不变时不再解析
+        self.run_cache = run_cache
+        self.feed_ttl = feed_ttl
+        # 解析进程池（见 parse_pool.py）：每个源在受限的 worker 中解析，未指定时在本进程解析
+        self.parse_pool = parse_pool
         
-    def fetch_rss(self, source_key: str) -> List[Dict]:
+    def _source(self, source_key: str) -> Optional[Dict]:
+        if self.registry is not None:
+            return self.registry.get(source_key)
+        return SOURCES.get(source_key)
+    
+    def _download(self, source: Dict, timeout: float = 30) -> str:
+        """下载 RSS 原文"""
+        if not REQUESTS_AVAILABLE:
+            raise RuntimeError("未安装 requests")
+        resp = requests.get(source["url"], timeout=timeout, headers={
+            "User-Agent": "Mozilla/5.0 (compatible; AI News Bot)"
+        })
+        # 错误页不当作 feed 解析，也不进入运行缓存
+        resp.raise_for_status()
+        return resp.text
+    
+    def _parse(self, text: str, source: Dict) -> List[Dict]:
+        """解析 RSS 原文为条目"""
+        if self.parse_pool is not None:
+            return self.parse_pool.parse(text, source)
+        return entries_to_items(feedparser.parse(text).entries, source)
+    
+    def fetch_rss(self, source_key: str, timeout: float = 30) -> List[Dict]:
         """从 RSS 源获取新闻"""
         if not FEEDPARSER_AVAILABLE:
             print("警告：未安装 feedparser")
             return []
             
-        source = SOURCES.get(source_key)
+        source = self._source(source_key)
         if not source:
             return []
             
         try:
             print(f"  正在获取: {source['name']}...")
             # 使用 requests 获取内容再解析，避免 feedparser 直接解析 URL 的问题
-            if REQUESTS_AVAILABLE:
-                resp = requests.get(source["url"], timeout=30, headers={
-                    "User-Agent": "Mozilla/5.0 (compatible; AI News Bot)"
-                })
-                feed = feedparser.parse(resp.text)
+            if self.tape is not None:
+                text = self.tape.feed(source_key, source["url"], lambda: self._download(source, timeout))
+            elif REQUESTS_AVAILABLE and self.run_cache is not None:
+                from run_cache import digest
+                text = self.run_cache.memo("feed", digest(source["url"]), lambda: self._download(source, timeout),
+                                           max_age=self.feed_ttl, store=bool)
+            elif REQUESTS_AVAILABLE:
+                text = self._download(source, timeout)
             else:
-                feed = feedparser.parse(source["url"])
-            items = []
+                text = source["url"]
             
-            for entry in feed.entries[:30]:
-                published = entry.get("published", entry.get("updated", "未知"))
-                
-                item = {
-                    "title": entry.get("title", "无标题"),
-                    "link": entry.get("link", ""),
-                    "summary": entry.get("summary", entry.get("description", ""))[:400],
-                    "published": published,
-                    "source": source["name"],
-                    "category": source.get("category", "general"),
-                    "language": source.get("language", "en")
-                }
-                
-                # 自动识别公司和机构
-                full_text = f"{item['title']} {item['summary']}"
-                item["companies"] = detect_companies(full_text)
-                
-                items.append(item)
+            if self.run_cache is not None:
+                from run_cache import digest
+                items = self.run_cache.memo("parse", digest(text, source), lambda: self._parse(text, source))
+            else:
+                items = self._parse(text, source)
                 
             print(f"    ✓ 获取到 {len(items)} 条")
             return items
@@ -369,34 +583,112 @@ class NewsFetcher:
             print(f"    ✗ 获取失败：{e}")
             return []
     
-    def fetch_all(self, days: int = 1, strict_date_filter: bool = True) -> List[Dict]:
-        """从所有来源获取新闻"""
+    def fetch_all(self, days: int = 1, strict_date_filter: bool = True, budget=None) -> List[Dict]:
+        """从所有来源获取新闻；传入 budget 时并发获取，超时的源跳过或改用上次缓存"""
+        if budget is not None:
+            results = dict(self.iter_fetch(budget))
+            all_news = [item for key in self.sources for item in results.get(key, [])]
+            return self.select(all_news, days=days, strict_date_filter=strict_date_filter)
+        
         all_news = []
         
         for source_key in self.sources:
-            if source_key in SOURCES:
+            if self._source(source_key):
                 items = self.fetch_rss(source_key)
                 all_news.extend(items)
         
+        return self.select(all_news, days=days, strict_date_filter=strict_date_filter)
+    
+    def iter_fetch(self, budget=None, max_workers: int = 8,
+                   timeout: float = 30) -> Iterator[Tuple[str, List[Dict]]]:
+        """并发获取，按完成先后逐个产出 (source_key, items)；timeout 为单个源的请求超时，
+        传入 budget 时改为阶段剩余时间，超时的源改用上次缓存或跳过，并记录降级"""
+        stage = budget.stage("fetch") if budget is not None else None
+        keys = [key for key in self.sources if self._source(key)]
+        done: Set[str] = set()
+        cached, skipped = [], []
+        
+        if keys:
+            from run_budget import DaemonThreadPool
+            # 守护线程：放弃等待的下载不会拖住进程退出
+            pool = DaemonThreadPool(max_workers=min(max_workers, len(keys)))
+            request_timeout = (lambda: max(1.0, stage.remaining())) if stage else (lambda: timeout)
+            futures = {pool.submit(lambda key=key: self.fetch_rss(key, timeout=request_timeout())): key
+                       for key in keys}
+            try:
+                for future in as_completed(futures, timeout=stage.remaining() if stage else None):
+                    key = futures[future]
+                    done.add(key)
+                    items = future.result()
+                    if items:
+                        self._save_fallback(key, items)
+                    else:
+                        items = self._load_fallback(key)
+                        if items:
+                            cached.append(self._source(key)["name"])
+                    yield key, items
+            except FutureTimeoutError:
+                pass
+            finally:
+                # 不等待仍在下载的源，其结果直接丢弃
+                pool.shutdown(wait=False, cancel_futures=True)
+        
+        for key in keys:
+            if key in done:
+                continue
+            items = self._load_fallback(key)
+            if items:
+                cached.append(self._source(key)["name"])
+                yield key, items
+            else:
+                skipped.append(self._source(key)["name"])
+        
+        if budget is not None:
+            budget.finish(stage)
+            if cached:
+                budget.degrade("fetch", "cached_sources", f"{len(cached)} 个新闻源使用上次运行的结果：{'、'.join(cached)}")
+            if skipped:
+                budget.degrade("fetch", "skipped_sources", f"{len(skipped)} 个新闻源未及时响应，已跳过：{'、'.join(skipped)}")
+    
+    def _fallback_path(self, source_key: str) -> str:
+        return os.path.join(self.fallback_dir, f"{source_key}.json")
+    
+    def _save_fallback(self, source_key: str, items: List[Dict]) -> None:
+        if not self.fallback_dir:
+            return
+        os.makedirs(self.fallback_dir, exist_ok=True)
+        path = self._fallback_path(source_key)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"saved_at": datetime.now().isoformat(), "items": items}, f,
+                      ensure_ascii=False, default=_json_default)
+        os.replace(f"{path}.tmp", path)
+    
+    def _load_fallback(self, source_key: str) -> List[Dict]:
+        if not self.fallback_dir or not os.path.exists(self._fallback_path(source_key)):
+            return []
+        with open(self._fallback_path(source_key), "r", encoding="utf-8") as f:
+            return json.load(f).get("items", [])
+    
+    def load_state(self, state_path: str, days: int = 1, strict_date_filter: bool = True) -> List[Dict]:
+        """从常驻进程（news_daemon.py）导出的状态读取已采集的新闻，不再实时抓取"""
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        
+        all_news = []
+        for source_key in self.sources:
+            source_state = state.get("sources", {}).get(source_key)
+            if source_state:
+                all_news.extend(source_state.get("items", []))
+        print(f"从状态文件读取 {len(all_news)} 条新闻（更新于 {state.get('saved_at', '未知')}）")
+        
+        return self.select(all_news, days=days, strict_date_filter=strict_date_filter)
+    
+    def select(self, all_news: List[Dict], days: int = 1, strict_date_filter: bool = True) -> List[Dict]:
+        """日期过滤并按日期倒序排列"""
         # 日期过滤
         if strict_date_filter and days > 0:
-            cutoff = datetime.now() - timedelta(days=days)
-            cutoff = cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            filtered_news = []
-            for item in all_news:
-                pub_date = parse_date(item.get("published", ""))
-                if pub_date:
-                    if pub_date.tzinfo:
-                        pub_date = pub_date.replace(tzinfo=None)
-                    if pub_date >= cutoff:
-                        item["_parsed_date"] = pub_date
-                        filtered_news.append(item)
-                else:
-                    if days > 1:
-                        filtered_news.append(item)
-            
-            all_news = filtered_news
+            cutoff = self.date_cutoff(days)
+            all_news = [item for item in all_news if self.within(item, cutoff, days)]
             print(f"\n日期过滤后: {len(all_news)} 条新闻（最近 {days} 天）")
         
         # 按日期排序
@@ -405,32 +697,96 @@ class NewsFetcher:
         self.news_items = all_news
         return all_news
     
+    def date_cutoff(self, days: int) -> datetime:
+        cutoff = (self.now or datetime.now()) - timedelta(days=days)
+        return cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    @staticmethod
+    def within(item: Dict, cutoff: datetime, days: int) -> bool:
+        """判断条目是否在时间范围内，顺带记下解析后的日期；无法解析日期的条目仅在多天模式下保留"""
+        pub_date = parse_date(item.get("published", ""))
+        if pub_date:
+            if pub_date.tzinfo:
+                pub_date = pub_date.replace(tzinfo=None)
+            if pub_date >= cutoff:
+                item["_parsed_date"] = pub_date
+                return True
+            return False
+        return days > 1
+    
     def filter_by_category(self, categories: List[str]) -> List[Dict]:
         """按分类筛选"""
         return [item for item in self.news_items 
                 if item.get("category") in categories]
     
     def search(self, keyword: str) -> List[Dict]:
-        """关键词搜索"""
-        keyword = keyword.lower()
-        return [item for item in self.news_items
-                if keyword in item.get("title", "").lower() 
-                or keyword in item.get("summary", "").lower()]
+        """关键词搜索：标题或摘要包含关键词（子串）；入库时的检索词用于预筛，见 text_analysis.py"""
+        from text_analysis import matches, query_terms
+        terms = query_terms(keyword)
+        return [item for item in self.news_items if matches(item, keyword, terms)]
 
 
 class NewsFormatter:
-    """格式化新闻输出"""
+    """格式化新闻输出
+
+    各格式都以生成器逐块产出，``write`` 直接写入文件或 stdout，
+    大批量归档导出时无需在内存中拼出完整文档。
+    """
+    
+    # 输出模板变化时递增，使运行缓存中的旧报告失效（见 run_cache.py）
+    TEMPLATE_VERSION = 1
     
-    def __init__(self, news_items: List[Dict]):
+    # 各 Markdown 格式展示的摘要字数（0 为不展示）；翻译计划据此决定发送多少原文
+    SUMMARY_CHARS = {"newsletter": 200, "topics": 200, "standard": 250, "summary": 0}
+    
+    def __init__(self, news_items: List[Dict], trending: Optional[List[Dict]] = None):
         self.news_items = news_items
+        # 热门公司（见 trends.py），仅 newsletter 格式显示
+        self.trending = trending
         
+    @classmethod
+    def rendered_chars(cls, views: List[Tuple[str, str]]) -> Dict[str, Optional[int]]:
+        """若干 (output, format) 输出中各字段最多展示的字数，None 为不限（JSON 输出完整字段）"""
+        summary = 0
+        for output, format_type in views:
+            if output in ("json", "jsonl"):
+                return {"title": None, "summary": None}
+            if output == "markdown":
+                summary = max(summary, cls.SUMMARY_CHARS.get(format_type, 0))
+        return {"title": None, "summary": summary}
+    
     def to_markdown(self, format_type: str = "standard") -> str:
+        return "".join(self.iter_markdown(format_type))
+    
+    def iter_markdown(self, format_type: str = "standard") -> Iterator[str]:
+        """逐块产出 Markdown"""
         if format_type == "newsletter":
-            return self._to_newsletter_markdown()
+            lines = self._iter_newsletter_markdown()
         elif format_type == "summary":
-            return self._to_summary_markdown()
+            lines = self._iter_summary_markdown()
+        elif format_type == "topics":
+            lines = self._iter_topics_markdown()
         else:
-            return self._to_standard_markdown()
+            lines = self._iter_standard_markdown()
+        return _join_lines(lines)
+    
+    def iter_chunks(self, output: str = "markdown", format_type: str = "standard") -> Iterator[str]:
+        """按输出类型逐块产出内容"""
+        if output == "json":
+            return self.iter_json()
+        elif output == "jsonl":
+            return self.iter_jsonl()
+        elif output == "text":
+            return self.iter_text()
+        return self.iter_markdown(format_type)
+    
+    def write(self, stream: TextIO, output: str = "markdown", format_type: str = "standard") -> int:
+        """流式写入到文件对象，返回写入的字符数"""
+        written = 0
+        for chunk in self.iter_chunks(output, format_type):
+            stream.write(chunk)
+            written += len(chunk)
+        return written
     
     def _format_companies(self, companies: List[str]) -> str:
         """格式化公司标签"""
@@ -440,17 +796,24 @@ class NewsFormatter:
     
     def _to_newsletter_markdown(self, title: str = "每日 AI 简报", intro: str = "") -> str:
         """简洁美观的新闻通讯格式"""
+        return "".join(_join_lines(self._iter_newsletter_markdown(title, intro)))
+    
+    def _iter_newsletter_markdown(self, title: str = "每日 AI 简报", intro: str = "") -> Iterator[str]:
         today = datetime.now().strftime("%Y年%m月%d日")
         
-        lines = [
+        yield from [
             f"# {title}",
             "",
             f"📅 **{today}** | 🤖 精选 {len(self.news_items)} 条 AI 圈重要动态",
-            "",
-            "---",
             ""
         ]
         
+        if self.trending:
+            from trends import format_trending
+            yield from [f"🔥 **本周热门公司**：{format_trending(self.trending)}", ""]
+        
+        yield from ["---", ""]
+        
         for i, item in enumerate(self.news_items, 1):
             # 来源标签
             source_tag = f"📰 {item['source']}"
@@ -460,11 +823,11 @@ class NewsFormatter:
             meta = f"{source_tag}" + (f" | {companies}" if companies else "")
             
             # 摘要处理
-            summary = item['summary'][:200] + "..." if len(item['summary']) > 200 else item['summary']
-            # 移除 HTML 标签
-            summary = re.sub(r'<[^>]+>', '', summary)
+            # 摘要已在入库时清洗过 HTML
+            limit = self.SUMMARY_CHARS["newsletter"]
+            summary = item['summary'][:limit] + "..." if len(item['summary']) > limit else item['summary']
             
-            lines.extend([
+            yield from [
                 f"### {i}. {item['title']}",
                 "",
                 f"{summary}",
@@ -474,19 +837,20 @@ class NewsFormatter:
                 "",
                 "---",
                 ""
-            ])
+            ]
         
-        lines.extend([
+        yield from [
             "",
             "💡 *本简报由 AI 自动生成*",
             ""
-        ])
-        
-        return "\n".join(lines)
+        ]
     
     def _to_standard_markdown(self) -> str:
         """标准分类格式"""
-        lines = [
+        return "".join(_join_lines(self._iter_standard_markdown()))
+    
+    def _iter_standard_markdown(self) -> Iterator[str]:
+        yield from [
             "# 🤖 AI 新闻日报",
             "",
             f"📅 {datetime.now().strftime('%Y-%m-%d')} | 共 {len(self.news_items)} 条",
@@ -510,26 +874,27 @@ class NewsFormatter:
         
         for category, items in by_category.items():
             cn_name = category_names.get(category, category)
-            lines.extend([f"## {cn_name}", ""])
+            yield from [f"## {cn_name}", ""]
             
             for item in items:
                 companies = self._format_companies(item.get("companies", []))
                 meta = f"📰 {item['source']}" + (f" | {companies}" if companies else "")
                 
-                lines.extend([
+                yield from [
                     f"### {item['title']}",
                     "",
-                    f"{item['summary'][:250]}...",
+                    f"{item['summary'][:self.SUMMARY_CHARS['standard']]}...",
                     "",
                     f"*{meta}* | [阅读原文]({item['link']})",
                     ""
-                ])
-                
-        return "\n".join(lines)
+                ]
     
     def _to_summary_markdown(self) -> str:
         """简洁摘要格式"""
-        lines = [
+        return "".join(_join_lines(self._iter_summary_markdown()))
+    
+    def _iter_summary_markdown(self) -> Iterator[str]:
+        yield from [
             "# AI 新闻摘要",
             "",
             f"*{datetime.now().strftime('%Y-%m-%d')} - 共 {len(self.news_items)} 条*",
@@ -542,19 +907,76 @@ class NewsFormatter:
             if companies:
                 source_info += f" | {companies}"
             
-            lines.append(f"• **{item['title']}** — *{source_info}*")
+            yield f"• **{item['title']}** — *{source_info}*"
+    
+    def _iter_topics_markdown(self) -> Iterator[str]:
+        """按话题分节（条目需经 topic_cluster.cluster_items 处理），每节以最具代表性的报道命名"""
+        topic_count = len({item.get("topic") for item in self.news_items if item.get("topic", -1) >= 0})
+        yield from [
+            "# 🧭 AI 话题精选",
+            "",
+            f"📅 {datetime.now().strftime('%Y-%m-%d')} | {topic_count} 个话题，共 {len(self.news_items)} 条",
+            ""
+        ]
+        
+        current = None
+        for item in self.news_items:
+            topic = item.get("topic", -1)
+            if topic != current:
+                current = topic
+                if topic >= 0:
+                    yield from [f"## 📌 {item['title']}（{item.get('topic_size', 1)} 篇相关报道）", ""]
+                else:
+                    yield from ["## 🗂 其他动态", ""]
             
-        return "\n".join(lines)
+            companies = self._format_companies(item.get("companies", []))
+            meta = f"📰 {item['source']}" + (f" | {companies}" if companies else "")
+            limit = self.SUMMARY_CHARS["topics"]
+            summary = item['summary'][:limit] + "..." if len(item['summary']) > limit else item['summary']
+            yield from [
+                f"### {item['title']}",
+                "",
+                f"{summary}",
+                "",
+                f"*{meta}*",
+                f"[→ 阅读原文]({item['link']})",
+                ""
+            ]
     
     def to_json(self) -> str:
-        return json.dumps({
-            "generated_at": datetime.now().isoformat(),
-            "count": len(self.news_items),
-            "items": self.news_items
-        }, indent=2, ensure_ascii=False)
+        return "".join(self.iter_json())
+    
+    def iter_json(self) -> Iterator[str]:
+        """逐条产出 JSON，输出与 json.dumps(indent=2) 一致"""
+        yield "{\n"
+        yield f'  "generated_at": {json.dumps(datetime.now().isoformat())},\n'
+        yield f'  "count": {len(self.news_items)},\n'
+        if not self.news_items:
+            yield '  "items": []\n}'
+            return
+        yield '  "items": ['
+        for i, item in enumerate(self.news_items):
+            body = json.dumps(_public(item), indent=2, ensure_ascii=False, default=_json_default)
+            yield ("\n" if i == 0 else ",\n") + "    " + body.replace("\n", "\n    ")
+        yield "\n  ]\n}"
+    
+    def to_jsonl(self) -> str:
+        return "".join(self.iter_jsonl())
+    
+    def iter_jsonl(self) -> Iterator[str]:
+        """JSON Lines：每行一条新闻，便于下游工具逐行处理"""
+        for item in self.news_items:
+            yield json.dumps(_public(item), ensure_ascii=False, default=_json_default) + "\n"
     
     def to_text(self) -> str:
-        lines = [
+        return "".join(self.iter_text())
+    
+    def iter_text(self) -> Iterator[str]:
+        """逐块产出纯文本"""
+        return _join_lines(self._iter_text_lines())
+    
+    def _iter_text_lines(self) -> Iterator[str]:
+        yield from [
             "AI 每日新闻",
             f"日期：{datetime.now().strftime('%Y-%m-%d')}",
             f"条数：{len(self.news_items)}",
@@ -564,14 +986,54 @@ class NewsFormatter:
         
         for i, item in enumerate(self.news_items[:20], 1):
             companies = ", ".join(item.get("companies", [])) or "未知"
-            lines.extend([
+            yield from [
                 f"{i}. {item['title']}",
                 f"   来源：{item['source']} | 公司：{companies}",
                 f"   链接：{item['link']}",
                 ""
-            ])
-            
-        return "\n".join(lines)
+            ]
+
+
+def _join_lines(lines: Iterable[str]) -> Iterator[str]:
+    """逐行产出，效果等同于 "\\n".join(lines)"""
+    first = True
+    for line in lines:
+        if first:
+            first = False
+            yield line
+        else:
+            yield "\n" + line
+
+
+def _public(item: Dict) -> Dict:
+    """输出用的条目：省略入库分析的中间结果（检索词等）"""
+    return {k: v for k, v in item.items() if k != "_analysis"} if "_analysis" in item else item
+
+
+def _json_default(obj):
+    """JSON 序列化兜底（如 _parsed_date）"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def write_report(chunks: Iterable[str], save_to: Optional[str] = None) -> None:
+    """写入 save_to，未指定时输出到标准输出"""
+    if save_to:
+        os.makedirs(os.path.dirname(save_to) or ".", exist_ok=True)
+        with open(save_to, "w", encoding="utf-8") as f:
+            f.writelines(chunks)
+        print(f"已保存至：{save_to}")
+    else:
+        sys.stdout.writelines(chunks)
+        sys.stdout.write("\n")
+
+
+def resolve_days(date_range: str = "today", days: int = 1) -> int:
+    """--days 优先，否则按 --date 换算天数"""
+    if days != 1:
+        return days
+    return {"today": 1, "week": 7, "month": 30}.get(date_range, days)
 
 
 def parse_args():
@@ -581,17 +1043,47 @@ def parse_args():
     parser.add_argument("--days", type=int, default=1, help="回溯天数")
     parser.add_argument("--categories", help="分类筛选")
     parser.add_argument("--search", help="关键词搜索")
-    parser.add_argument("--output", choices=["markdown", "json", "text"], default="markdown")
-    parser.add_argument("--format", choices=["standard", "summary", "newsletter"], default="newsletter")
-    parser.add_argument("--sources", help="指定新闻源")
+    parser.add_argument("--output", choices=["markdown", "json", "jsonl", "text"], default="markdown")
+    parser.add_argument("--format", choices=["standard", "summary", "newsletter", "topics"], default="newsletter",
+                        help="topics 按话题聚类分节（需 numpy），适合 --date week/month")
+    parser.add_argument("--topics", type=int, default=None, help="话题聚类的簇数（默认约为条目数的平方根）")
+    parser.add_argument("--sources", help="指定新闻源，支持 tag:xx、category:xx、language:xx")
+    parser.add_argument("--registry", action="append", default=[],
+                        help="外部新闻源注册表（OPML/JSON/YAML），可重复")
     parser.add_argument("--save-to", help="保存路径")
+    parser.add_argument("--save-items", metavar="PATH", help="另存一份 JSONL 条目，供 digest.py 生成个性化摘要")
     parser.add_argument("--max-items", type=int, default=15)
     parser.add_argument("--title", default="🤖 AI 每日简报")
     parser.add_argument("--intro", default="")
     parser.add_argument("--translate", action="store_true")
     parser.add_argument("--translate-fields", default="title,summary")
+    parser.add_argument("--languages", help="同时生成多种语言的报告，如 zh,en（第一个为主语言，需 --translate）")
     parser.add_argument("--no-date-filter", action="store_true")
     parser.add_argument("--include-github", action="store_true", help="包含 GitHub 数据源")
+    parser.add_argument("--enrich", action="store_true", help="抓取原文正文补全摘要")
+    parser.add_argument("--enrich-top", type=int, default=None, help="补全前 N 条（默认同 --max-items）")
+    parser.add_argument("--enrich-cache-ttl", type=float, default=3 * 86400,
+                        help="正文缓存有效期（秒），过期重新抓取并清理")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="本地缓存目录")
+    parser.add_argument("--overlap", action="store_true", help="边获取边处理：先完成的源立即去重并推测翻译候选条目")
+    parser.add_argument("--from-state", metavar="PATH", help="使用常驻进程已采集的状态文件生成报告，不实时抓取")
+    parser.add_argument("--record", metavar="DIR", help="录制原始 RSS 响应和翻译结果")
+    parser.add_argument("--replay", metavar="DIR", help="基于录制内容离线运行")
+    parser.add_argument("--replay-latency", help="回放时注入的延迟（秒），如 0.2 或 feed=0.3,translate=0.05")
+    parser.add_argument("--budget", type=float, help="整次运行的时间预算（秒），超时的阶段降级而不阻塞")
+    parser.add_argument("--deadline", metavar="HH:MM", help="必须完成的时刻，如 19:55（与 --budget 取较早者）")
+    parser.add_argument("--stage-budget", help="各阶段预算（秒），如 fetch=120,enrich=60,translate=240")
+    parser.add_argument("--trends", action="store_true", help="把本次新闻计入公司提及趋势，并在简报中显示热门公司")
+    parser.add_argument("--run-cache", action="store_true", help="按输入内容哈希缓存各阶段产出，输入不变时直接复用")
+    parser.add_argument("--run-cache-ttl", type=float, default=1800, help="RSS 原文缓存有效期（秒）")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="在 N 个独立进程中解析 RSS，单个源超限只影响该源（0 为本进程解析）")
+    parser.add_argument("--parse-cpu", type=float, default=10, help="每个源解析的 CPU 时间上限（秒）")
+    parser.add_argument("--parse-memory", type=int, default=512, help="解析进程的内存上限（MB）")
+    parser.add_argument("--parse-recycle", type=int, default=50, help="解析进程处理多少个源后重启")
+    parser.add_argument("--run-report", metavar="PATH", help="写出运行报告（各阶段耗时与降级记录）")
+    parser.add_argument("--service", default=os.environ.get("AI_NEWS_SERVICE"),
+                        help="由本地查询服务（query_service.py）完成查询，如 127.0.0.1:8765 或 unix:/tmp/ai-news.sock")
     
     return parser.parse_args()
 
@@ -599,41 +1091,103 @@ def parse_args():
 def main():
     args = parse_args()
     
+    # 查询服务：参数原样转发，条目与翻译缓存常驻服务内存；服务不可用时本地运行
+    if args.service:
+        from query_service import query_params, request
+        params = query_params(args)
+        if params is None:
+            print("提示：当前参数需要本地执行，不使用查询服务")
+        else:
+            try:
+                write_report([request(args.service, "/news", params)], args.save_to)
+                return
+            except OSError as e:
+                print(f"警告：查询服务不可用（{e}），改为本地运行")
+    
     # 确定新闻源
-    if args.sources:
-        sources = args.sources.split(",")
-    else:
-        # 默认使用专业新闻网站（不包含 GitHub）
-        sources = [
-            "marktechpost",
-            "mit-tech-review",
-            "venturebeat-ai",
-            "synced-review",
-            "jiqizhixin",
-            "qbitai",
-        ]
+    from source_registry import SourceRegistry
+    registry_paths = args.registry or [p for p in os.environ.get("AI_NEWS_REGISTRY", "").split(os.pathsep) if p]
+    registry = SourceRegistry(registry_paths, cache_dir=os.path.join(args.cache_dir, "registry"))
+    sources = registry.select(args.sources) if args.sources else list(DEFAULT_SOURCES)
+    days = resolve_days(args.date, args.days)
     
-    # 确定天数
-    if args.days != 1:
-        days = args.days
-    else:
-        days_map = {"today": 1, "week": 7, "month": 30}
-        days = days_map.get(args.date, args.days)
+    # 录制/回放
+    tape = None
+    if args.record or args.replay:
+        from record_replay import open_tape
+        tape = open_tape(args.record, args.replay, args.replay_latency)
+    replaying = tape is not None and tape.mode == "replay"
+    
+    # 运行预算
+    budget = None
+    if args.budget or args.deadline:
+        from run_budget import RunBudget, parse_deadline, parse_stage_budget
+        limits = [s for s in (args.budget, args.deadline and parse_deadline(args.deadline)) if s]
+        budget = RunBudget(min(limits), parse_stage_budget(args.stage_budget))
+        print(f"运行预算：{budget.total_seconds:.0f} 秒")
+    
+    # 运行缓存
+    run_cache = None
+    if args.run_cache:
+        from run_cache import RunCache, digest
+        run_cache = RunCache(os.path.join(args.cache_dir, "runs"))
     
-    # 初始化翻译器
+    # 初始化翻译器；只翻译报告中会展示的部分（个性化摘要按 newsletter 的长度展示）
     translator = None
+    render_limits = NewsFormatter.rendered_chars([(args.output, args.format)]
+                                                 + ([("markdown", "newsletter")] if args.save_items else []))
     if args.translate:
-        if not TRANSLATOR_AVAILABLE:
+        if not TRANSLATOR_AVAILABLE and not replaying:
             print("警告：未安装 translators 库，无法翻译")
         else:
-            translator = NewsTranslator()
+            translator = NewsTranslator(tape=tape)
     
     # 获取新闻
     print(f"正在获取 AI 新闻（最近 {days} 天）...")
     print("=" * 50)
     
-    fetcher = NewsFetcher(sources=sources, translator=translator)
-    news = fetcher.fetch_all(days=days, strict_date_filter=not args.no_date_filter)
+    # 解析进程池
+    parse_pool = None
+    if args.parse_workers > 0 and not args.from_state:
+        from parse_pool import ParsePool
+        parse_pool = ParsePool(args.parse_workers, cpu_seconds=args.parse_cpu, memory_mb=args.parse_memory,
+                               max_jobs=args.parse_recycle)
+    
+    fetcher = NewsFetcher(sources=sources, translator=translator, tape=tape,
+                          now=tape.recorded_at if replaying else None, registry=registry,
+                          fallback_dir=os.path.join(args.cache_dir, "last-run") if budget else None,
+                          run_cache=run_cache, feed_ttl=args.run_cache_ttl, parse_pool=parse_pool)
+    if args.from_state:
+        news = fetcher.load_state(args.from_state, days=days, strict_date_filter=not args.no_date_filter)
+    elif args.overlap:
+        from pipeline import OverlappedPipeline
+        from text_analysis import matches, query_terms
+        categories = args.categories.split(",") if args.categories else None
+        terms = query_terms(args.search) if args.search else None
+        
+        def candidate_filter(item: Dict) -> bool:
+            if categories and item.get("category") not in categories:
+                return False
+            return not args.search or matches(item, args.search, terms)
+        
+        pipeline = OverlappedPipeline(fetcher, translator if args.translate else None,
+                                      fields=args.translate_fields.split(","), top_k=args.max_items,
+                                      candidate_filter=candidate_filter, budget=budget, limits=render_limits)
+        news = pipeline.run(days=days, strict_date_filter=not args.no_date_filter)
+    else:
+        news = fetcher.fetch_all(days=days, strict_date_filter=not args.no_date_filter, budget=budget)
+    
+    if parse_pool is not None:
+        print(parse_pool.summary())
+        parse_pool.close()
+    
+    # 公司提及趋势：计入日期过滤后的全部新闻（重复计入会被去重）
+    trending = None
+    if args.trends:
+        from trends import TrendStore
+        trend_store = TrendStore(os.path.join(args.cache_dir, "trends"))
+        trend_store.ingest(fetcher.news_items)
+        trending = trend_store.trending(days=7)
     
     # 筛选
     if args.categories:
@@ -641,33 +1195,90 @@ def main():
     if args.search:
         news = fetcher.search(args.search)
     
-    news = news[:args.max_items]
+    if args.format == "topics":
+        from topic_cluster import cluster_items
+        news = cluster_items(news, max_items=args.max_items, k=args.topics)
+    else:
+        news = news[:args.max_items]
+    
+    # 全文补全
+    if args.enrich and news:
+        from article_enricher import ArticleEnricher
+        enricher = ArticleEnricher(cache_dir=os.path.join(args.cache_dir, "articles"),
+                                   max_age=args.enrich_cache_ttl)
+        if budget is None:
+            news = enricher.enrich_items(news, top_k=args.enrich_top or args.max_items)
+        else:
+            stage = budget.stage("enrich")
+            news = enricher.enrich_items(news, top_k=args.enrich_top or args.max_items, timeout=stage.remaining())
+            budget.finish(stage)
+            if enricher.stats["timed_out"]:
+                budget.degrade("enrich", "partial_enrich", f"{enricher.stats['timed_out']} 篇原文未及时抓取，使用 RSS 摘要")
     
     # 翻译
+    languages = []
+    if args.languages:
+        from multilang import parse_languages, translate_languages
+        languages = parse_languages(args.languages)
     if args.translate and translator and news:
-        news = translator.translate_items(news, fields=args.translate_fields.split(","), max_items=args.max_items)
+        fields = args.translate_fields.split(",")
+        if languages:
+            # 多语言：各语言共用一个翻译调度器，相同原文每种语言只翻译一次（见 multilang.py）
+            translate = lambda: translate_languages(translator, news, languages, fields=fields,
+                                                    max_items=args.max_items, limits=render_limits, budget=budget)
+        else:
+            translate = lambda: translator.translate_items(news, fields=fields, max_items=args.max_items,
+                                                           budget=budget, limits=render_limits)
+        if run_cache is not None:
+            # 降级（未译完）或有翻译失败（保留原文）的结果不缓存，下次运行重新翻译
+            errors = translator.stats["errors"]
+            news = run_cache.memo("translate", digest(news, fields, translator.translator_engine, args.max_items,
+                                                      render_limits, languages),
+                                  translate, store=lambda _: (budget is None or not budget.degradations)
+                                  and translator.stats["errors"] == errors)
+        else:
+            news = translate()
+        if budget is not None:
+            budget.record("translate", **translator.stats)
     
     print(f"\n最终输出: {len(news)} 条新闻")
     
-    # 格式化
-    formatter = NewsFormatter(news)
-    
-    if args.output == "json":
-        output = formatter.to_json()
-    elif args.output == "text":
-        output = formatter.to_text()
+    # 格式化并流式输出
+    formatter = NewsFormatter(news, trending=trending)
+    if run_cache is not None:
+        # 报告抬头含当天日期，键中加入日期，输入不变时次日也会重新渲染
+        report = run_cache.memo("format", digest(news, trending, args.output, args.format, NewsFormatter.TEMPLATE_VERSION,
+                                                 datetime.now().strftime("%Y-%m-%d")),
+                                lambda: "".join(formatter.iter_chunks(args.output, args.format)))
+        chunks = [report]
+        print(f"运行缓存：{run_cache.summary()}")
     else:
-        output = formatter.to_markdown(format_type=args.format)
+        chunks = formatter.iter_chunks(args.output, args.format)
     
     # 保存或输出
-    if args.save_to:
-        os.makedirs(os.path.dirname(args.save_to) or ".", exist_ok=True)
-        with open(args.save_to, "w", encoding="utf-8") as f:
-            f.write(output)
-        print(f"已保存至：{args.save_to}")
-    else:
-        print(output)
+    write_report(chunks, args.save_to)
+    
+    if languages and args.save_to:
+        from multilang import write_language_reports
+        paths = write_language_reports(news, languages, args.save_to, args.format, trending=trending,
+                                       notes=budget.notes() if budget is not None else None)
+        print(f"多语言报告已保存至：{', '.join(paths)}")
+    
+    if args.save_items:
+        os.makedirs(os.path.dirname(args.save_items) or ".", exist_ok=True)
+        with open(args.save_items, "w", encoding="utf-8") as f:
+            formatter.write(f, output="jsonl")
+        print(f"条目已保存至：{args.save_items}")
+    
+    if args.run_report and budget is not None:
+        budget.save(args.run_report)
+        print(f"运行报告已保存至：{args.run_report}")
+    
+    if tape is not None:
+        tape.close()
 
 
 if __name__ == "__main__":
+    # 其他脚本模块会 import fetch_ai_news，避免以脚本运行时再加载一份
+    sys.modules.setdefault("fetch_ai_news", sys.modules[__name__])
     main()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+分布式获取/翻译 - 基于本地持久化任务队列（SQLite）
+特点：多个 worker 进程（同机或共享存储的多台机器）以租约方式领取任务，
+失败自动重试，结果写回共享库；协调器等待全部任务完成后汇总生成报告。
+
+用法：
+    python scripts/job_queue.py run --db queue.db --workers 4 --days 2 --translate --save-to reports/today.md
+    python scripts/job_queue.py worker --db queue.db          # 在其他进程/机器上追加 worker
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from fetch_ai_news import (
+    FEEDPARSER_AVAILABLE, SOURCES, NewsFetcher, NewsFormatter, NewsTranslator, entries_to_items,
+)
+
+if FEEDPARSER_AVAILABLE:
+    import feedparser
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (state, kind, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_run ON jobs (run_id, kind, state);
+"""
+
+DEFAULT_LEASE_SECONDS = 120
+RETRY_BACKOFF_SECONDS = 5
+# 协调器等待单个阶段的上限：默认足够所有任务按最大次数各跑满一个租约
+DEFAULT_STAGE_TIMEOUT = DEFAULT_LEASE_SECONDS * 3 + 60
+
+
+class JobQueue:
+    """SQLite 任务队列：pending → leased → done / failed"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def enqueue(self, run_id: str, kind: str, payloads: List[Dict], max_attempts: int = 3) -> List[int]:
+        now = time.time()
+        ids = []
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for payload in payloads:
+                cur = self.conn.execute(
+                    "INSERT INTO jobs (run_id, kind, payload, max_attempts, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, kind, json.dumps(payload, ensure_ascii=False, default=str), max_attempts, now, now),
+                )
+                ids.append(cur.lastrowid)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return ids
+
+    def _expire(self, now: float) -> int:
+        """租约过期且已达最大次数的任务（worker 崩溃或被杀）标记为 failed，不再派发"""
+        cur = self.conn.execute(
+            "UPDATE jobs SET state = 'failed', error = '租约过期且已达最大次数（worker 可能已崩溃）', "
+            "lease_owner = NULL, updated_at = ? "
+            "WHERE state = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+            (now, now),
+        )
+        return cur.rowcount
+
+    def claim(self, worker_id: str, kinds: Optional[List[str]] = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict]:
+        """领取一个可执行任务（待执行，或租约已过期且未达最大次数的任务）"""
+        now = time.time()
+        kind_filter = ""
+        params: List = [now, now]
+        if kinds:
+            kind_filter = f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire(now)
+            row = self.conn.execute(
+                "SELECT id, run_id, kind, payload, attempts FROM jobs "
+                "WHERE ((state = 'pending' AND available_at <= ?) OR (state = 'leased' AND lease_expires < ?))"
+                f"{kind_filter} ORDER BY id LIMIT 1",
+                params,
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row[0]),
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {"id": row[0], "run_id": row[1], "kind": row[2],
+                "payload": json.loads(row[3]), "attempts": row[4] + 1}
+
+    def complete(self, job_id: int, worker_id: str, result) -> bool:
+        """写回结果；租约已被他人接管时返回 False"""
+        cur = self.conn.execute(
+            "UPDATE jobs SET state = 'done', result = ?, error = NULL, lease_owner = NULL, updated_at = ? "
+            "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            (json.dumps(result, ensure_ascii=False, default=str), time.time(), job_id, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> None:
+        """失败：未达最大次数则退避后重新排队，否则标记 failed"""
+        now = time.time()
+        self.conn.execute(
+            "UPDATE jobs SET "
+            "state = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END, "
+            "available_at = ? + ? * attempts, error = ?, lease_owner = NULL, updated_at = ? "
+            "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            (now, RETRY_BACKOFF_SECONDS, error[:2000], now, job_id, worker_id),
+        )
+
+    def counts(self, run_id: str, kind: Optional[str] = None) -> Dict[str, int]:
+        sql = "SELECT state, COUNT(*) FROM jobs WHERE run_id = ?"
+        params: List = [run_id]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        return dict(self.conn.execute(sql + " GROUP BY state", params).fetchall())
+
+    def results(self, run_id: str, kind: str) -> List:
+        rows = self.conn.execute(
+            "SELECT result FROM jobs WHERE run_id = ? AND kind = ? AND state = 'done' ORDER BY id",
+            (run_id, kind),
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def results_by_id(self, run_id: str, kind: str) -> Dict[int, object]:
+        """已完成任务的结果，按任务 id 索引（用于与入队的批次对应）"""
+        rows = self.conn.execute(
+            "SELECT id, result FROM jobs WHERE run_id = ? AND kind = ? AND state = 'done'",
+            (run_id, kind),
+        ).fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def cancel(self, run_id: str, kind: str, reason: str) -> int:
+        """放弃该阶段未完成的任务（标记为 failed），返回放弃的任务数"""
+        cur = self.conn.execute(
+            "UPDATE jobs SET state = 'failed', error = ?, lease_owner = NULL, updated_at = ? "
+            "WHERE run_id = ? AND kind = ? AND state IN ('pending', 'leased')",
+            (reason, time.time(), run_id, kind),
+        )
+        return cur.rowcount
+
+    def unfinished(self, kinds: Optional[List[str]] = None) -> int:
+        """待执行（含退避中）或执行中的任务数；worker 据此判断能否退出"""
+        sql = "SELECT COUNT(*) FROM jobs WHERE state IN ('pending', 'leased')"
+        params: List = []
+        if kinds:
+            sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    def wait(self, run_id: str, kind: str, poll: float = 0.2, timeout: Optional[float] = None) -> Dict[str, int]:
+        """阻塞直到该阶段没有待执行或执行中的任务；超过 timeout 秒时直接返回当前计数"""
+        deadline = time.time() + timeout if timeout else None
+        while True:
+            # 没有 worker 再来领取时，过期租约也要在这里结清
+            self._expire(time.time())
+            counts = self.counts(run_id, kind)
+            if not counts.get("pending") and not counts.get("leased"):
+                return counts
+            if deadline and time.time() > deadline:
+                return counts
+            time.sleep(poll)
+
+
+# ============================================
+# 任务处理函数：kind → handler(payload) → 可 JSON 序列化的结果
+# ============================================
+def handle_fetch(payload: Dict):
+    """下载并解析一个源；出错直接抛出，由队列负责重试（fetch_rss 会吞掉异常）
+    payload 中带有源配置（协调器从注册表解析），worker 无需加载注册表"""
+    key = payload["source"]
+    source = payload.get("feed") or SOURCES.get(key)
+    if source is None:
+        raise ValueError(f"未知新闻源：{key}")
+    if not FEEDPARSER_AVAILABLE:
+        raise RuntimeError("未安装 feedparser")
+    feed = feedparser.parse(NewsFetcher(sources=[key])._download(source))
+    if feed.bozo and not feed.entries:
+        raise ValueError(f"RSS 解析失败：{feed.get('bozo_exception')}")
+    return entries_to_items(feed.entries, source)
+
+
+def handle_translate(payload: Dict):
+    translator = NewsTranslator()
+    items = payload["items"]
+    return translator.translate_items(items, fields=payload.get("fields"), max_items=len(items))
+
+
+def handle_sleep(payload: Dict):
+    """基准测试用：模拟 I/O 等待"""
+    time.sleep(payload.get("seconds", 0.05))
+    return {"ok": True}
+
+
+HANDLERS: Dict[str, Callable[[Dict], object]] = {
+    "fetch": handle_fetch,
+    "translate": handle_translate,
+    "sleep": handle_sleep,
+}
+
+
+def run_worker(db_path: str, kinds: Optional[List[str]] = None, idle_exit: Optional[float] = None,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS, quiet: bool = False) -> int:
+    """worker 主循环，返回完成的任务数；
+    idle_exit 秒内无任务、且队列中没有待执行（含退避中）或执行中的任务时退出"""
+    queue = JobQueue(db_path)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    done = 0
+    idle_since = time.time()
+    try:
+        while True:
+            job = queue.claim(worker_id, kinds, lease_seconds)
+            if job is None:
+                if idle_exit is not None and time.time() - idle_since > idle_exit:
+                    # 失败重试的退避可能长于 idle_exit，或其他 worker 的租约可能过期，此时继续等待
+                    if not queue.unfinished(kinds):
+                        return done
+                    idle_since = time.time()
+                time.sleep(0.1)
+                continue
+
+            handler = HANDLERS.get(job["kind"])
+            try:
+                if handler is None:
+                    raise ValueError(f"未知任务类型：{job['kind']}")
+                result = handler(job["payload"])
+                if queue.complete(job["id"], worker_id, result):
+                    done += 1
+            except Exception as e:
+                if not quiet:
+                    print(f"  ✗ 任务 {job['id']}（{job['kind']}）失败：{e}")
+                queue.fail(job["id"], worker_id, str(e))
+            idle_since = time.time()
+    finally:
+        queue.close()
+
+
+def spawn_workers(db_path: str, count: int, kinds: Optional[List[str]] = None,
+                  idle_exit: float = 2.0, quiet: bool = False) -> List[multiprocessing.Process]:
+    procs = []
+    for _ in range(count):
+        proc = multiprocessing.Process(target=run_worker, args=(db_path, kinds, idle_exit),
+                                       kwargs={"quiet": quiet}, daemon=True)
+        proc.start()
+        procs.append(proc)
+    return procs
+
+
+def _wait_stage(queue: JobQueue, run_id: str, kind: str, timeout: float) -> Dict[str, int]:
+    """等待一个阶段；超时后放弃未完成的任务，已完成的结果照常汇总"""
+    counts = queue.wait(run_id, kind, timeout=timeout)
+    unfinished = counts.get("pending", 0) + counts.get("leased", 0)
+    if unfinished:
+        queue.cancel(run_id, kind, f"阶段超时（{timeout:.0f} 秒）")
+        print(f"⚠️  {kind} 阶段超过 {timeout:.0f} 秒，放弃 {unfinished} 个未完成任务")
+        counts = queue.counts(run_id, kind)
+    return counts
+
+
+def coordinate(db_path: str, sources: List[str], days: int, max_items: int, translate: bool,
+               fields: List[str], workers: int, batch_size: int = 5,
+               strict_date_filter: bool = True, stage_timeout: float = DEFAULT_STAGE_TIMEOUT,
+               registry=None) -> List[Dict]:
+    """协调器：拆分任务 → 等待完成 → 汇总排序 → 分批翻译 → 返回最终条目
+    registry 为新闻源注册表（见 source_registry.py），源配置随任务下发"""
+    queue = JobQueue(db_path)
+    run_id = uuid.uuid4().hex
+    procs = spawn_workers(db_path, workers, idle_exit=5.0) if workers > 0 else []
+
+    try:
+        # 阶段一：每个源一个获取任务
+        fetcher = NewsFetcher(sources=sources, registry=registry)
+        queue.enqueue(run_id, "fetch", [{"source": key, "feed": fetcher._source(key)}
+                                        for key in sources if fetcher._source(key)])
+        counts = _wait_stage(queue, run_id, "fetch", stage_timeout)
+        print(f"获取阶段完成：{counts.get('done', 0)} 成功，{counts.get('failed', 0)} 失败")
+
+        all_news = [item for items in queue.results(run_id, "fetch") for item in items]
+        news = fetcher.select(all_news, days=days, strict_date_filter=strict_date_filter)
+        news = news[:max_items]
+
+        # 阶段二：前 N 条分批翻译
+        if translate and news:
+            batches = [news[i:i + batch_size] for i in range(0, len(news), batch_size)]
+            ids = queue.enqueue(run_id, "translate", [{"items": batch, "fields": fields} for batch in batches])
+            counts = _wait_stage(queue, run_id, "translate", stage_timeout)
+            print(f"翻译阶段完成：{counts.get('done', 0)} 批成功，{counts.get('failed', 0)} 批失败")
+            # 成功的批次用译文，失败的批次保留原文
+            translated = queue.results_by_id(run_id, "translate")
+            news = [item for job_id, batch in zip(ids, batches) for item in translated.get(job_id, batch)]
+        return news
+    finally:
+        queue.close()
+        for proc in procs:
+            proc.join(timeout=10)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="分布式获取/翻译任务队列")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    worker = sub.add_parser("worker", help="启动 worker")
+    worker.add_argument("--db", required=True, help="队列数据库路径（SQLite）")
+    worker.add_argument("--kinds", help="只处理指定任务类型，如 fetch,translate")
+    worker.add_argument("--idle-exit", type=float, default=None, help="空闲 N 秒后退出（默认常驻）")
+    worker.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="租约时长（秒）")
+
+    run = sub.add_parser("run", help="协调一次完整运行并生成报告")
+    run.add_argument("--db", required=True, help="队列数据库路径（SQLite）")
+    run.add_argument("--workers", type=int, default=4, help="本机启动的 worker 数（0 表示只用外部 worker）")
+    run.add_argument("--sources", help="指定新闻源（默认全部内置源），可用注册表中的键、tag:、category: 等")
+    run.add_argument("--registry", action="append", default=[],
+                     help="外部新闻源注册表（OPML/JSON/YAML，可多次指定；默认读取环境变量 AI_NEWS_REGISTRY）")
+    run.add_argument("--days", type=int, default=1)
+    run.add_argument("--max-items", type=int, default=15)
+    run.add_argument("--translate", action="store_true")
+    run.add_argument("--translate-fields", default="title,summary")
+    run.add_argument("--no-date-filter", action="store_true")
+    run.add_argument("--stage-timeout", type=float, default=DEFAULT_STAGE_TIMEOUT,
+                     help="每个阶段最长等待秒数，超时后放弃未完成任务（默认 %(default)s）")
+    run.add_argument("--format", choices=["standard", "summary", "newsletter"], default="newsletter")
+    run.add_argument("--save-to", help="保存路径")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "worker":
+        kinds = args.kinds.split(",") if args.kinds else None
+        done = run_worker(args.db, kinds, idle_exit=args.idle_exit, lease_seconds=args.lease)
+        print(f"worker 退出，共完成 {done} 个任务")
+        return
+
+    from source_registry import SourceRegistry
+    registry_paths = args.registry or [p for p in os.environ.get("AI_NEWS_REGISTRY", "").split(os.pathsep) if p]
+    registry = SourceRegistry(registry_paths)
+    sources = registry.select(args.sources) if args.sources else list(SOURCES.keys())
+    news = coordinate(
+        args.db, sources, args.days, args.max_items, args.translate,
+        args.translate_fields.split(","), args.workers,
+        strict_date_filter=not args.no_date_filter, stage_timeout=args.stage_timeout, registry=registry,
+    )
+    print(f"\n最终输出: {len(news)} 条新闻")
+    formatter = NewsFormatter(news)
+    if args.save_to:
+        os.makedirs(os.path.dirname(args.save_to) or ".", exist_ok=True)
+        with open(args.save_to, "w", encoding="utf-8") as f:
+            formatter.write(f, output="markdown", format_type=args.format)
+        print(f"已保存至：{args.save_to}")
+    else:
+        print(formatter.to_markdown(format_type=args.format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+多语言日报 - 一次抓取与分析，同时产出多种语言的报告
+各目标语言分别做翻译计划（见 translation_plan.py），再汇总到同一个调度器：
+相同的 (原文, 源语言, 目标语言) 只翻译一次，并发提交给翻译引擎。
+主语言的译文写入条目字段，其余语言写入 item["i18n"][语言]，
+digest.py 按订阅者的 language 偏好选用，报告按语言分别写出 Markdown 与 HTML。
+
+用法：
+    python scripts/fetch_ai_news.py --translate --languages zh,en --save-to reports/ai-daily.md
+        # 生成 reports/ai-daily.md（主语言）以及 ai-daily.zh.md/.html、ai-daily.en.md/.html
+    python scripts/benchmark.py fanout
+"""
+
+import os
+from concurrent.futures import wait
+from typing import Dict, List, Optional, Tuple
+
+from run_budget import DaemonThreadPool
+
+
+def parse_languages(spec: Optional[str]) -> List[str]:
+    """zh,en → ["zh", "en"]；第一个为主语言"""
+    languages: List[str] = []
+    for lang in (spec or "").split(","):
+        lang = lang.strip()
+        if lang and lang not in languages:
+            languages.append(lang)
+    return languages
+
+
+def localize(item: Dict, language: str) -> Dict:
+    """按语言取标题和摘要：有该语言的原文/译文就替换，否则用报告语言"""
+    override = item.get("i18n", {}).get(language)
+    return {**item, **override} if override else item
+
+
+def report_path(save_to: str, language: str, ext: str) -> str:
+    """reports/ai-daily.md → reports/ai-daily.en.md"""
+    stem = os.path.splitext(save_to)[0]
+    return f"{stem}.{language}{ext}"
+
+
+class TranslationScheduler:
+    """多语言共用的翻译调度：按 (原文, 源语言, 目标语言) 去重后并发翻译"""
+
+    def __init__(self, translator, max_workers: int = 4):
+        self.translator = translator
+        self.max_workers = max_workers
+        # 调度键 -> (优先级, 提交序号)，数值小的先翻译
+        self._keys: Dict[Tuple[str, str, str], Tuple[int, int]] = {}
+        self.results: Dict[Tuple[str, str, str], str] = {}
+        self.stats = {"requested": 0, "unique": 0, "translated": 0, "pending": 0}
+
+    def request(self, text: str, source: str, target: str, priority: int = 0) -> Tuple[str, str, str]:
+        key = (text, source, target)
+        self.stats["requested"] += 1
+        if key not in self._keys:
+            self._keys[key] = (priority, len(self._keys))
+            self.stats["unique"] += 1
+        elif priority < self._keys[key][0]:
+            self._keys[key] = (priority, self._keys[key][1])
+        return key
+
+    def run(self, timeout: Optional[float] = None) -> Dict[Tuple[str, str, str], str]:
+        """按优先级和提交顺序翻译；timeout 到期后未完成的不再等待（调用方保留原文）"""
+        todo = sorted((key for key in self._keys if key not in self.results), key=self._keys.get)
+        if not todo:
+            return self.results
+        # 守护线程：超时后放弃的翻译调用不会拖住进程退出
+        pool = DaemonThreadPool(max_workers=self.max_workers)
+        futures = {pool.submit(self.translator.translate, text, target, source): (text, source, target)
+                   for text, source, target in todo}
+        done, not_done = wait(futures, timeout=timeout)
+        pool.shutdown(wait=False, cancel_futures=True)
+        for future in done:
+            self.results[futures[future]] = future.result()
+        self.stats["translated"] = len(self.results)
+        self.stats["pending"] = len(not_done)
+        return self.results
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"翻译调度：请求 {s['requested']} 段，去重后 {s['unique']} 段，"
+                f"完成 {s['translated']} 段" + (f"，未完成 {s['pending']} 段" if s["pending"] else ""))
+
+
+def translate_languages(translator, items: List[Dict], languages: List[str], fields: Optional[List[str]] = None,
+                        max_items: int = 10, limits: Optional[Dict[str, Optional[int]]] = None,
+                        budget=None, max_workers: int = 4) -> List[Dict]:
+    """把前 max_items 条翻译成 languages 中的每种语言；languages[0] 为主语言"""
+    if not translator.available or not items or not languages:
+        return items
+
+    fields = fields or ["title", "summary"]
+    scheduler = TranslationScheduler(translator, max_workers=max_workers)
+    # (语言, 条目, 字段, 调度键)
+    assignments: List[Tuple[str, Dict, str, Tuple[str, str, str]]] = []
+    for language in languages:
+        plan = translator.plan(items[:max_items], fields, limits, target=language)
+        print(plan.summary())
+        translator.stats["chars_sent"] += plan.stats["chars_sent"]
+        translator.stats["chars_saved"] += plan.chars_saved
+        for (item, field, text), source in zip(plan.tasks, plan.sources):
+            # 先译标题，阶段超时后摘要保留原文
+            key = scheduler.request(text, source, language, priority=0 if field == "title" else 1)
+            assignments.append((language, item, field, key))
+
+    stage = budget.stage("translate") if budget is not None else None
+    print(f"正在翻译 {scheduler.stats['unique']} 段（{len(languages)} 种语言）...")
+    results = scheduler.run(timeout=stage.remaining() if stage is not None else None)
+    print(scheduler.summary())
+    if stage is not None:
+        budget.finish(stage)
+        if scheduler.stats["pending"]:
+            budget.degrade("translate", "untranslated_languages",
+                           f"{scheduler.stats['pending']} 段未翻译（保留原文）")
+
+    primary = languages[0]
+    # 其他语言先写入 i18n，主语言再替换字段（_apply 会把原文另存到源语言下）
+    for language, item, field, key in sorted(assignments, key=lambda a: a[0] == primary):
+        if key not in results:
+            continue
+        if language == primary:
+            translator._apply(item, field, results[key])
+        else:
+            item.setdefault("i18n", {}).setdefault(language, {})[field] = results[key]
+    return items
+
+
+def write_language_reports(items: List[Dict], languages: List[str], save_to: str, format_type: str = "newsletter",
+                           trending=None, notes: Optional[List[str]] = None) -> List[str]:
+    """每种语言写出一份 Markdown 与 HTML 报告，返回写出的路径"""
+    from datetime import datetime
+    from fetch_ai_news import NewsFormatter
+    from send_email import generate_professional_html
+
+    date_str = datetime.now().strftime('%Y年%m月%d日')
+    os.makedirs(os.path.dirname(save_to) or ".", exist_ok=True)
+    paths = []
+    for language in languages:
+        localized = [localize(item, language) for item in items]
+        md_path = report_path(save_to, language, ".md")
+        with open(md_path, "w", encoding="utf-8") as f:
+            NewsFormatter(localized, trending=trending).write(f, output="markdown", format_type=format_type)
+        html_path = report_path(save_to, language, ".html")
+        with open(html_path, "w", encoding="utf-8") as f:
+            f.write(generate_professional_html(localized, date_str, notes=notes))
+        paths += [md_path, html_path]
+    return paths
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+AI 新闻常驻进程 - 按各新闻源的更新节奏自适应轮询
+特点：从条目时间戳和 RSS 提示（ttl、sy:updatePeriod）学习更新频率，
+注册表中源的 poll 提示作为初始间隔和下限；每个源按各自带抖动的间隔轮询；解析结果常驻内存并定期落盘，
+日报直接基于已采集的数据生成，发送时无需阻塞抓取。
+
+用法：
+    python scripts/news_daemon.py --state reports/daemon-state.json --report-at 20:00
+    python scripts/news_daemon.py --registry sources.json --sources tag:chinese --report-at 20:00
+    python scripts/fetch_ai_news.py --from-state reports/daemon-state.json --days 2 --translate
+"""
+
+import argparse
+import heapq
+import json
+import os
+import random
+import signal
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fetch_ai_news import (
+    FEEDPARSER_AVAILABLE, REQUESTS_AVAILABLE, SOURCES, NewsFetcher, NewsFormatter,
+    NewsTranslator, TRANSLATOR_AVAILABLE, entries_to_items, parse_date,
+)
+
+if FEEDPARSER_AVAILABLE:
+    import feedparser
+if REQUESTS_AVAILABLE:
+    import requests
+
+
+# sy:updatePeriod 对应的秒数
+UPDATE_PERIODS = {
+    "hourly": 3600,
+    "daily": 86400,
+    "weekly": 7 * 86400,
+    "monthly": 30 * 86400,
+    "yearly": 365 * 86400,
+}
+
+DEFAULT_MIN_INTERVAL = 5 * 60
+DEFAULT_MAX_INTERVAL = 24 * 3600
+DEFAULT_INTERVAL = 3600
+
+
+def estimate_interval(timestamps: List[float], ttl_minutes: Optional[int] = None,
+                      update_period: Optional[str] = None, update_frequency: Optional[int] = None,
+                      min_interval: float = DEFAULT_MIN_INTERVAL,
+                      max_interval: float = DEFAULT_MAX_INTERVAL,
+                      default: float = DEFAULT_INTERVAL) -> float:
+    """根据条目发布时间间隔和 RSS 提示估算轮询间隔（秒）
+
+    取相邻条目间隔的中位数的一半，使平均延迟约为半个发布周期；
+    条目不足时退回 sy:updatePeriod / updateFrequency 提示，再退回 default；ttl 作为下限。
+    """
+    interval = None
+    ordered = sorted(timestamps, reverse=True)
+    gaps = [a - b for a, b in zip(ordered, ordered[1:]) if a - b > 0]
+    if len(gaps) >= 3:
+        interval = statistics.median(gaps) / 2
+    elif update_period in UPDATE_PERIODS:
+        interval = UPDATE_PERIODS[update_period] / max(update_frequency or 1, 1)
+
+    if interval is None:
+        interval = default
+    if ttl_minutes:
+        interval = max(interval, ttl_minutes * 60)
+    return max(min_interval, min(max_interval, interval))
+
+
+def poll_hints(source: Dict) -> Tuple[Optional[float], Optional[float]]:
+    """注册表中源的 poll 提示：{"interval": 秒, "min": 秒}，返回 (初始间隔, 下限)
+
+    只给 interval 时它同时作为下限；无法解析的值忽略。"""
+    hints = source.get("poll") or {}
+    values = []
+    for field in ("interval", "min"):
+        try:
+            value = float(hints[field]) if hints.get(field) else None
+        except (TypeError, ValueError):
+            value = None
+        values.append(value if value and value > 0 else None)
+    interval, floor = values
+    return interval, floor or interval
+
+
+def jittered(interval: float, jitter: float, rng: random.Random) -> float:
+    """加入 ±jitter 比例的随机抖动，避免各源同时轮询"""
+    return interval * (1 + rng.uniform(-jitter, jitter))
+
+
+class SourceState:
+    """单个新闻源的轮询状态与已采集条目"""
+
+    def __init__(self, key: str, interval: float = DEFAULT_INTERVAL):
+        self.key = key
+        self.items: Dict[str, Dict] = {}
+        self.interval = interval
+        self.next_poll = 0.0
+        self.last_polled: Optional[float] = None
+        self.etag: Optional[str] = None
+        self.modified: Optional[str] = None
+        self.ttl: Optional[int] = None
+        self.update_period: Optional[str] = None
+        self.update_frequency: Optional[int] = None
+        self.failures = 0
+
+    def timestamps(self) -> List[float]:
+        result = []
+        for item in self.items.values():
+            pub_date = parse_date(item.get("published", ""))
+            if pub_date:
+                result.append(pub_date.timestamp())
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            "interval": self.interval,
+            "next_poll": self.next_poll,
+            "last_polled": self.last_polled,
+            "etag": self.etag,
+            "modified": self.modified,
+            "ttl": self.ttl,
+            "update_period": self.update_period,
+            "update_frequency": self.update_frequency,
+            "items": list(self.items.values()),
+        }
+
+    @classmethod
+    def from_dict(cls, key: str, data: Dict, interval: float = DEFAULT_INTERVAL) -> "SourceState":
+        state = cls(key, interval)
+        for field in ("interval", "next_poll", "last_polled", "etag", "modified",
+                      "ttl", "update_period", "update_frequency"):
+            if data.get(field) is not None:
+                setattr(state, field, data[field])
+        for item in data.get("items", []):
+            state.items[item.get("link") or item.get("title", "")] = item
+        return state
+
+
+class NewsDaemon:
+    """自适应轮询调度器"""
+
+    def __init__(self, sources: List[str], state_path: Optional[str] = None,
+                 min_interval: float = DEFAULT_MIN_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                 jitter: float = 0.1, retain_days: int = 7,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep,
+                 websub=None, trends=None, registry=None):
+        # 外部新闻源注册表（见 source_registry.py），未指定时只用内置 SOURCES
+        self.registry = registry
+        self.configs: Dict[str, Dict] = {}
+        for key in sources:
+            source = registry.get(key) if registry is not None else SOURCES.get(key)
+            if source:
+                self.configs[key] = source
+        self.sources = list(self.configs)
+        self.state_path = state_path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.retain_days = retain_days
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = random.Random()
+        # 注册表的 poll 提示：(初始间隔, 下限)
+        self.hints = {key: poll_hints(source) for key, source in self.configs.items()}
+        self.states: Dict[str, SourceState] = {key: SourceState(key, self._initial_interval(key))
+                                               for key in self.sources}
+        self._stopping = False
+        self._fetcher = NewsFetcher(sources=self.sources, registry=registry)
+        # WebSub 推送与轮询线程共享状态
+        self._lock = threading.RLock()
+        self.websub = websub
+        # 公司提及趋势（见 trends.py），新入库的条目增量计入
+        self.trends = trends
+        # 解析进程池（见 parse_pool.py），异常的源只会让该次轮询失败
+        self.parse_pool = None
+        if state_path and os.path.exists(state_path):
+            self.load()
+
+    # ---------- 状态持久化 ----------
+
+    def load(self) -> None:
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for key, source_data in data.get("sources", {}).items():
+            if key in self.states:
+                self.states[key] = SourceState.from_dict(key, source_data, self._initial_interval(key))
+        print(f"已恢复状态：{sum(len(s.items) for s in self.states.values())} 条新闻")
+
+    def save(self) -> None:
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        with self._lock:
+            data = {
+                "saved_at": datetime.now().isoformat(),
+                "sources": {key: state.to_dict() for key, state in self.states.items()},
+            }
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    # ---------- 轮询 ----------
+
+    def _initial_interval(self, key: str) -> float:
+        interval, _ = self.hints[key]
+        return max(self.min_interval, min(self.max_interval, interval or DEFAULT_INTERVAL))
+
+    def poll(self, key: str) -> int:
+        """轮询一个源，返回新增条目数"""
+        state = self.states[key]
+        source = self.configs[key]
+        now = self.clock()
+        state.last_polled = now
+
+        headers = {"User-Agent": "Mozilla/5.0 (compatible; AI News Bot)"}
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.modified:
+            headers["If-Modified-Since"] = state.modified
+
+        try:
+            resp = requests.get(source["url"], timeout=30, headers=headers)
+            if resp.status_code == 304:
+                added = 0
+            else:
+                resp.raise_for_status()
+                if self.parse_pool is not None:
+                    items, hints = self.parse_pool.parse_feed(resp.text, source)
+                else:
+                    feed = feedparser.parse(resp.text)
+                    items, hints = entries_to_items(feed.entries, source), feed.feed
+                self._read_hints(state, hints)
+                added = self.ingest(key, items)
+                # 入库成功后才记下校验值，否则下次得到 304，这批条目就丢了
+                state.etag = resp.headers.get("ETag")
+                state.modified = resp.headers.get("Last-Modified")
+                if self.websub is not None:
+                    self.websub.maybe_subscribe(key, resp.text, resp.headers.get("Link", ""))
+            state.failures = 0
+        except Exception as e:
+            state.failures += 1
+            print(f"  ✗ {source['name']} 获取失败：{e}")
+            added = 0
+
+        if self.websub is not None and self.websub.is_pushed(key):
+            # 已有推送订阅，轮询只作兜底
+            state.interval = self.max_interval
+        else:
+            # 推送线程会同时改动 state.items
+            with self._lock:
+                timestamps = state.timestamps()
+            hint, floor = self.hints[key]
+            state.interval = estimate_interval(
+                timestamps, state.ttl, state.update_period, state.update_frequency,
+                min(max(self.min_interval, floor or 0), self.max_interval), self.max_interval,
+                default=hint or DEFAULT_INTERVAL,
+            )
+        # 连续失败时指数退避
+        delay = state.interval * (2 ** min(state.failures, 5))
+        state.next_poll = now + jittered(min(delay, self.max_interval), self.jitter, self.rng)
+        return added
+
+    @staticmethod
+    def _read_hints(state: SourceState, feed_meta) -> None:
+        try:
+            state.ttl = int(feed_meta.get("ttl")) if feed_meta.get("ttl") else None
+        except (TypeError, ValueError):
+            state.ttl = None
+        period = (feed_meta.get("sy_updateperiod") or "").strip().lower()
+        state.update_period = period or None
+        try:
+            frequency = feed_meta.get("sy_updatefrequency")
+            state.update_frequency = int(frequency) if frequency else None
+        except (TypeError, ValueError):
+            state.update_frequency = None
+
+    def ingest(self, key: str, items: List[Dict]) -> int:
+        """合并新条目（按链接去重），并清理过期条目"""
+        with self._lock:
+            return self._ingest(key, items)
+    
+    def _ingest(self, key: str, items: List[Dict]) -> int:
+        state = self.states[key]
+        new_items = []
+        for item in items:
+            item_id = item.get("link") or item.get("title", "")
+            if item_id not in state.items:
+                new_items.append(item)
+            state.items[item_id] = item
+        added = len(new_items)
+        if self.trends is not None and new_items:
+            self.trends.ingest(new_items)
+
+        cutoff = datetime.now() - timedelta(days=self.retain_days)
+        for item_id, item in list(state.items.items()):
+            pub_date = parse_date(item.get("published", ""))
+            if pub_date and pub_date.replace(tzinfo=None) < cutoff:
+                del state.items[item_id]
+        return added
+
+    def on_push(self, key: str, items: List[Dict]) -> None:
+        """WebSub 推送的条目与轮询结果走同一入库流程"""
+        added = self.ingest(key, items)
+        print(f"  {self.configs[key]['name']}: 推送新增 {added} 条")
+        self.save()
+
+    # ---------- 报告 ----------
+
+    def build_report(self, days: int = 2, max_items: int = 20, translator: Optional[NewsTranslator] = None,
+                     format_type: str = "newsletter") -> NewsFormatter:
+        """基于内存中的数据生成报告，不触发任何抓取"""
+        with self._lock:
+            all_news = [dict(item) for state in self.states.values() for item in state.items.values()]
+        news = self._fetcher.select(all_news, days=days)[:max_items]
+        if translator and news:
+            news = translator.translate_items(news, max_items=max_items,
+                                              limits=NewsFormatter.rendered_chars([("markdown", format_type)]))
+        trending = self.trends.trending(days=7) if self.trends is not None else None
+        return NewsFormatter(news, trending=trending)
+
+    def write_report(self, path: str, **kwargs) -> None:
+        formatter = self.build_report(**kwargs)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            formatter.write(f, output="markdown", format_type="newsletter")
+        print(f"已生成日报：{path}（{len(formatter.news_items)} 条）")
+
+    # ---------- 主循环 ----------
+
+    def stop(self, *_args) -> None:
+        self._stopping = True
+
+    def run(self, report_at: Optional[str] = None, report_dir: str = "reports",
+            report_kwargs: Optional[Dict] = None, max_polls: Optional[int] = None) -> None:
+        """调度循环：最早到期的源先轮询；到达 report_at 时生成当日报告"""
+        queue = [(state.next_poll, key) for key, state in self.states.items()]
+        heapq.heapify(queue)
+        next_report = self._next_report_time(report_at) if report_at else None
+        polls = 0
+
+        while queue and not self._stopping:
+            if next_report is not None and next_report <= queue[0][0]:
+                self._wait_until(next_report)
+                if self._stopping:
+                    break
+                date = datetime.fromtimestamp(next_report).strftime("%Y%m%d")
+                self.write_report(os.path.join(report_dir, f"ai-daily-{date}.md"), **(report_kwargs or {}))
+                next_report = self._next_report_time(report_at)
+                continue
+
+            due, key = heapq.heappop(queue)
+            self._wait_until(due)
+            if self._stopping:
+                break
+
+            added = self.poll(key)
+            state = self.states[key]
+            print(f"  {self.configs[key]['name']}: 新增 {added} 条，下次轮询间隔 {state.interval / 60:.0f} 分钟")
+            heapq.heappush(queue, (state.next_poll, key))
+            self.save()
+
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                break
+
+        self.save()
+
+    def _wait_until(self, deadline: float) -> None:
+        """分段等待，收到停止信号时尽快返回"""
+        while not self._stopping:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return
+            self.sleep(min(remaining, 1.0))
+
+    def _next_report_time(self, report_at: str) -> float:
+        hour, minute = (int(x) for x in report_at.split(":"))
+        now = datetime.fromtimestamp(self.clock())
+        target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if target.timestamp() <= self.clock():
+            target += timedelta(days=1)
+        return target.timestamp()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI 新闻常驻进程（自适应轮询）")
+    parser.add_argument("--sources", help="指定新闻源（默认全部内置源），支持 tag:xx、category:xx、language:xx")
+    parser.add_argument("--registry", action="append", default=[],
+                        help="新闻源注册表文件（OPML/JSON/YAML，可重复；见 source_registry.py）")
+    parser.add_argument("--state", default="reports/daemon-state.json", help="状态文件路径")
+    parser.add_argument("--min-interval", type=int, default=DEFAULT_MIN_INTERVAL, help="最短轮询间隔（秒）")
+    parser.add_argument("--max-interval", type=int, default=DEFAULT_MAX_INTERVAL, help="最长轮询间隔（秒）")
+    parser.add_argument("--jitter", type=float, default=0.1, help="轮询间隔抖动比例")
+    parser.add_argument("--retain-days", type=int, default=7, help="内存中保留的天数")
+    parser.add_argument("--report-at", help="每日生成报告的时间，如 20:00")
+    parser.add_argument("--report-dir", default="reports")
+    parser.add_argument("--days", type=int, default=2)
+    parser.add_argument("--max-items", type=int, default=20)
+    parser.add_argument("--translate", action="store_true")
+    parser.add_argument("--trends", action="store_true", help="新入库的条目计入公司提及趋势（见 trends.py）")
+    parser.add_argument("--parse-workers", type=int, default=0, help="在 N 个独立进程中解析 RSS（0 为本进程解析）")
+    parser.add_argument("--parse-cpu", type=float, default=10, help="每个源解析的 CPU 时间上限（秒）")
+    parser.add_argument("--parse-memory", type=int, default=512, help="解析进程的内存上限（MB）")
+    parser.add_argument("--parse-recycle", type=int, default=50, help="解析进程处理多少个源后重启")
+    parser.add_argument("--websub-callback", help="启用 WebSub 推送：本机对外可访问的回调地址，如 http://my.host:8080")
+    parser.add_argument("--websub-listen", default="0.0.0.0:8080", help="回调服务监听地址")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not FEEDPARSER_AVAILABLE or not REQUESTS_AVAILABLE:
+        print("错误：常驻模式需要 feedparser 和 requests")
+        return
+
+    from source_registry import SourceRegistry
+    registry_paths = args.registry or [p for p in os.environ.get("AI_NEWS_REGISTRY", "").split(os.pathsep) if p]
+    registry = SourceRegistry(registry_paths)
+    sources = registry.select(args.sources) if args.sources else list(SOURCES.keys())
+    daemon = NewsDaemon(
+        sources, state_path=args.state,
+        min_interval=args.min_interval, max_interval=args.max_interval,
+        jitter=args.jitter, retain_days=args.retain_days, registry=registry,
+    )
+    if args.trends:
+        from trends import TrendStore
+        daemon.trends = TrendStore()
+    if args.parse_workers > 0:
+        from parse_pool import ParsePool
+        daemon.parse_pool = ParsePool(args.parse_workers, cpu_seconds=args.parse_cpu, memory_mb=args.parse_memory,
+                                      max_jobs=args.parse_recycle)
+    if args.websub_callback:
+        from websub import WebSubSubscriber, parse_listen
+        daemon.websub = WebSubSubscriber(args.websub_callback, parse_listen(args.websub_listen), daemon.on_push,
+                                         resolve=daemon.configs.get)
+        daemon.websub.start()
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+
+    translator = NewsTranslator() if args.translate and TRANSLATOR_AVAILABLE else None
+    print(f"常驻进程已启动：{len(daemon.sources)} 个新闻源")
+    daemon.run(
+        report_at=args.report_at, report_dir=args.report_dir,
+        report_kwargs={"days": args.days, "max_items": args.max_items, "translator": translator},
+    )
+    if daemon.websub is not None:
+        daemon.websub.stop()
+    if daemon.parse_pool is not None:
+        print(daemon.parse_pool.summary())
+        daemon.parse_pool.close()
+    print("常驻进程已退出，状态已保存")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+RSS 解析进程池 - 在独立的 worker 进程中解析 RSS，单个源出问题不影响整次运行
+每个任务限制 CPU 时间（RLIMIT_CPU）、内存（RLIMIT_AS 兜底，主进程按 /proc 监控 RSS）
+和墙钟时间，超限的 worker 被终止并替换，该源按获取失败处理；worker 处理 N 个任务后自动回收。
+worker 只把规范化后的条目（entries_to_items 的结果）和少量 feed 级提示传回主进程。
+
+用法：
+    python scripts/fetch_ai_news.py --parse-workers 2 --parse-cpu 10 --parse-memory 512
+    python scripts/news_daemon.py --parse-workers 2
+"""
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+
+# 传回主进程的 feed 级字段（常驻模式用于估计轮询间隔）
+FEED_HINTS = ("ttl", "sy_updateperiod", "sy_updatefrequency")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# 与 worker 的连接断开（worker 已退出或被终止）
+_DISCONNECTED = (EOFError, BrokenPipeError, ConnectionResetError)
+
+
+class ParseLimitExceeded(RuntimeError):
+    """解析超出 CPU、内存或时间限制（worker 已被终止）"""
+
+
+def parse_feed(text: str, source: Dict) -> Tuple[List[Dict], Dict]:
+    """解析 RSS 原文，返回 (规范化条目, feed 级提示)；进程内与 worker 共用"""
+    import feedparser
+    from fetch_ai_news import entries_to_items
+
+    feed = feedparser.parse(text)
+    hints = {name: feed.feed.get(name) for name in FEED_HINTS if feed.feed.get(name) is not None}
+    return entries_to_items(feed.entries, source), hints
+
+
+def _statm(pid: str, field: int) -> Optional[int]:
+    """/proc/<pid>/statm 中的页数换算为字节：0 为虚拟内存，1 为 RSS；不支持时返回 None"""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[field]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _worker_main(conn, cpu_seconds: float, memory_bytes: int, max_jobs: int) -> None:
+    """worker 进程：逐个处理任务，处理 max_jobs 个后退出"""
+    # 中断由主进程处理
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import fetch_ai_news  # noqa: F401  预先加载，不计入任务的 CPU 时间
+
+    if RESOURCE_AVAILABLE and memory_bytes:
+        # 地址空间上限 = 当前占用 + 限额；实际 RSS 由主进程监控
+        baseline = _statm("self", 0) or 0
+        limit = baseline + memory_bytes
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    for _ in range(max_jobs):
+        try:
+            # 接收原文本身也计入内存上限：过大的 feed 在这里就会超限
+            job = conn.recv()
+        except MemoryError:
+            _send_fatal(conn)
+            return
+        except EOFError:
+            return
+        if job is None:
+            return
+        if RESOURCE_AVAILABLE and cpu_seconds:
+            # 每个任务单独计时：软限制设为已用 CPU + 限额，超出时内核发送 SIGXCPU 终止进程
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, resource.RLIM_INFINITY))
+        text, source = job
+        try:
+            conn.send(("ok",) + parse_feed(text, source))
+        except MemoryError:
+            _send_fatal(conn)
+            return
+        except Exception as e:
+            conn.send(("error", f"解析失败：{e}"))
+
+
+def _send_fatal(conn) -> None:
+    """内存超限：堆可能已不完整，尽量报告后退出，由主进程换新的 worker"""
+    try:
+        conn.send(("fatal", "内存超限"))
+    except (MemoryError, OSError):
+        pass
+
+
+class _Worker:
+    def __init__(self, ctx, cpu_seconds: float, memory_bytes: int, max_jobs: int):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, cpu_seconds, memory_bytes, max_jobs),
+                                   daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+        self.max_jobs = max_jobs
+
+    @property
+    def retired(self) -> bool:
+        return self.jobs >= self.max_jobs or not self.process.is_alive()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def exit_reason(self) -> str:
+        self.process.join(timeout=1)
+        exitcode = self.process.exitcode
+        if exitcode == -signal.SIGXCPU:
+            return "CPU 时间超限"
+        return f"退出码 {exitcode}" if exitcode is not None else "连接中断"
+
+
+class ParsePool:
+    """RSS 解析进程池；parse() 线程安全，可被 NewsFetcher 的并发获取线程直接调用"""
+
+    def __init__(self, workers: int = 2, cpu_seconds: float = 10, memory_mb: int = 512,
+                 max_jobs: int = 50, timeout: float = 30, poll_interval: float = 0.05):
+        self.size = max(1, workers)
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = int(memory_mb * 1024 * 1024) if memory_mb else 0
+        self.max_jobs = max(1, max_jobs)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        # spawn：主进程已有下载线程，fork 可能继承到被持有的锁
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._started = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"jobs": 0, "failed": 0, "killed": 0, "recycled": 0, "started": 0}
+
+    def _acquire(self) -> _Worker:
+        with self._cond:
+            while not self._closed and not self._idle and self._started >= self.size:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("解析进程池已关闭")
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+            self.stats["started"] += 1
+        try:
+            return _Worker(self._ctx, self.cpu_seconds, self.memory_bytes, self.max_jobs)
+        except Exception:
+            self._release(None)
+            raise
+
+    def _release(self, worker: Optional[_Worker]) -> None:
+        with self._cond:
+            if worker is not None and not worker.retired and not self._closed:
+                self._idle.append(worker)
+            else:
+                self._started -= 1
+                if worker is not None:
+                    if worker.jobs >= worker.max_jobs:
+                        self.stats["recycled"] += 1
+                    worker.kill()
+            self._cond.notify()
+
+    def parse_feed(self, text: str, source: Dict) -> Tuple[List[Dict], Dict]:
+        """在 worker 中解析；超限时终止该 worker 并抛出 ParseLimitExceeded"""
+        worker = self._acquire()
+        worker.jobs += 1
+        self.stats["jobs"] += 1
+        try:
+            result = self._run(worker, text, source)
+            if result[0] == "fatal":
+                self.stats["killed"] += 1
+                raise ParseLimitExceeded(result[1])
+        except Exception:
+            self.stats["failed"] += 1
+            worker.kill()
+            self._release(None)
+            raise
+        self._release(worker)
+        if result[0] == "error":
+            self.stats["failed"] += 1
+            raise RuntimeError(result[1])
+        return result[1], result[2]
+
+    def parse(self, text: str, source: Dict) -> List[Dict]:
+        return self.parse_feed(text, source)[0]
+
+    def _run(self, worker: _Worker, text: str, source: Dict):
+        try:
+            worker.conn.send((text, source))
+        except _DISCONNECTED:
+            # worker 在接收途中退出（如原文超过内存上限），退出前可能已报告原因
+            self.stats["killed"] += 1
+            reason = f"解析进程异常退出（{worker.exit_reason()}）"
+            try:
+                if worker.conn.poll(0):
+                    reason = worker.conn.recv()[-1]
+            except (*_DISCONNECTED, OSError):
+                pass
+            raise ParseLimitExceeded(reason)
+        deadline = time.monotonic() + self.timeout
+        pid = str(worker.process.pid)
+        while not worker.conn.poll(self.poll_interval):
+            if not worker.process.is_alive():
+                self.stats["killed"] += 1
+                raise ParseLimitExceeded(f"解析进程异常退出（{worker.exit_reason()}）")
+            rss = _statm(pid, 1)
+            if self.memory_bytes and rss is not None and rss > self.memory_bytes:
+                self.stats["killed"] += 1
+                raise ParseLimitExceeded(f"解析占用内存 {rss // (1024 * 1024)} MB，超过限制")
+            if time.monotonic() > deadline:
+                self.stats["killed"] += 1
+                raise ParseLimitExceeded(f"解析超过 {self.timeout:.0f} 秒")
+        try:
+            return worker.conn.recv()
+        except _DISCONNECTED:
+            self.stats["killed"] += 1
+            raise ParseLimitExceeded(f"解析进程异常退出（{worker.exit_reason()}）")
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            workers, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.kill()
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"解析进程池：任务 {s['jobs']} 个，失败 {s['failed']} 个（其中超限终止 {s['killed']} 个），"
+                f"启动 worker {s['started']} 个，回收 {s['recycled']} 个")
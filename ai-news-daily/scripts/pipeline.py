@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+重叠流水线 - 边获取边处理，翻译延迟藏在慢源的下载时间里
+先完成的新闻源立即进入 日期过滤 → 去重 → 候选排序；当前最可能进入前 K 条的候选
+提前提交翻译（推测执行）。所有源完成后再统一排序，最终翻译直接复用推测结果。
+
+用法：
+    python scripts/fetch_ai_news.py --overlap --translate --max-items 20
+    python scripts/benchmark.py e2e --replay recordings/20260210 --latency feed=0.3,translate=0.05 --overlap
+"""
+
+import heapq
+from concurrent.futures import wait
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from fetch_ai_news import NewsTranslator
+from run_budget import DaemonThreadPool
+from text_analysis import analysis
+
+
+def dedup_key(item: Dict) -> str:
+    """去重键：优先用链接，否则用入库时算好的标题指纹"""
+    link = (item.get("link") or "").split("#", 1)[0].rstrip("/")
+    return link or analysis(item)["fingerprint"]
+
+
+class OverlappedPipeline:
+    """获取与翻译重叠执行"""
+
+    def __init__(self, fetcher, translator: Optional[NewsTranslator] = None, fields: Optional[List[str]] = None,
+                 top_k: int = 15, translate_workers: int = 2,
+                 candidate_filter: Optional[Callable[[Dict], bool]] = None, budget=None,
+                 limits: Optional[Dict[str, Optional[int]]] = None):
+        self.fetcher = fetcher
+        self.translator = translator if translator is not None and translator.available else None
+        self.fields = fields or ["title", "summary"]
+        self.top_k = top_k
+        self.translate_workers = translate_workers
+        # 与最终筛选（--categories / --search）一致，避免为不会展示的条目做推测翻译
+        self.candidate_filter = candidate_filter
+        self.budget = budget
+        # 与最终翻译使用同一份翻译计划，推测翻译的原文片段才能命中缓存
+        self.limits = limits
+        self.items: List[Dict] = []
+        self._seen: Dict[str, Dict] = {}
+        # 原文片段 -> 推测翻译任务
+        self._speculative: Dict[str, object] = {}
+        self.stats = {"sources": 0, "items": 0, "duplicates": 0, "speculated": 0, "reused": 0}
+
+    def _candidates(self) -> List[Dict]:
+        pool = self.items if self.candidate_filter is None else filter(self.candidate_filter, self.items)
+        return heapq.nlargest(self.top_k, pool, key=lambda x: x.get("_parsed_date", datetime.min))
+
+    def _planned_texts(self) -> List[str]:
+        return self.translator.plan(self._candidates(), self.fields, self.limits).texts()
+
+    def _speculate(self, executor: DaemonThreadPool) -> None:
+        for text in self._planned_texts():
+            if text not in self._speculative:
+                self._speculative[text] = executor.submit(self.translator.translate, text)
+                self.stats["speculated"] += 1
+
+    def _accept(self, items: List[Dict], cutoff: Optional[datetime], days: int) -> None:
+        for item in items:
+            if cutoff is not None and not self.fetcher.within(item, cutoff, days):
+                continue
+            key = dedup_key(item)
+            if key in self._seen:
+                self.stats["duplicates"] += 1
+                continue
+            self._seen[key] = item
+            self.items.append(item)
+
+    def run(self, days: int = 1, strict_date_filter: bool = True) -> List[Dict]:
+        """获取全部新闻源并返回排序后的条目；推测翻译的结果已进入翻译器缓存"""
+        cutoff = self.fetcher.date_cutoff(days) if strict_date_filter and days > 0 else None
+        executor = DaemonThreadPool(max_workers=self.translate_workers) if self.translator else None
+
+        for _, items in self.fetcher.iter_fetch(self.budget):
+            self.stats["sources"] += 1
+            self.stats["items"] += len(items)
+            self._accept(items, cutoff, days)
+            if executor is not None:
+                self._speculate(executor)
+
+        # 统一排序：与 fetch_all 相同的结果（已去重）
+        ranked = self.fetcher.select(self.items, days=days, strict_date_filter=False)
+        if cutoff is not None:
+            print(f"\n日期过滤后: {len(ranked)} 条新闻（最近 {days} 天，去重 {self.stats['duplicates']} 条）")
+
+        if executor is not None:
+            self._settle(executor)
+        return ranked
+
+    def _settle(self, executor: DaemonThreadPool) -> None:
+        """等待最终前 K 条仍在进行的推测翻译，取消其余的"""
+        final_texts = set(self._planned_texts())
+        needed = [future for text, future in self._speculative.items() if text in final_texts]
+        for text, future in self._speculative.items():
+            if text not in final_texts:
+                future.cancel()
+        timeout = None
+        if self.budget is not None:
+            timeout = self.budget.remaining()
+        wait(needed, timeout=timeout)
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.stats["reused"] = sum(1 for future in needed if future.done())
+        print(f"推测翻译 {self.stats['speculated']} 段，最终复用 {self.stats['reused']} 段")
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+本地查询服务 - 常驻内存的新闻索引，供多个 agent 按需查询
+特点：各新闻源的条目和翻译缓存常驻内存，ttl 内的 search/category/days 查询直接在内存中完成；
+同一新闻源的并发请求合并为一次上游获取（single-flight），多个 agent 同时查询不会重复下载。
+监听 TCP（127.0.0.1:8765）或 Unix socket（unix:/path/to.sock）；
+fetch_ai_news.py 加 --service 即作为瘦客户端，参数不变，服务不可用时回退为本地运行。
+
+用法：
+    python scripts/query_service.py serve --listen 127.0.0.1:8765 --ttl 600
+    python scripts/query_service.py serve --listen unix:/tmp/ai-news.sock
+    python scripts/fetch_ai_news.py --service 127.0.0.1:8765 --days 2 --search OpenAI --translate
+    AI_NEWS_SERVICE=unix:/tmp/ai-news.sock python scripts/fetch_ai_news.py --categories research
+    python scripts/query_service.py stats --service 127.0.0.1:8765
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fetch_ai_news import (CACHE_DIR, DEFAULT_SOURCES, TRANSLATOR_AVAILABLE, NewsFetcher, NewsFormatter,
+                           NewsTranslator, resolve_days)
+
+
+DEFAULT_LISTEN = "127.0.0.1:8765"
+
+# 客户端转发给服务的 fetch_ai_news.py 参数
+FORWARDED_ARGS = ["date", "days", "categories", "search", "output", "format", "topics", "sources",
+                  "max_items", "translate", "translate_fields", "no_date_filter", "trends"]
+# 需要本地执行的参数：带上其中任何一个时客户端不走服务
+LOCAL_ONLY_ARGS = ["from_state", "record", "replay", "enrich", "overlap", "budget", "deadline", "run_cache",
+                   "save_items", "registry"]
+
+_CONTENT_TYPES = {"json": "application/json", "jsonl": "application/x-ndjson"}
+
+
+def _copy_item(item: Dict) -> Dict:
+    """查询用的条目副本：翻译会改写的嵌套字典（_analysis、i18n）也复制，不影响常驻索引"""
+    copy = dict(item)
+    if "_analysis" in item:
+        copy["_analysis"] = dict(item["_analysis"], cjk=dict(item["_analysis"]["cjk"]))
+    if "i18n" in item:
+        copy["i18n"] = {language: dict(texts) for language, texts in item["i18n"].items()}
+    return copy
+
+
+class SingleFlight:
+    """同一键同时只有一个任务在执行，并发的调用者拿到同一个 Future 共享结果（或异常）"""
+
+    def __init__(self, executor: ThreadPoolExecutor):
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.stats = {"executed": 0, "shared": 0}
+
+    def submit(self, key: str, fn: Callable[[], object]) -> Future:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats["shared"] += 1
+                return future
+            future = self._calls[key] = self.executor.submit(fn)
+            self.stats["executed"] += 1
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+
+class QueryService:
+    """按新闻源缓存条目的内存索引；过期的源在下一次查询时刷新"""
+
+    def __init__(self, registry=None, cache_dir: str = CACHE_DIR, ttl: float = 600, max_workers: int = 8,
+                 translator: Optional[NewsTranslator] = None):
+        self.registry = registry
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        # 只用于下载和解析，条目筛选在每次查询的独立 NewsFetcher 上进行
+        self.fetcher = NewsFetcher(registry=registry)
+        self.translator = translator
+        self.flight = SingleFlight(ThreadPoolExecutor(max_workers=max_workers))
+        self._index: Dict[str, Tuple[float, List[Dict]]] = {}
+        self._trends = None
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "hits": 0, "refreshes": 0}
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def _fresh(self, source_key: str) -> Optional[List[Dict]]:
+        entry = self._index.get(source_key)
+        if entry and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def source_items(self, source_key: str) -> Future:
+        """某个新闻源的条目：内存中未过期则直接返回，否则与并发请求合并为一次刷新"""
+        items = self._fresh(source_key)
+        if items is not None:
+            self._count("hits")
+            future = Future()
+            future.set_result(items)
+            return future
+        return self.flight.submit(source_key, lambda: self._refresh(source_key))
+
+    def _refresh(self, source_key: str) -> List[Dict]:
+        # 排队期间可能已被上一轮刷新
+        items = self._fresh(source_key)
+        if items is not None:
+            return items
+        self._count("refreshes")
+        items = self.fetcher.fetch_rss(source_key)
+        previous = self._index.get(source_key)
+        if not items and previous:
+            # 上游失败时继续提供旧数据，等下一个 ttl 再试
+            self._index[source_key] = (time.time(), previous[1])
+            return previous[1]
+        self._index[source_key] = (time.time(), items)
+        return items
+
+    def query(self, params: Dict[str, str]) -> str:
+        """按 fetch_ai_news.py 的参数语义筛选、翻译并格式化，返回报告正文"""
+        self._count("queries")
+        flag = lambda name: params.get(name, "").lower() in ("1", "true", "yes")
+        days = resolve_days(params.get("date", "today"), int(params.get("days", 1)))
+        max_items = int(params.get("max_items", 15))
+        output = params.get("output", "markdown")
+        format_type = params.get("format", "newsletter")
+
+        if params.get("sources"):
+            sources = self.registry.select(params["sources"]) if self.registry else params["sources"].split(",")
+        else:
+            sources = list(DEFAULT_SOURCES)
+        fetcher = NewsFetcher(sources=sources, registry=self.registry)
+        keys = [key for key in fetcher.sources if fetcher._source(key)]
+
+        # 条目会被日期过滤和翻译改写，每次查询使用副本
+        futures = [self.source_items(key) for key in keys]
+        all_news = [_copy_item(item) for future in futures for item in future.result()]
+        news = fetcher.select(all_news, days=days, strict_date_filter=not flag("no_date_filter"))
+
+        trending = None
+        if flag("trends"):
+            trending = self._trend_store().trending(days=7)
+
+        if params.get("categories"):
+            news = fetcher.filter_by_category(params["categories"].split(","))
+        if params.get("search"):
+            news = fetcher.search(params["search"])
+
+        if format_type == "topics":
+            from topic_cluster import cluster_items
+            topics = int(params["topics"]) if params.get("topics") else None
+            news = cluster_items(news, max_items=max_items, k=topics)
+        else:
+            news = news[:max_items]
+
+        if flag("translate") and self.translator is not None and news:
+            fields = params.get("translate_fields", "title,summary").split(",")
+            news = self.translator.translate_items(news, fields=fields, max_items=max_items,
+                                                   limits=NewsFormatter.rendered_chars([(output, format_type)]))
+
+        return "".join(NewsFormatter(news, trending=trending).iter_chunks(output, format_type))
+
+    def _trend_store(self):
+        if self._trends is None:
+            from trends import TrendStore
+            self._trends = TrendStore(os.path.join(self.cache_dir, "trends"))
+        # 计入内存中的全部条目（重复计入会被去重）
+        self._trends.ingest(item for _, items in list(self._index.values()) for item in items)
+        return self._trends
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        return {
+            **self.stats,
+            "fetches": self.flight.stats,
+            "translations_cached": len(self.translator._cache) if self.translator else 0,
+            "sources": {key: {"items": len(items), "age": round(now - fetched_at, 1)}
+                        for key, (fetched_at, items) in sorted(list(self._index.items()))},
+        }
+
+
+# ============================================
+# HTTP / Unix socket 服务端
+# ============================================
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _make_handler(service: QueryService):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: str, content_type: str = "text/plain") -> None:
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            params = dict(urllib.parse.parse_qsl(url.query))
+            if url.path == "/health":
+                self._send(200, "ok")
+            elif url.path == "/stats":
+                self._send(200, json.dumps(service.snapshot(), ensure_ascii=False, indent=2), "application/json")
+            elif url.path == "/news":
+                try:
+                    body = service.query(params)
+                except (ValueError, KeyError) as e:
+                    self._send(400, f"参数错误：{e}")
+                    return
+                self._send(200, body, _CONTENT_TYPES.get(params.get("output"), "text/plain"))
+            else:
+                self._send(404, "not found")
+
+        def address_string(self):
+            # Unix socket 没有客户端地址
+            return self.client_address[0] if self.client_address else "unix"
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+def make_server(service: QueryService, listen: str = DEFAULT_LISTEN):
+    """listen 为 HOST:PORT 或 unix:PATH"""
+    handler = _make_handler(service)
+    if listen.startswith("unix:"):
+        path = listen[len("unix:"):]
+        if os.path.exists(path):
+            os.unlink(path)
+        return ThreadingUnixHTTPServer(path, handler)
+    host, _, port = listen.rpartition(":")
+    return ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+
+
+# ============================================
+# 客户端
+# ============================================
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+def _connection(address: str, timeout: float) -> http.client.HTTPConnection:
+    if address.startswith("unix:"):
+        return _UnixHTTPConnection(address[len("unix:"):], timeout)
+    parsed = urllib.parse.urlparse(address if "://" in address else f"http://{address}")
+    return http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+
+
+def request(address: str, path: str, params: Optional[Dict] = None, timeout: float = 300) -> str:
+    """向查询服务发 GET 请求，返回响应正文；连接失败抛 OSError，非 200 抛 RuntimeError"""
+    conn = _connection(address, timeout)
+    try:
+        query = urllib.parse.urlencode({k: v for k, v in (params or {}).items() if v is not None})
+        conn.request("GET", f"{path}?{query}" if query else path)
+        resp = conn.getresponse()
+        body = resp.read().decode("utf-8")
+    finally:
+        conn.close()
+    if resp.status != 200:
+        raise RuntimeError(f"查询服务返回 {resp.status}：{body}")
+    return body
+
+
+def query_params(args) -> Optional[Dict[str, str]]:
+    """把 fetch_ai_news.py 的参数转成查询参数；带有需本地执行的参数时返回 None"""
+    if any(getattr(args, name, None) for name in LOCAL_ONLY_ARGS):
+        return None
+    params = {}
+    for name in FORWARDED_ARGS:
+        value = getattr(args, name, None)
+        if value is True:
+            params[name] = "1"
+        elif value not in (None, False, ""):
+            params[name] = str(value)
+    return params
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI 新闻本地查询服务")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="启动查询服务")
+    serve.add_argument("--listen", default=DEFAULT_LISTEN, help="HOST:PORT 或 unix:PATH")
+    serve.add_argument("--ttl", type=float, default=600, help="新闻源条目在内存中的有效期（秒）")
+    serve.add_argument("--workers", type=int, default=8, help="并发获取新闻源的线程数")
+    serve.add_argument("--registry", action="append", default=[], help="外部新闻源注册表，可重复")
+    serve.add_argument("--cache-dir", default=CACHE_DIR, help="本地缓存目录")
+    serve.add_argument("--translator", default="bing", help="翻译引擎")
+
+    stats = sub.add_parser("stats", help="查看服务状态")
+    stats.add_argument("--service", default=os.environ.get("AI_NEWS_SERVICE", DEFAULT_LISTEN))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == "stats":
+        print(request(args.service, "/stats", timeout=10))
+        return
+
+    from source_registry import SourceRegistry
+    registry_paths = args.registry or [p for p in os.environ.get("AI_NEWS_REGISTRY", "").split(os.pathsep) if p]
+    registry = SourceRegistry(registry_paths, cache_dir=os.path.join(args.cache_dir, "registry"))
+    translator = NewsTranslator(args.translator) if TRANSLATOR_AVAILABLE else None
+    if translator is None:
+        print("警告：未安装 translators 库，翻译请求将返回原文")
+
+    service = QueryService(registry=registry, cache_dir=args.cache_dir, ttl=args.ttl,
+                           max_workers=args.workers, translator=translator)
+    server = make_server(service, args.listen)
+    print(f"查询服务已启动：{args.listen}（条目有效期 {args.ttl:.0f} 秒）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.listen.startswith("unix:"):
+            os.unlink(args.listen[len("unix:"):])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+录制/回放 - 离线运行完整流水线
+--record DIR 保存原始 RSS 响应、翻译结果和 SMTP 投递记录；
+--replay DIR 基于录制内容离线跑 获取 → 翻译 → 格式化 → 发信，可注入延迟。
+
+目录结构：
+    DIR/manifest.json        录制时间与各新闻源信息
+    DIR/feeds/<source>.xml   原始 RSS 响应
+    DIR/translations.json    原文 → 译文
+    DIR/smtp.jsonl           每封邮件一行投递记录
+    DIR/smtp/<n>.eml         完整邮件内容
+"""
+
+import json
+import os
+import smtplib
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+TAPE_KINDS = ("feed", "translate", "smtp")
+
+
+def parse_latency(spec: Optional[str]) -> Dict[str, float]:
+    """解析延迟配置：'0.2' 作用于全部环节，或 'feed=0.3,translate=0.05'"""
+    latency = {kind: 0.0 for kind in TAPE_KINDS}
+    if not spec:
+        return latency
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" in part:
+            kind, value = part.split("=", 1)
+            kind = kind.strip()
+            if kind not in latency:
+                raise ValueError(f"未知的延迟类型：{kind}（可选 {', '.join(TAPE_KINDS)}）")
+            latency[kind] = float(value)
+        else:
+            latency = {kind: float(part) for kind in TAPE_KINDS}
+    return latency
+
+
+class Tape:
+    """录制或回放一次流水线运行"""
+
+    def __init__(self, directory: str, mode: str = "replay", latency: Optional[Dict[str, float]] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"未知模式：{mode}")
+        self.directory = directory
+        self.mode = mode
+        self.latency = latency or {kind: 0.0 for kind in TAPE_KINDS}
+        self.sent: List[Dict] = []
+        self._manifest_path = os.path.join(directory, "manifest.json")
+        self._translations_path = os.path.join(directory, "translations.json")
+
+        if mode == "record":
+            os.makedirs(os.path.join(directory, "feeds"), exist_ok=True)
+            self.manifest = self._load_json(self._manifest_path) or {"sources": {}}
+            self.manifest["recorded_at"] = datetime.now().isoformat()
+        else:
+            self.manifest = self._load_json(self._manifest_path)
+            if self.manifest is None:
+                raise FileNotFoundError(f"未找到录制文件：{self._manifest_path}")
+        self.translations: Dict[str, str] = self._load_json(self._translations_path) or {}
+
+    @staticmethod
+    def _load_json(path: str):
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _delay(self, kind: str) -> None:
+        seconds = self.latency.get(kind, 0.0)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    @property
+    def recorded_at(self) -> Optional[datetime]:
+        """录制时刻，回放时作为日期过滤的“当前时间”"""
+        value = self.manifest.get("recorded_at")
+        return datetime.fromisoformat(value) if value else None
+
+    def feed(self, source_key: str, url: str, fetch: Callable[[], str]) -> str:
+        """获取 RSS 原文：录制时调用 fetch 并保存，回放时读取文件"""
+        path = os.path.join(self.directory, "feeds", f"{source_key}.xml")
+        if self.mode == "replay":
+            self._delay("feed")
+            if source_key not in self.manifest.get("sources", {}) or not os.path.exists(path):
+                raise FileNotFoundError(f"录制中没有新闻源：{source_key}")
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+
+        text = fetch()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.manifest["sources"][source_key] = {
+            "url": url,
+            "file": f"feeds/{source_key}.xml",
+            "bytes": len(text.encode("utf-8")),
+        }
+        return text
+
+    def translation(self, text: str, translate: Callable[[str], str], key: Optional[str] = None) -> str:
+        """获取译文：录制时调用 translate 并保存，回放时查表（缺失则返回原文）；
+        key 默认为原文，译成中文以外的语言时带上目标语言"""
+        key = key or text
+        if self.mode == "replay":
+            self._delay("translate")
+            return self.translations.get(key, text)
+
+        result = translate(text)
+        self.translations[key] = result
+        return result
+
+    def smtp_class(self):
+        """返回可替代 smtplib.SMTP 的类"""
+        tape = self
+
+        if self.mode == "record":
+            class RecordingSMTP(smtplib.SMTP):
+                def send_message(self, msg, *args, **kwargs):
+                    tape._record_message(msg)
+                    return super().send_message(msg, *args, **kwargs)
+            return RecordingSMTP
+
+        class ReplaySMTP:
+            """离线 SMTP：不连接网络，只记录投递内容"""
+
+            def __init__(self, host: str = "", port: int = 0, *args, **kwargs):
+                self.host = host
+                self.port = port
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def starttls(self, *args, **kwargs):
+                return (220, b"ready")
+
+            def login(self, user, password):
+                return (235, b"ok")
+
+            def send_message(self, msg, *args, **kwargs):
+                tape._delay("smtp")
+                tape.sent.append({
+                    "to": msg["To"],
+                    "subject": msg["Subject"],
+                    "bytes": len(msg.as_bytes()),
+                })
+                return {}
+
+            def quit(self):
+                return (221, b"bye")
+
+        return ReplaySMTP
+
+    def _record_message(self, msg) -> None:
+        smtp_dir = os.path.join(self.directory, "smtp")
+        os.makedirs(smtp_dir, exist_ok=True)
+        index = len(os.listdir(smtp_dir)) + 1
+        raw = msg.as_bytes()
+        filename = f"smtp/{index:04d}.eml"
+        with open(os.path.join(self.directory, filename), "wb") as f:
+            f.write(raw)
+        with open(os.path.join(self.directory, "smtp.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "sent_at": datetime.now().isoformat(),
+                "from": msg["From"],
+                "to": msg["To"],
+                "subject": msg["Subject"],
+                "bytes": len(raw),
+                "file": filename,
+            }, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        """录制模式下写出 manifest 和翻译表"""
+        if self.mode != "record":
+            return
+        with open(self._manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        with open(self._translations_path, "w", encoding="utf-8") as f:
+            json.dump(self.translations, f, indent=2, ensure_ascii=False)
+
+
+def open_tape(record_dir: Optional[str] = None, replay_dir: Optional[str] = None,
+              latency: Optional[str] = None) -> Optional[Tape]:
+    """根据命令行参数创建 Tape（都未指定时返回 None）"""
+    if record_dir and replay_dir:
+        raise ValueError("--record 与 --replay 不能同时使用")
+    if record_dir:
+        return Tape(record_dir, mode="record")
+    if replay_dir:
+        return Tape(replay_dir, mode="replay", latency=parse_latency(latency))
+    return None
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+运行预算 - 为整次运行和各阶段设定截止时间，超时即降级而不是阻塞
+例如：跳过未响应的新闻源（改用上次运行的缓存）、摘要保留原文只翻译标题、跳过全文补全。
+所有降级都记入运行报告（--run-report），并在邮件中以一行小字提示。
+
+用法：
+    python scripts/fetch_ai_news.py --budget 600 --run-report reports/run.json ...
+    python scripts/fetch_ai_news.py --deadline 19:55 --stage-budget fetch=120,translate=240 ...
+    python scripts/send_email.py --to you@qq.com --file reports/today.md --run-report reports/run.json
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+
+# 未单独指定时，各阶段按剩余预算的比例分配
+STAGE_SHARES = {
+    "fetch": 0.4,
+    "enrich": 0.3,
+    "translate": 0.8,
+}
+
+
+def parse_deadline(spec: str, now: Optional[datetime] = None) -> float:
+    """把 'HH:MM' 换算为距现在的秒数；已过则视为次日"""
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in spec.split(":", 1))
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+def parse_stage_budget(spec: Optional[str]) -> Dict[str, float]:
+    """解析 'fetch=120,translate=240'（秒）"""
+    budgets: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        stage, _, value = part.partition("=")
+        stage = stage.strip()
+        if stage not in STAGE_SHARES:
+            raise ValueError(f"未知阶段：{stage}（可选 {', '.join(STAGE_SHARES)}）")
+        budgets[stage] = float(value)
+    return budgets
+
+
+class Stage:
+    """单个阶段的截止时间"""
+
+    def __init__(self, name: str, deadline: float, clock: Callable[[], float]):
+        self.name = name
+        self.deadline = deadline
+        self.clock = clock
+        self.started = clock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - self.clock())
+
+    def expired(self) -> bool:
+        return self.clock() >= self.deadline
+
+
+class DaemonThreadPool:
+    """用法同 ThreadPoolExecutor，但工作线程是守护线程
+
+    ThreadPoolExecutor 的线程在解释器退出时会被 join：超时后放弃等待的请求（如卡住的翻译调用）
+    仍会拖住进程退出。限时阶段改用本类，放弃的调用随进程退出一并结束。
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(1, max_workers)
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("线程池已关闭")
+            self._jobs.put((future, fn, args, kwargs))
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._worker, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def _worker(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is not None:
+                        job[0].cancel()
+            for _ in self._threads:
+                self._jobs.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class RunBudget:
+    """整次运行的时间预算，按阶段发放截止时间并记录降级"""
+
+    def __init__(self, total_seconds: float, stage_budgets: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.total_seconds = total_seconds
+        self.started_at = datetime.now()
+        self.run_deadline = clock() + total_seconds
+        self.stage_budgets = stage_budgets or {}
+        self.stages: Dict[str, Dict] = {}
+        self.degradations: List[Dict] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.run_deadline - self.clock())
+
+    def stage(self, name: str) -> Stage:
+        """开始一个阶段：截止时间取阶段预算与整次运行截止时间的较早者"""
+        now = self.clock()
+        seconds = self.stage_budgets.get(name, self.remaining() * STAGE_SHARES.get(name, 1.0))
+        stage = Stage(name, min(now + seconds, self.run_deadline), self.clock)
+        self.stages[name] = {"budget": round(stage.deadline - now, 3)}
+        return stage
+
+    def finish(self, stage: Stage) -> None:
+        record = self.stages[stage.name]
+        record["elapsed"] = round(self.clock() - stage.started, 3)
+        record["timed_out"] = stage.expired()
+
+    def record(self, stage: str, **values) -> None:
+        """在运行报告中附加某阶段的统计（如翻译字符量）"""
+        self.stages.setdefault(stage, {}).update(values)
+
+    def degrade(self, stage: str, action: str, detail: str) -> None:
+        """记录一次降级；detail 为给读者看的说明"""
+        self.degradations.append({"stage": stage, "action": action, "detail": detail})
+        print(f"  ⏱ 降级（{stage}）：{detail}")
+
+    def notes(self) -> List[str]:
+        return [d["detail"] for d in self.degradations]
+
+    def report(self) -> Dict:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "budget_seconds": self.total_seconds,
+            "stages": self.stages,
+            "degradations": self.degradations,
+        }
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def load_notes(path: Optional[str]) -> List[str]:
+    """读取运行报告中的降级说明，供邮件展示；文件不存在时返回空列表"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return [d["detail"] for d in report.get("degradations", [])]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+运行缓存 - 以输入内容哈希为键缓存流水线各阶段的产出
+重复运行（如 SMTP 失败后重试、第二台 cron 主机）时输入不变，直接复用上次结果：
+
+    feed       新闻源 URL → RSS 原文（按 --run-cache-ttl 过期，过期后重新下载）
+    parse      RSS 原文哈希 + 源配置 → 新闻条目
+    translate  条目内容哈希 + 翻译字段/引擎/条数 → 译后条目
+    format     译后条目哈希 + 输出类型/格式/模板版本 → 报告正文
+
+任一输入变化只会使它下游的阶段失效：改 --format 只重新格式化，某个源有新文章只重新解析该源及其下游。
+
+用法：
+    python scripts/fetch_ai_news.py --translate --run-cache --save-to reports/today.md
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+# 缓存格式变化时递增，使旧缓存失效
+CACHE_VERSION = 1
+
+
+def _json_default(obj):
+    # 与 NewsFormatter 的 JSON 输出一致：datetime 转为 isoformat
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def digest(*parts) -> str:
+    """对任意可 JSON 序列化的输入求内容哈希"""
+    payload = json.dumps([CACHE_VERSION, *parts], ensure_ascii=False, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunCache:
+    """按阶段分目录的内容寻址缓存：DIR/<stage>/<key 前两位>/<key>.json"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage, key[:2], f"{key}.json")
+
+    def _count(self, stage: str, outcome: str) -> None:
+        with self._lock:
+            counts = self.stats.setdefault(stage, {"hit": 0, "miss": 0})
+            counts[outcome] += 1
+
+    def get(self, stage: str, key: str, max_age: Optional[float] = None):
+        path = self._path(stage, key)
+        try:
+            if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, stage: str, key: str, value) -> None:
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stage": stage, "value": value}, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp_path, path)
+
+    def memo(self, stage: str, key: str, compute: Callable[[], object], max_age: Optional[float] = None,
+             store: Callable[[object], bool] = lambda value: True):
+        """命中则返回缓存，否则计算并写入；store 返回 False 时不写入（如降级产出）"""
+        value = self.get(stage, key, max_age)
+        if value is not None:
+            self._count(stage, "hit")
+            return value
+        self._count(stage, "miss")
+        value = compute()
+        if store(value):
+            self.put(stage, key, value)
+        # 统一经过一次 JSON 往返，命中与未命中时下游拿到的数据完全一致
+        return json.loads(json.dumps(value, ensure_ascii=False, default=_json_default))
+
+    def summary(self) -> str:
+        return "，".join(f"{stage} 命中 {c['hit']}/{c['hit'] + c['miss']}" for stage, c in self.stats.items())
@@ -50,7 +50,7 @@ class EmailSender:
     
     def __init__(self, smtp_server: str = None, smtp_port: int = None, 
                  username: str = None, password: str = None,
-                 email_type: str = 'qq'):
+                 email_type: str = 'qq', smtp_class=None):
         """
         初始化邮件发送器
         
@@ -60,9 +60,11 @@ class EmailSender:
             username: 邮箱账号
             password: 邮箱密码/授权码
             email_type: 邮箱类型 (qq/163/gmail/outlook)
+            smtp_class: SMTP 客户端类，默认 smtplib.SMTP（录制/回放时替换）
         """
         self.username = username or os.environ.get('EMAIL_USER')
         self.password = password or os.environ.get('EMAIL_PASSWORD')
+        self.smtp_class = smtp_class or smtplib.SMTP
         
         # 自动检测邮箱类型
         if not smtp_server and self.username:
@@ -134,7 +136,7 @@ class EmailSender:
                 msg.attach(attachment)
             
             # 连接 SMTP 服务器并发送
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+            with self.smtp_class(self.smtp_server, self.smtp_port) as server:
                 if self.use_tls:
                     server.starttls()
                 server.login(self.username, self.password)
@@ -242,80 +244,82 @@ def parse_news_items(content: str) -> list:
     return items
 
 
+# 标题分类规则：按顺序取第一个命中的分类（入库时由 text_analysis.py 预先算好，存于 item["label"]）
+CATEGORY_RULES = [
+    ('release', ['发布', 'launch', 'release', '新品', '推出']),
+    ('research', ['研究', 'paper', 'research', '论文', '学术']),
+    ('funding', ['融资', 'funding', '投资', 'million', 'billion']),
+    ('policy', ['政策', 'regulation', '法律', '监管', 'policy']),
+    ('safety', ['安全', 'safety', 'security', '隐私']),
+    ('application', ['应用', '应用案例', '案例', 'case', 'partner']),
+]
+
+CATEGORY_STYLES = {
+    'release': ('🚀', '产品发布', '#e74c3c'),
+    'research': ('📚', '学术研究', '#3498db'),
+    'funding': ('💰', '投融资', '#27ae60'),
+    'policy': ('⚖️', '政策法规', '#9b59b6'),
+    'safety': ('🔒', '安全隐私', '#f39c12'),
+    'application': ('💼', '商业应用', '#1abc9c'),
+    'general': ('🤖', 'AI 动态', '#34495e'),
+}
+
+
+def get_category_label(title: str) -> str:
+    """根据标题内容返回分类（CATEGORY_RULES 的键，未命中为 general）"""
+    title_lower = title.lower()
+    for label, keywords in CATEGORY_RULES:
+        if any(kw in title_lower for kw in keywords):
+            return label
+    return 'general'
+
+
 def get_category_icon(title: str) -> str:
     """根据标题内容返回分类图标"""
-    title_lower = title.lower()
-    if any(kw in title_lower for kw in ['发布', 'launch', 'release', '新品', '推出']):
-        return ('🚀', '产品发布', '#e74c3c')
-    elif any(kw in title_lower for kw in ['研究', 'paper', 'research', '论文', '学术']):
-        return ('📚', '学术研究', '#3498db')
-    elif any(kw in title_lower for kw in ['融资', 'funding', '投资', 'million', 'billion']):
-        return ('💰', '投融资', '#27ae60')
-    elif any(kw in title_lower for kw in ['政策', 'regulation', '法律', '监管', 'policy']):
-        return ('⚖️', '政策法规', '#9b59b6')
-    elif any(kw in title_lower for kw in ['安全', 'safety', 'security', '隐私']):
-        return ('🔒', '安全隐私', '#f39c12')
-    elif any(kw in title_lower for kw in ['应用', '应用案例', '案例', 'case', 'partner']):
-        return ('💼', '商业应用', '#1abc9c')
-    else:
-        return ('🤖', 'AI 动态', '#34495e')
+    return CATEGORY_STYLES[get_category_label(title)]
+
 
+# 公司颜色映射（热门公司）
+COMPANY_COLORS = {
+    'OpenAI': '#10a37f',
+    'Google': '#4285f4',
+    'Anthropic': '#cc785c',
+    'Meta': '#0668e1',
+    'Microsoft': '#00a4ef',
+    'NVIDIA': '#76b900',
+    '阿里巴巴': '#ff6a00',
+    '字节跳动': '#1f76ff',
+    '百度': '#2932e1',
+    '腾讯': '#0052d9',
+    '华为': '#cf0a2c',
+    '智谱 AI': '#2c5aa0',
+    '月之暗面': '#000000',
+}
 
-def generate_professional_html(news_items: list, date_str: str) -> str:
-    """生成专业的新闻邮件 HTML 模板"""
+
+def render_news_item_html(item: dict) -> str:
+    """渲染单条新闻的 HTML 片段（与序号无关，可缓存复用）"""
+    # 入库时已分析过的条目直接读取分类；从 Markdown 解析的条目按标题现算
+    label = item.get('label')
+    icon, category, color = CATEGORY_STYLES[label] if label in CATEGORY_STYLES else get_category_icon(item['title'])
+    url = item.get('url') or item.get('link', '')
+    summary = item['summary'][:200] + '...' if len(item['summary']) > 200 else item['summary']
     
-    # 分类颜色映射
-    category_colors = {
-        '产品发布': '#e74c3c',
-        '学术研究': '#3498db',
-        '投融资': '#27ae60',
-        '政策法规': '#9b59b6',
-        '安全隐私': '#f39c12',
-        '商业应用': '#1abc9c',
-        'AI 动态': '#34495e'
-    }
+    # 构建来源和公司标签
+    meta_tags = []
     
-    # 公司颜色映射（热门公司）
-    company_colors = {
-        'OpenAI': '#10a37f',
-        'Google': '#4285f4',
-        'Anthropic': '#cc785c',
-        'Meta': '#0668e1',
-        'Microsoft': '#00a4ef',
-        'NVIDIA': '#76b900',
-        '阿里巴巴': '#ff6a00',
-        '字节跳动': '#1f76ff',
-        '百度': '#2932e1',
-        '腾讯': '#0052d9',
-        '华为': '#cf0a2c',
-        '智谱 AI': '#2c5aa0',
-        '月之暗面': '#000000',
-    }
+    # 来源标签
+    if item.get('source'):
+        meta_tags.append(f'<span style="background-color: #f0f0f0; padding: 2px 8px; border-radius: 10px; font-size: 11px; color: #666; margin-right: 8px;">📰 {item["source"]}</span>')
     
-    def get_company_color(company: str) -> str:
-        return company_colors.get(company, '#6c757d')
+    # 公司标签
+    for company in item.get('companies', [])[:3]:  # 最多显示3个
+        company_color = COMPANY_COLORS.get(company, '#6c757d')
+        meta_tags.append(f'<span style="background-color: {company_color}15; padding: 2px 8px; border-radius: 10px; font-size: 11px; color: {company_color}; margin-right: 8px;">🏢 {company}</span>')
     
-    # 生成新闻条目 HTML
-    news_html = []
-    for i, item in enumerate(news_items, 1):
-        icon, category, color = get_category_icon(item['title'])
-        summary = item['summary'][:200] + '...' if len(item['summary']) > 200 else item['summary']
-        
-        # 构建来源和公司标签
-        meta_tags = []
-        
-        # 来源标签
-        if item.get('source'):
-            meta_tags.append(f'<span style="background-color: #f0f0f0; padding: 2px 8px; border-radius: 10px; font-size: 11px; color: #666; margin-right: 8px;">📰 {item["source"]}</span>')
-        
-        # 公司标签
-        for company in item.get('companies', [])[:3]:  # 最多显示3个
-            company_color = get_company_color(company)
-            meta_tags.append(f'<span style="background-color: {company_color}15; padding: 2px 8px; border-radius: 10px; font-size: 11px; color: {company_color}; margin-right: 8px;">🏢 {company}</span>')
-        
-        meta_html = ''.join(meta_tags) if meta_tags else ''
-        
-        news_html.append(f'''
+    meta_html = ''.join(meta_tags) if meta_tags else ''
+    
+    return f'''
         <tr>
             <td style="padding: 0 30px 25px 30px;">
                 <table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%">
@@ -332,7 +336,7 @@ def generate_professional_html(news_items: list, date_str: str) -> str:
                             
                             <!-- 标题 -->
                             <h2 style="margin: 12px 0 8px 0; font-size: 18px; line-height: 1.4; color: #1a1a1a; font-weight: 600;">
-                                <a href="{item['url']}" target="_blank" style="color: #1a1a1a; text-decoration: none;">{item['title']}</a>
+                                <a href="{url}" target="_blank" style="color: #1a1a1a; text-decoration: none;">{item['title']}</a>
                             </h2>
                             
                             <!-- 摘要 -->
@@ -346,7 +350,7 @@ def generate_professional_html(news_items: list, date_str: str) -> str:
                             </p>
                             
                             <!-- 阅读更多 -->
-                            <a href="{item['url']}" target="_blank" style="display: inline-block; font-size: 13px; color: {color}; text-decoration: none; font-weight: 500;">
+                            <a href="{url}" target="_blank" style="display: inline-block; font-size: 13px; color: {color}; text-decoration: none; font-weight: 500;">
                                 阅读全文 →
                             </a>
                         </td>
@@ -354,9 +358,35 @@ def generate_professional_html(news_items: list, date_str: str) -> str:
                 </table>
             </td>
         </tr>
-        ''')
-    
-    news_list = '\n'.join(news_html)
+        '''
+
+
+def render_notes_html(notes: list) -> str:
+    """运行降级说明（见 run_budget.py），以一行浅色小字放在导语之后"""
+    if not notes:
+        return ''
+    return f'''<tr>
+                        <td style="padding: 0 30px 20px 30px;">
+                            <p style="margin: 0; font-size: 12px; line-height: 1.6; color: #aaa;">
+                                ⏱ 为准时送达，本期有所简化：{'；'.join(notes)}
+                            </p>
+                        </td>
+                    </tr>
+                    '''
+
+
+def generate_professional_html(news_items: list, date_str: str, item_fragments: list = None,
+                               notes: list = None) -> str:
+    """生成专业的新闻邮件 HTML 模板
+
+    item_fragments: 预先渲染好的条目片段（见 render_news_item_html），
+    个性化摘要中多位收件人共享同一批片段时传入，避免重复渲染。
+    notes: 运行降级说明，为空时不显示。
+    """
+    if item_fragments is None:
+        item_fragments = [render_news_item_html(item) for item in news_items]
+    news_list = '\n'.join(item_fragments)
+    notes_html = render_notes_html(notes)
     
     # 完整的 HTML 模板
     html = f'''<!DOCTYPE html>
@@ -432,7 +462,7 @@ def generate_professional_html(news_items: list, date_str: str) -> str:
                         </td>
                     </tr>
                     
-                    <!-- 新闻列表 -->
+                    {notes_html}<!-- 新闻列表 -->
                     {news_list}
                     
                     <!-- 分隔线 -->
@@ -498,7 +528,7 @@ def generate_professional_html(news_items: list, date_str: str) -> str:
     return html
 
 
-def markdown_to_html(markdown_content: str) -> str:
+def markdown_to_html(markdown_content: str, notes: list = None) -> str:
     """Markdown 转专业 HTML 邮件"""
     date_str = datetime.now().strftime('%Y年%m月%d日')
     
@@ -510,7 +540,7 @@ def markdown_to_html(markdown_content: str) -> str:
         return generate_simple_html(markdown_content, date_str)
     
     # 生成专业模板
-    return generate_professional_html(news_items, date_str)
+    return generate_professional_html(news_items, date_str, notes=notes)
 
 
 def generate_simple_html(content: str, date_str: str) -> str:
@@ -543,9 +573,19 @@ def main():
     parser.add_argument('--format', choices=['html', 'plain'], default='html', 
                        help='邮件格式')
     parser.add_argument('--attach', action='store_true', help='是否附加原文件')
+    parser.add_argument('--record', metavar='DIR', help='录制 SMTP 投递内容')
+    parser.add_argument('--replay', metavar='DIR', help='离线回放，不连接 SMTP 服务器')
+    parser.add_argument('--replay-latency', help='回放时注入的延迟（秒）')
+    parser.add_argument('--run-report', help='运行报告路径，其中的降级说明会显示在邮件中')
     
     args = parser.parse_args()
     
+    # 录制/回放
+    tape = None
+    if args.record or args.replay:
+        from record_replay import open_tape
+        tape = open_tape(args.record, args.replay, args.replay_latency)
+    
     # 读取新闻内容
     content = read_news_file(args.file)
     if not content:
@@ -557,12 +597,13 @@ def main():
     
     # 转换格式
     if args.format == 'html':
-        email_content = markdown_to_html(content)
+        from run_budget import load_notes
+        email_content = markdown_to_html(content, notes=load_notes(args.run_report))
     else:
         email_content = content
     
     # 发送邮件
-    sender = EmailSender()
+    sender = EmailSender(smtp_class=tape.smtp_class() if tape else None)
     sender.send_email(
         to_email=args.to,
         subject=subject,
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+新闻源注册表 - 从 OPML / JSON / YAML 批量导入新闻源
+特点：支持上千个源，每个源带语言、分类、权重、标签和轮询提示；
+按标签、分类、语言建立索引；首次使用时才加载，解析结果缓存在磁盘，
+注册表增大也不拖慢启动。
+
+用法：
+    python scripts/source_registry.py import feeds.opml --out sources.json --tag imported
+    python scripts/source_registry.py list --registry sources.json --tag chinese
+    python scripts/fetch_ai_news.py --registry sources.json --sources "tag:chinese,openai"
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import pickle
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+
+from fetch_ai_news import CACHE_DIR, CATEGORY_ICONS, SOURCES
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+
+# 缓存格式变化时递增，使旧缓存失效
+CACHE_VERSION = 1
+
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+
+def _slugify(text: str) -> str:
+    return _SLUG_RE.sub("-", text.lower()).strip("-")
+
+
+def normalize_source(key: str, data: Dict) -> Dict:
+    """补全默认字段，统一源的元数据结构"""
+    tags = data.get("tags") or []
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(",")]
+    source = {
+        "name": data.get("name") or key,
+        "url": data["url"],
+        "type": data.get("type", "rss"),
+        "category": data.get("category", "general"),
+        "language": data.get("language", "en"),
+        "weight": float(data.get("weight", 1.0)),
+        "tags": sorted({t.strip().lower() for t in tags if t and t.strip()}),
+    }
+    if data.get("poll"):
+        source["poll"] = dict(data["poll"])
+    if data.get("description"):
+        source["description"] = data["description"]
+    return source
+
+
+def parse_opml(text: str, extra_tags: Iterable[str] = ()) -> Dict[str, Dict]:
+    """解析 OPML：外层文件夹名和 category 属性都作为标签"""
+    root = ET.fromstring(text)
+    body = root.find("body")
+    sources: Dict[str, Dict] = {}
+    if body is None:
+        return sources
+
+    def walk(node, folders: List[str]):
+        for outline in node.findall("outline"):
+            url = outline.get("xmlUrl")
+            title = outline.get("title") or outline.get("text") or ""
+            if not url:
+                walk(outline, folders + ([title] if title else []))
+                continue
+
+            tags = set(t.lower() for t in folders) | set(extra_tags)
+            for cat in (outline.get("category") or "").split(","):
+                tags.update(part.lower() for part in cat.strip().split("/") if part)
+            category = next((t for t in tags if t in CATEGORY_ICONS), "general")
+            language = outline.get("language") or ("zh" if _CJK_RE.search(title) else "en")
+
+            key = _slugify(title) or _slugify(urlparse(url).netloc)
+            base, n = key, 2
+            while key in sources:
+                key, n = f"{base}-{n}", n + 1
+
+            sources[key] = normalize_source(key, {
+                "name": title or url,
+                "url": url,
+                "type": outline.get("type", "rss"),
+                "category": category,
+                "language": language,
+                "tags": sorted(tags),
+                "description": outline.get("description", ""),
+            })
+
+    walk(body, [])
+    return sources
+
+
+def parse_mapping(data) -> Dict[str, Dict]:
+    """解析 JSON/YAML：{"sources": {key: {...}}}、{key: {...}} 或 [{"key": ..., ...}]"""
+    if isinstance(data, dict) and "sources" in data:
+        data = data["sources"]
+    if isinstance(data, list):
+        data = {entry.get("key") or _slugify(entry.get("name", entry["url"])): entry for entry in data}
+    return {key: normalize_source(key, value) for key, value in data.items()}
+
+
+def load_file(path: str, extra_tags: Iterable[str] = ()) -> Dict[str, Dict]:
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if ext in (".opml", ".xml"):
+        return parse_opml(text, extra_tags)
+    if ext in (".yaml", ".yml"):
+        if not YAML_AVAILABLE:
+            raise RuntimeError("读取 YAML 需要安装 pyyaml")
+        sources = parse_mapping(yaml.safe_load(text) or {})
+    else:
+        sources = parse_mapping(json.loads(text))
+    if extra_tags:
+        for source in sources.values():
+            source["tags"] = sorted(set(source["tags"]) | set(extra_tags))
+    return sources
+
+
+class SourceRegistry:
+    """新闻源注册表：内置 SOURCES + 外部文件，首次访问时才加载"""
+
+    def __init__(self, paths: Optional[List[str]] = None, cache_dir: Optional[str] = None,
+                 include_builtin: bool = True):
+        self.paths = [p for p in (paths or []) if p]
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIR, "registry")
+        self.include_builtin = include_builtin
+        self._sources: Optional[Dict[str, Dict]] = None
+        self._index: Dict[str, Dict[str, Set[str]]] = {}
+
+    # ---------- 加载与缓存 ----------
+
+    def _cache_path(self) -> str:
+        fingerprint = [CACHE_VERSION, self.include_builtin]
+        if self.include_builtin:
+            # 内置 SOURCES 改动后旧缓存作废
+            fingerprint.append(hashlib.sha256(json.dumps(SOURCES, sort_keys=True, ensure_ascii=False)
+                                              .encode("utf-8")).hexdigest())
+        for path in self.paths:
+            st = os.stat(path)
+            fingerprint.append((os.path.abspath(path), st.st_mtime_ns, st.st_size))
+        digest = hashlib.sha256(repr(fingerprint).encode("utf-8")).hexdigest()[:24]
+        return os.path.join(self.cache_dir, f"{digest}.pickle")
+
+    def _load(self) -> None:
+        if self._sources is not None:
+            return
+        cache_path = self._cache_path() if self.paths else None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as f:
+                    self._sources, self._index = pickle.load(f)
+                return
+            except Exception:
+                pass
+
+        sources: Dict[str, Dict] = {}
+        if self.include_builtin:
+            for key, data in SOURCES.items():
+                sources[key] = normalize_source(key, data)
+        for path in self.paths:
+            sources.update(load_file(path))
+        self._sources = sources
+        self._index = self._build_index(sources)
+
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump((self._sources, self._index), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+
+    @staticmethod
+    def _build_index(sources: Dict[str, Dict]) -> Dict[str, Dict[str, Set[str]]]:
+        index: Dict[str, Dict[str, Set[str]]] = {"tag": {}, "category": {}, "language": {}}
+        for key, source in sources.items():
+            for tag in source.get("tags", []):
+                index["tag"].setdefault(tag, set()).add(key)
+            index["category"].setdefault(source["category"], set()).add(key)
+            index["language"].setdefault(source["language"], set()).add(key)
+        return index
+
+    # ---------- 查询 ----------
+
+    def __contains__(self, key: str) -> bool:
+        # 只用内置源时不必加载注册表（与 get 一致）
+        if not self.paths and self.include_builtin:
+            return key in SOURCES
+        self._load()
+        return key in self._sources
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._sources)
+
+    def get(self, key: str) -> Optional[Dict]:
+        # 只用内置源时不必加载注册表
+        if not self.paths and self.include_builtin:
+            return SOURCES.get(key)
+        self._load()
+        return self._sources.get(key)
+
+    def keys(self) -> List[str]:
+        self._load()
+        return list(self._sources.keys())
+
+    def by(self, field: str, value: str) -> Set[str]:
+        """按 tag / category / language 查找源"""
+        self._load()
+        return set(self._index.get(field, {}).get(value.lower() if field == "tag" else value, set()))
+
+    def select(self, spec: str) -> List[str]:
+        """解析 --sources：逗号分隔，支持 tag:xx、category:xx、language:xx，未知项给出提示"""
+        selected: List[str] = []
+        seen: Set[str] = set()
+        for token in (t.strip() for t in spec.split(",")):
+            if not token:
+                continue
+            field, sep, value = token.partition(":")
+            if sep and field in ("tag", "category", "language"):
+                matched = sorted(self.by(field, value), key=lambda k: (-self.get(k).get("weight", 1.0), k))
+                if not matched:
+                    print(f"警告：没有匹配 {token} 的新闻源")
+            elif token in self:
+                matched = [token]
+            else:
+                suggestions = difflib.get_close_matches(token, self.keys(), n=3)
+                hint = f"，是否指 {', '.join(suggestions)}？" if suggestions else ""
+                print(f"警告：未知新闻源 {token}{hint}")
+                matched = []
+            for key in matched:
+                if key not in seen:
+                    seen.add(key)
+                    selected.append(key)
+        return selected
+
+
+def save_registry(sources: Dict[str, Dict], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"sources": sources}, f, indent=2, ensure_ascii=False)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="新闻源注册表")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="从 OPML/JSON/YAML 导入并合并到注册表文件")
+    imp.add_argument("files", nargs="+")
+    imp.add_argument("--out", required=True, help="注册表文件（JSON），已存在则合并")
+    imp.add_argument("--tag", action="append", default=[], help="为导入的源附加标签，可重复")
+
+    ls = sub.add_parser("list", help="列出注册表中的源")
+    ls.add_argument("--registry", action="append", default=[], help="注册表文件，可重复")
+    ls.add_argument("--tag")
+    ls.add_argument("--category")
+    ls.add_argument("--language")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "import":
+        merged: Dict[str, Dict] = load_file(args.out) if os.path.exists(args.out) else {}
+        before = len(merged)
+        for path in args.files:
+            merged.update(load_file(path, extra_tags=[t.lower() for t in args.tag]))
+        save_registry(merged, args.out)
+        print(f"已导入 {len(merged) - before} 个新源，注册表共 {len(merged)} 个：{args.out}")
+        return
+
+    registry = SourceRegistry(args.registry)
+    keys = set(registry.keys())
+    for field in ("tag", "category", "language"):
+        value = getattr(args, field)
+        if value:
+            keys &= registry.by(field, value)
+    for key in sorted(keys):
+        source = registry.get(key)
+        print(f"{key:<32} {source['language']:<4} {source['category']:<10} {source['name']}")
+    print(f"\n共 {len(keys)} 个新闻源")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+静态站点 - 把历史日报发布为可在内网浏览的静态网页
+每天一页，另有月份索引、公司索引和浏览器端检索（按月分片的检索索引）。
+
+增量构建：构建清单（manifest.json）记录每天的来源文件状态和内容哈希，
+再次构建时只渲染新增或内容变化的日期，并只重写受影响的月份页、公司页和检索分片；
+其余页面由清单中的摘要信息生成，无需重新读取、解析历史日报。
+来源优先使用条目 JSONL（--save-items），没有时解析 Markdown 日报；
+reports/ 中尚未归档的文件优先，其余从归档（archive.py）读取。归档已删除的日期在站点中保留。
+
+目录结构：
+    SITE/index.html               月份列表
+    SITE/days/YYYY-MM-DD.html     每天一页
+    SITE/months/YYYY-MM.html      月份索引
+    SITE/companies/<名称>.html    公司索引：提及该公司的日期与标题
+    SITE/search.html              检索页
+    SITE/search/YYYY-MM.json      检索分片（按月，浏览器从新到旧加载）
+    SITE/manifest.json            构建清单
+
+用法：
+    python scripts/static_site.py --reports reports --out site
+    python scripts/static_site.py --reports reports --archive archive --out site --full   # 忽略清单全部重建
+    python scripts/benchmark.py site --days 100,1000,3000
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set
+
+from send_email import parse_news_items, render_news_item_html
+
+
+# 页面模板或清单格式变化时递增，旧清单作废、全部重建
+SITE_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+# reports/ 中作为来源的文件：条目 JSONL 与主语言 Markdown 日报
+_SOURCE_RE = re.compile(r'^ai-daily-(\d{8})\.(jsonl|md)$')
+# 同一天有多种来源时的优先顺序
+_KINDS = ("jsonl", "md")
+
+HEADLINES = 3
+SNIPPET_CHARS = 120
+
+
+def _slug(name: str) -> str:
+    """公司页文件名：英文名转小写连字符，其他名称用短哈希"""
+    if name.isascii():
+        slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+        if slug:
+            return slug
+    return "c-" + hashlib.blake2b(name.encode("utf-8"), digest_size=4).hexdigest()
+
+
+def _write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(f"{path}.tmp", path)
+
+
+class DaySource:
+    """某天的日报来源；stamp 为廉价的变化标记（文件大小与修改时间，或归档位置），变化时才读取并计算哈希"""
+
+    def __init__(self, day: str, kind: str, stamp: List, read: Callable[[], bytes]):
+        self.day = day
+        self.kind = kind
+        self.stamp = stamp
+        self._read = read
+        self._data: Optional[bytes] = None
+
+    def data(self) -> bytes:
+        if self._data is None:
+            self._data = self._read()
+        return self._data
+
+    def digest(self) -> str:
+        return hashlib.blake2b(self.data(), digest_size=16).hexdigest()
+
+    def items(self) -> List[Dict]:
+        text = self.data().decode("utf-8")
+        if self.kind == "jsonl":
+            return [json.loads(line) for line in text.splitlines() if line.strip()]
+        items = parse_news_items(text)
+        for item in items:
+            # 元信息行的斜体标记会连在最后一个公司名上
+            item["companies"] = [name.strip(" *") for name in item["companies"]]
+        return items
+
+
+def _read_file(path: str) -> Callable[[], bytes]:
+    def read() -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+    return read
+
+
+def discover(reports_dir: Optional[str] = None, archive_dir: Optional[str] = None) -> Dict[str, DaySource]:
+    """列出每天的来源：reports/ 中的文件优先于归档，JSONL 优先于 Markdown"""
+    sources: Dict[str, DaySource] = {}
+    if archive_dir and os.path.exists(os.path.join(archive_dir, "index.json")):
+        from archive import Archive
+        archive = Archive(archive_dir)
+        for day, kinds in archive.index["days"].items():
+            kind = next((k for k in _KINDS if k in kinds), None)
+            if kind is not None:
+                stamp = ["archive"] + kinds[kind][:3]
+                sources[day] = DaySource(day, kind, stamp,
+                                         lambda d=day, k=kind: archive.read(date.fromisoformat(d), k))
+
+    local: Dict[str, DaySource] = {}
+    for name in sorted(os.listdir(reports_dir)) if reports_dir and os.path.isdir(reports_dir) else []:
+        match = _SOURCE_RE.match(name)
+        if not match:
+            continue
+        raw = match.group(1)
+        day = f"{raw[:4]}-{raw[4:6]}-{raw[6:]}"
+        kind = match.group(2)
+        if day in local and _KINDS.index(local[day].kind) <= _KINDS.index(kind):
+            continue
+        path = os.path.join(reports_dir, name)
+        stat = os.stat(path)
+        local[day] = DaySource(day, kind, ["file", name, stat.st_size, stat.st_mtime_ns], _read_file(path))
+    sources.update(local)
+    return sources
+
+
+# ---------- 页面 ----------
+
+_STYLE = """body{margin:0;background:#f5f5f5;font-family:-apple-system,BlinkMacSystemFont,'Segoe UI','PingFang SC','Microsoft YaHei',Helvetica,Arial,sans-serif;color:#333}
+.wrap{max-width:760px;margin:0 auto;padding:20px}
+nav{margin-bottom:16px;font-size:14px}nav a{color:#667eea;margin-right:14px;text-decoration:none}
+h1{font-size:24px;margin:8px 0 16px}h2{font-size:18px;margin:24px 0 8px}
+ul{padding-left:20px}li{margin:6px 0;line-height:1.6}a{color:#1a1a1a}
+.meta{color:#888;font-size:13px}.card{background:#fff;border-radius:8px;padding:16px 20px;box-shadow:0 2px 8px rgba(0,0,0,.06)}
+input{width:100%;box-sizing:border-box;padding:10px;font-size:16px;border:1px solid #ddd;border-radius:6px}"""
+
+
+def _page(title: str, body: str, root: str = "") -> str:
+    """站点页面外框；root 为到站点根目录的相对路径"""
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html.escape(title)} - AI DAILY</title>
+<style>{_STYLE}</style>
+</head>
+<body><div class="wrap">
+<nav><a href="{root}index.html">🤖 AI DAILY</a><a href="{root}search.html">🔍 检索</a></nav>
+{body}
+</div></body>
+</html>
+"""
+
+
+def render_day(day: str, items: List[Dict]) -> str:
+    """每天一页：条目沿用邮件的卡片样式，每条带锚点 #n<序号> 供检索结果跳转"""
+    cards = "\n".join(f'<tbody id="n{i}">{render_news_item_html(item)}</tbody>' for i, item in enumerate(items, 1))
+    body = (f'<h1>📅 {day}</h1><p class="meta">共 {len(items)} 条 · <a href="../months/{day[:7]}.html">{day[:7]} 月索引</a></p>'
+            f'<table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%" '
+            f'style="background:#fff;border-radius:8px;padding-top:25px">{cards}</table>')
+    return _page(day, body, root="../")
+
+
+def render_month(month: str, shard: Dict[str, List[List]]) -> str:
+    """月份页：每天的条数与前几条标题（来自该月的检索分片）"""
+    blocks = []
+    for day in sorted(shard, reverse=True):
+        headlines = "".join(f'<li><a href="../days/{day}.html#{anchor}">{html.escape(title)}</a></li>'
+                            for title, anchor, *_ in shard[day][:HEADLINES])
+        blocks.append(f'<h2><a href="../days/{day}.html">{day}</a> <span class="meta">{len(shard[day])} 条</span></h2>'
+                      f"<ul>{headlines}</ul>")
+    return _page(month, f"<h1>🗓 {month}</h1>" + "".join(blocks), root="../")
+
+
+def render_company_month(name: str, month: str, shard: Dict[str, List[List]]) -> str:
+    """公司某月的页面：提及该公司的全部标题，按日期倒序"""
+    blocks = []
+    for day in sorted(shard, reverse=True):
+        rows = "".join(f'<li><a href="../../days/{day}.html#{anchor}">{html.escape(title)}</a> '
+                       f'<span class="meta">{html.escape(source)}</span></li>'
+                       for title, anchor, source, companies, _ in shard[day] if name in companies)
+        if rows:
+            blocks.append(f'<h2><a href="../../days/{day}.html">{day}</a></h2><ul>{rows}</ul>')
+    body = f'<h1>🏢 {html.escape(name)} · {month}</h1><p class="meta"><a href="../{_slug(name)}.html">全部月份</a></p>'
+    return _page(f"{name} {month}", body + "".join(blocks), root="../../")
+
+
+def render_company(name: str, months: Dict[str, Dict]) -> str:
+    """公司页：按月列出提及天数，链接到该公司的月份页"""
+    counts = {month: summary["companies"][name] for month, summary in months.items() if name in summary["companies"]}
+    rows = "".join(f'<li><a href="{_slug(name)}/{month}.html">{month}</a> <span class="meta">{n} 天提及</span></li>'
+                   for month, n in sorted(counts.items(), reverse=True))
+    return _page(name, f"<h1>🏢 {html.escape(name)}</h1><p class=\"meta\">共 {sum(counts.values())} 天提及</p>"
+                       f"<ul>{rows}</ul>", root="../")
+
+
+def render_index(months: Dict[str, Dict]) -> str:
+    """首页：月份列表与公司列表（按提及天数排序）"""
+    companies: Dict[str, int] = {}
+    for summary in months.values():
+        for name, n in summary["companies"].items():
+            companies[name] = companies.get(name, 0) + n
+    month_rows = "".join(f'<li><a href="months/{month}.html">{month}</a> '
+                         f'<span class="meta">{summary["days"]} 天 · {summary["items"]} 条</span></li>'
+                         for month, summary in sorted(months.items(), reverse=True))
+    company_rows = "".join(f'<li><a href="companies/{_slug(name)}.html">{html.escape(name)}</a> '
+                           f'<span class="meta">{n} 天</span></li>'
+                           for name, n in sorted(companies.items(), key=lambda c: (-c[1], c[0])))
+    body = (f'<h1>AI 每日精选 · 历史日报</h1><div class="card"><h2>按月份</h2><ul>{month_rows}</ul>'
+            f'<h2>按公司</h2><ul>{company_rows}</ul></div>')
+    return _page("历史日报", body)
+
+
+# 检索记录为 [标题, 页内链接, 来源, 公司, 摘要片段]；小写后逐项子串匹配，全部命中才算
+_SEARCH_PAGE = """<h1>🔍 检索</h1>
+<input id="q" placeholder="标题、摘要、公司或来源，空格分隔多个词" autofocus>
+<p class="meta" id="status"></p><ul id="results"></ul>
+<script>
+let shards = null;
+const cache = {};
+async function load(month) {
+  if (!cache[month]) cache[month] = (await fetch('search/' + month + '.json')).json();
+  return cache[month];
+}
+function esc(s) { return s.replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c])); }
+async function run() {
+  const terms = document.getElementById('q').value.toLowerCase().split(/\\s+/).filter(Boolean);
+  const out = document.getElementById('results');
+  const status = document.getElementById('status');
+  out.innerHTML = '';
+  if (!terms.length) { status.textContent = ''; return; }
+  shards = shards || await (await fetch('search/shards.json')).json();
+  let found = 0;
+  for (const month of shards) {
+    const days = await load(month);
+    for (const day of Object.keys(days).sort().reverse()) {
+      for (const [title, anchor, source, companies, snippet] of days[day]) {
+        const text = [title, source, companies.join(' '), snippet].join(' ').toLowerCase();
+        if (!terms.every(t => text.includes(t))) continue;
+        out.insertAdjacentHTML('beforeend', '<li><a href="days/' + day + '.html#' + anchor + '">' + esc(title) +
+          '</a> <span class="meta">' + day + ' · ' + esc(source) + '</span></li>');
+        if (++found >= 200) { status.textContent = '仅显示前 200 条'; return; }
+      }
+    }
+  }
+  status.textContent = '共 ' + found + ' 条';
+}
+let timer;
+document.getElementById('q').addEventListener('input', () => { clearTimeout(timer); timer = setTimeout(run, 200); });
+</script>"""
+
+
+# ---------- 构建 ----------
+
+def search_records(items: List[Dict]) -> List[List]:
+    return [[item.get("title", ""), f"n{i}", item.get("source", ""), item.get("companies", []),
+             item.get("summary", "")[:SNIPPET_CHARS]] for i, item in enumerate(items, 1)]
+
+
+def _companies(shard: Dict[str, List[List]], days=None) -> Dict[str, int]:
+    """公司 → 提及天数"""
+    counts: Dict[str, int] = {}
+    for day in shard if days is None else days:
+        for name in {name for record in shard.get(day, []) for name in record[3]}:
+            counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+class StaticSite:
+    """增量构建器：对比清单与来源，只渲染变化的日期及受影响的索引
+
+    清单只保存每天的来源标记与哈希、每月的汇总（天数、条数、公司提及天数）；
+    每天的条目摘要存于按月的检索分片，月份页和公司月份页由分片生成，
+    因此新增一天的渲染开销与历史长度无关；但每次构建仍要列出全部来源（reports/ 中每个文件一次 stat）、
+    读写清单并逐天比对来源标记，这部分（含无变化时的构建）随天数线性增长，约每千天十几毫秒。
+    """
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+        self.manifest = {"version": SITE_VERSION, "days": {}, "months": {}}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") == SITE_VERSION:
+                self.manifest = saved
+            else:
+                print("页面模板已更新，全部重建")
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.out_dir, *parts)
+
+    def _load_shard(self, month: str) -> Dict[str, List[List]]:
+        path = self._path("search", f"{month}.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def build(self, sources: Dict[str, DaySource], full: bool = False) -> Dict[str, float]:
+        start = time.perf_counter()
+        days, months = self.manifest["days"], self.manifest["months"]
+        stats = {"days": 0, "rendered": 0, "unchanged": 0, "rehashed": 0, "months": 0, "companies": 0}
+        # 月份 → {日期: 检索记录}：变化的日期
+        changed: Dict[str, Dict[str, List[List]]] = {}
+
+        for day, source in sorted(sources.items()):
+            record = days.get(day)
+            if not full and record is not None and record["stamp"] == source.stamp:
+                stats["unchanged"] += 1
+                continue
+            digest = source.digest()
+            if not full and record is not None and record["hash"] == digest:
+                # 文件被重写或归档移动了位置，内容未变
+                record["stamp"] = source.stamp
+                stats["rehashed"] += 1
+                continue
+            items = source.items()
+            _write(self._path("days", f"{day}.html"), render_day(day, items))
+            days[day] = {"stamp": source.stamp, "hash": digest}
+            changed.setdefault(day[:7], {})[day] = search_records(items)
+            stats["rendered"] += 1
+
+        # 只重写受影响的检索分片、月份页和公司页
+        touched: Set[str] = set()
+        for month, updates in sorted(changed.items()):
+            shard = self._load_shard(month)
+            before = _companies(shard, updates)
+            shard.update(updates)
+            _write(self._path("search", f"{month}.json"),
+                   json.dumps(shard, ensure_ascii=False, separators=(",", ":"), sort_keys=True))
+            _write(self._path("months", f"{month}.html"), render_month(month, shard))
+            companies = _companies(shard)
+            months[month] = {"days": len(shard), "items": sum(len(r) for r in shard.values()), "companies": companies}
+            for name in set(before) | set(_companies(shard, updates)):
+                path = self._path("companies", _slug(name), f"{month}.html")
+                if name in companies:
+                    _write(path, render_company_month(name, month, shard))
+                elif os.path.exists(path):
+                    os.remove(path)
+                touched.add(name)
+            stats["months"] += 1
+        for name in sorted(touched):
+            _write(self._path("companies", f"{_slug(name)}.html"), render_company(name, months))
+            stats["companies"] += 1
+
+        if changed or full or not os.path.exists(self._path("index.html")):
+            _write(self._path("index.html"), render_index(months))
+            _write(self._path("search.html"), _page("检索", _SEARCH_PAGE))
+            _write(self._path("search", "shards.json"), json.dumps(sorted(months, reverse=True)))
+
+        if changed or stats["rehashed"]:
+            _write(self.manifest_path, json.dumps(self.manifest, ensure_ascii=False, separators=(",", ":")))
+        stats["days"] = len(days)
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="把历史日报发布为静态网站（增量构建）")
+    parser.add_argument("--reports", default="reports", help="日报目录")
+    parser.add_argument("--archive", help="归档目录（默认与日报目录同级的 archive，存在时读取）")
+    parser.add_argument("--out", default="site", help="站点输出目录")
+    parser.add_argument("--full", action="store_true", help="忽略构建清单，全部重建")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    archive_dir = args.archive or os.path.join(os.path.dirname(os.path.abspath(args.reports)), "archive")
+    sources = discover(args.reports, archive_dir)
+    stats = StaticSite(args.out).build(sources, full=args.full)
+    print(f"站点已更新：共 {stats['days']} 天，渲染 {stats['rendered']} 天（未变 {stats['unchanged']}，"
+          f"内容相同 {stats['rehashed']}），月份页 {stats['months']} 个，公司页 {stats['companies']} 个，"
+          f"用时 {stats['seconds'] * 1000:.0f} ms → {os.path.join(args.out, 'index.html')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+文本分析 - 入库时对每条新闻做一次分析，下游直接读取结果
+标题和摘要只转一次小写、分一次词（英文按词，中文按连续汉字），由同一份词列表得到：
+    companies   提到的公司和机构（与 detect_companies 结果一致）
+    label       标题分类（与 send_email.get_category_icon 一致，邮件直接读取）
+    cjk         标题、摘要各自的中文字符占比（翻译计划直接读取）
+    terms       检索词：英文词与中文二元组（单字成词时为单字），排序后存放，检索时用于预筛
+    fingerprint 归一化标题的指纹，无链接时用于去重
+关键词按词查表（词 → 命中的公司/分类，跨条目缓存），子串语义与原来逐个关键词查找一致；
+少数含空格或句点的短语关键词仍在全文中查找。
+companies 与 label 存为条目字段，其余存于 item["_analysis"]（JSON 输出时省略）。
+
+用法：
+    python scripts/benchmark.py analyze --sizes 1000,10000,100000
+"""
+
+import hashlib
+import re
+from bisect import bisect_left
+from operator import add
+from typing import Dict, List, Optional, Set, Tuple
+
+from fetch_ai_news import COMPANY_KEYWORDS
+from send_email import CATEGORY_RULES
+
+
+MAX_COMPANIES = 5
+
+_WORD_RE = re.compile(r'[a-z0-9][a-z0-9\-]*')
+_CJK_RUN_RE = re.compile(r'[\u4e00-\u9fff]+')
+_TITLE_KEY_RE = re.compile(r'\W+')
+
+
+def _keyword_groups() -> Tuple[List[Tuple[str, int, int]], List[Tuple[str, int, int]], List[Tuple[str, int, int]]]:
+    """(关键词, 公司序号, 分类序号) 列表，序号 -1 表示不适用；分为英文词、中文词与短语三组：
+    能落在单个词内的关键词按词查找，含空格、句点等的短语关键词直接在全文中查找"""
+    latin, chinese, phrases = [], [], []
+    entries = [(keyword, i, -1) for i, keywords in enumerate(COMPANY_KEYWORDS.values()) for keyword in keywords]
+    entries += [(keyword, -1, i) for i, (_, keywords) in enumerate(CATEGORY_RULES) for keyword in keywords]
+    for keyword, company, label in entries:
+        keyword = keyword.lower()
+        if _WORD_RE.fullmatch(keyword):
+            latin.append((keyword, company, label))
+        elif _CJK_RUN_RE.fullmatch(keyword):
+            chinese.append((keyword, company, label))
+        else:
+            phrases.append((keyword, company, label))
+    return latin, chinese, phrases
+
+
+_LATIN_KEYWORDS, _CJK_KEYWORDS, _PHRASE_KEYWORDS = _keyword_groups()
+_COMPANY_NAMES = list(COMPANY_KEYWORDS)
+_LABEL_NAMES = [label for label, _ in CATEGORY_RULES]
+
+# 词 → (公司序号, 分类序号)，不含关键词的词为 ()：同一个词在不同新闻中反复出现，只查一次关键词表
+_TOKEN_MARKS: Dict[str, Tuple] = {}
+_TOKEN_CACHE_SIZE = 200_000
+
+
+def _token_marks(token: str) -> Tuple:
+    """词中包含的关键词（子串匹配，与 detect_companies 一致，如 chatgpt 含 gpt）"""
+    marks = _TOKEN_MARKS.get(token)
+    if marks is None:
+        keywords = _CJK_KEYWORDS if token[0] >= "\u4e00" else _LATIN_KEYWORDS
+        hits = [(company, label) for keyword, company, label in keywords if keyword in token]
+        marks = (frozenset(c for c, _ in hits if c >= 0), frozenset(l for _, l in hits if l >= 0)) if hits else ()
+        if len(_TOKEN_MARKS) >= _TOKEN_CACHE_SIZE:
+            _TOKEN_MARKS.clear()
+        _TOKEN_MARKS[token] = marks
+    return marks
+
+
+def fingerprint(title: str) -> str:
+    """归一化标题（小写、去标点空白）的指纹"""
+    key = _TITLE_KEY_RE.sub("", title.lower())
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _scan(lowered: str, terms: Set[str]) -> Tuple[List[str], int]:
+    """分词：检索词加入 terms，返回词列表（英文词与连续汉字）和中文字符数"""
+    words = _WORD_RE.findall(lowered)
+    terms.update(words)
+    runs = _CJK_RUN_RE.findall(lowered)
+    cjk = 0
+    for run in runs:
+        cjk += len(run)
+        if len(run) == 1:
+            terms.add(run)
+        else:
+            terms.update(map(add, run, run[1:]))
+    return words + runs, cjk
+
+
+def analyze(item: Dict, content: Optional[str] = None) -> Dict:
+    """分析一条新闻并把结果写回条目；content 为补全的正文，提供时公司识别改用 标题 + 正文"""
+    title = item.get("title", "")
+    summary = item.get("summary", "")
+    title_lower = title.lower()
+    body_lower = (content if content is not None else summary).lower()
+
+    terms: Set[str] = set()
+    title_tokens, title_cjk = _scan(title_lower, terms)
+    summary_tokens, summary_cjk = _scan(body_lower if content is None else summary.lower(), terms)
+    body_tokens = summary_tokens if content is None else _WORD_RE.findall(body_lower) + _CJK_RUN_RE.findall(body_lower)
+
+    companies: Set[int] = set()
+    labels: Set[int] = set()
+    for token in set(title_tokens):
+        marks = _token_marks(token)
+        if marks:
+            companies |= marks[0]
+            labels |= marks[1]
+    for token in set(body_tokens):
+        marks = _token_marks(token)
+        if marks:
+            companies |= marks[0]
+    if _PHRASE_KEYWORDS:
+        text = f"{title_lower} {body_lower}"
+        for keyword, company, label in _PHRASE_KEYWORDS:
+            if company >= 0 and keyword in text:
+                companies.add(company)
+            if label >= 0 and keyword in title_lower:
+                labels.add(label)
+
+    item["companies"] = [_COMPANY_NAMES[i] for i in sorted(companies)][:MAX_COMPANIES]
+    item["label"] = _LABEL_NAMES[min(labels)] if labels else "general"
+    item["_analysis"] = {
+        "cjk": {"title": title_cjk / len(title) if title else 0.0,
+                "summary": summary_cjk / len(summary) if summary else 0.0},
+        "terms": sorted(terms),
+        "fingerprint": fingerprint(title),
+    }
+    return item
+
+
+def analysis(item: Dict) -> Dict:
+    """读取条目的分析结果；旧数据（状态文件、Markdown 解析的条目）没有时现算"""
+    if "_analysis" not in item:
+        analyze(item)
+    return item["_analysis"]
+
+
+def cjk_ratio(item: Dict, field: str) -> Optional[float]:
+    """入库时算好的中文字符占比；字段已被翻译等改写过时返回 None"""
+    result = item.get("_analysis")
+    return result["cjk"].get(field) if result else None
+
+
+def query_terms(query: str) -> List[str]:
+    """检索词与条目 terms 的切分方式一致"""
+    terms: Set[str] = set()
+    _scan(query.lower(), terms)
+    return sorted(terms)
+
+
+def matches(item: Dict, query: str, terms: Optional[List[str]] = None) -> bool:
+    """关键词检索，语义与原来一致：query 是标题或摘要（小写）的子串。
+    先用入库时的检索词预筛（每个检索词须是某个条目词的子串，如 gpt 之于 chatgpt），再逐条确认子串"""
+    if terms is None:
+        terms = query_terms(query)
+    indexed = analysis(item)["terms"]
+    for term in terms:
+        i = bisect_left(indexed, term)
+        if i < len(indexed) and indexed[i].startswith(term):
+            continue
+        if not any(term in word for word in indexed):
+            return False
+    keyword = query.lower()
+    return keyword in item.get("title", "").lower() or keyword in item.get("summary", "").lower()
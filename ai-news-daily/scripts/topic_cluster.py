@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+话题聚类 - 把一周/一月的大量新闻归并为若干条故事线
+特点：NumPy 向量化的哈希特征 TF-IDF（英文按词、中文按字二元组），
+球面 mini-batch k-means（k-means++ 初始化），单核数秒内处理上万条。
+
+用法：
+    python scripts/fetch_ai_news.py --date week --format topics --max-items 30
+    python scripts/fetch_ai_news.py --from-state state.json --date month --format topics --topics 20
+    python scripts/benchmark.py cluster --sizes 1000,10000,20000
+"""
+
+import math
+import re
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+N_FEATURES = 1 << 11
+OTHER_TOPIC = -1
+
+_WORD_RE = re.compile(r'[a-z][a-z0-9\-]+|[\u4e00-\u9fff]+')
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its new of on or that the this to was
+were will with how why what who says said more than over after about can just now our your their
+""".split())
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """英文取词（去停用词），连续中文取字二元组"""
+    for match in _WORD_RE.finditer(text.lower()):
+        token = match.group()
+        if token[0] >= "\u4e00":
+            if len(token) == 1:
+                yield token
+            for i in range(len(token) - 1):
+                yield token[i:i + 2]
+        elif token not in _STOPWORDS:
+            yield token
+
+
+def vectorize(texts: List[str], n_features: int = N_FEATURES, chunk_rows: int = 4096) -> "np.ndarray":
+    """哈希特征 TF-IDF，返回按行 L2 归一化的 float32 稠密矩阵"""
+    hashes: Dict[str, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            col = hashes.get(token)
+            if col is None:
+                col = hashes[token] = zlib.crc32(token.encode("utf-8")) % n_features
+            rows.append(row)
+            cols.append(col)
+
+    n = len(texts)
+    matrix = np.zeros((n, n_features), dtype=np.float32)
+    row_ids = np.asarray(rows, dtype=np.int64)
+    flat = row_ids * n_features + np.asarray(cols, dtype=np.int64)
+    # 分块计数，避免一次性分配 n × n_features 的 int64 中间结果
+    bounds = np.searchsorted(row_ids, np.arange(0, n + chunk_rows, chunk_rows))
+    for start_row, lo, hi in zip(range(0, n, chunk_rows), bounds[:-1], bounds[1:]):
+        stop_row = min(start_row + chunk_rows, n)
+        counts = np.bincount(flat[lo:hi] - start_row * n_features,
+                             minlength=(stop_row - start_row) * n_features)
+        matrix[start_row:stop_row] = counts.reshape(-1, n_features)
+
+    np.log1p(matrix, out=matrix)
+    df = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1.0 + n) / (1.0 + df)).astype(np.float32) + 1.0
+    matrix *= idf
+    _normalize_rows(matrix)
+    return matrix
+
+
+def _normalize_rows(matrix: "np.ndarray") -> None:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+
+
+def _kmeans_pp(sample: "np.ndarray", k: int, rng) -> "np.ndarray":
+    """k-means++ 初始化（余弦距离）"""
+    centers = np.empty((k, sample.shape[1]), dtype=sample.dtype)
+    centers[0] = sample[rng.integers(len(sample))]
+    closest = 1.0 - sample @ centers[0]
+    for i in range(1, k):
+        weights = np.maximum(closest, 0) ** 2
+        total = weights.sum()
+        index = rng.choice(len(sample), p=weights / total) if total > 0 else rng.integers(len(sample))
+        centers[i] = sample[index]
+        np.minimum(closest, 1.0 - sample @ centers[i], out=closest)
+    return centers
+
+
+def assign(matrix: "np.ndarray", centers: "np.ndarray", chunk_rows: int = 8192) -> Tuple["np.ndarray", "np.ndarray"]:
+    """为每行找最相似的中心，返回 (标签, 相似度)"""
+    labels = np.empty(len(matrix), dtype=np.int64)
+    sims = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), chunk_rows):
+        scores = matrix[start:start + chunk_rows] @ centers.T
+        labels[start:start + chunk_rows] = scores.argmax(axis=1)
+        sims[start:start + chunk_rows] = scores.max(axis=1)
+    return labels, sims
+
+
+def minibatch_kmeans(matrix: "np.ndarray", k: int, batch_size: int = 1024, iterations: int = 60,
+                     seed: int = 0) -> Tuple["np.ndarray", "np.ndarray"]:
+    """球面 mini-batch k-means（Sculley 2010），返回 (标签, 与所属中心的相似度)"""
+    n = len(matrix)
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+    sample = matrix[rng.choice(n, min(n, max(10 * k, batch_size)), replace=False)]
+    centers = _kmeans_pp(sample, k, rng)
+    seen = np.zeros(k, dtype=np.float64)
+
+    for _ in range(iterations):
+        batch = matrix[rng.integers(0, n, min(batch_size, n))]
+        labels = (batch @ centers.T).argmax(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        onehot = np.zeros((len(batch), k), dtype=np.float32)
+        onehot[np.arange(len(batch)), labels] = 1.0
+        sums = onehot.T @ batch
+        hit = counts > 0
+        seen[hit] += counts[hit]
+        eta = (counts[hit] / seen[hit]).astype(np.float32)[:, None]
+        centers[hit] = (1.0 - eta) * centers[hit] + eta * (sums[hit] / counts[hit][:, None])
+        _normalize_rows(centers)
+
+    return assign(matrix, centers)
+
+
+def default_k(n: int) -> int:
+    return max(2, min(100, int(math.sqrt(n))))
+
+
+def cluster_items(items: List[Dict], max_items: int = 15, k: Optional[int] = None, per_topic: int = 3,
+                  min_size: int = 2, seed: int = 0) -> List[Dict]:
+    """聚类并挑选条目：话题按规模排序，每个话题最具代表性的一条在前，
+    其余保持输入顺序（已按时间倒序）；不足 min_size 的小簇归入“其他动态”。
+    选中的条目带 topic（话题序号，其他为 -1）和 topic_size 字段。"""
+    if not NUMPY_AVAILABLE:
+        print("警告：未安装 numpy，跳过话题聚类")
+        return items[:max_items]
+    if len(items) < 3:
+        return items[:max_items]
+
+    texts = [f"{item.get('title', '')} {item.get('title', '')} {item.get('summary', '')}" for item in items]
+    labels, sims = minibatch_kmeans(vectorize(texts), k or default_k(len(items)), seed=seed)
+
+    groups: Dict[int, List[int]] = {}
+    for index, label in enumerate(labels.tolist()):
+        groups.setdefault(label, []).append(index)
+
+    # 规模相同时，最新条目更靠前的话题优先
+    ordered = sorted(groups.values(), key=lambda g: (-len(g), g[0]))
+    selected: List[Dict] = []
+    leftovers: List[int] = []
+    topic = 0
+    for members in ordered:
+        if len(members) < min_size:
+            leftovers.extend(members)
+            continue
+        if len(selected) >= max_items:
+            break
+        central = max(members, key=lambda i: sims[i])
+        rest = [i for i in members if i != central]
+        for index in [central] + rest[:per_topic - 1]:
+            if len(selected) >= max_items:
+                break
+            selected.append(dict(items[index], topic=topic, topic_size=len(members)))
+        topic += 1
+
+    for index in sorted(leftovers)[:max(0, max_items - len(selected))]:
+        selected.append(dict(items[index], topic=OTHER_TOPIC, topic_size=1))
+    print(f"话题聚类：{len(items)} 条新闻归为 {len(groups)} 簇，输出 {topic} 个话题")
+    return selected
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+翻译计划 - 翻译前决定每条新闻哪些字段、多少字送去翻译，减少翻译引擎的字符量
+    语言路由    与目标语言（默认 zh）相同的源不翻译；其余文本批量检测，已是目标语言的跳过
+    按展示截断  只发送报告里实际会展示的长度（在句子边界截断），不展示的字段不翻译
+翻译引擎按字符量限流，每次运行打印（并写入运行报告）实际发送与节省的字符数。
+
+用法：
+    python scripts/fetch_ai_news.py --translate --format newsletter   # 摘要按 200 字展示换算
+    python scripts/fetch_ai_news.py --translate --format summary      # 摘要不展示，只翻译标题
+"""
+
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from text_analysis import cjk_ratio
+
+
+TARGET_LANGUAGE = "zh"
+
+# 中文字符占比超过此值视为已是中文
+CHINESE_THRESHOLD = 0.4
+
+# 表达同样内容所需字符数的相对密度：英文译成中文后字符数约为原文的 0.4 倍，反之约 2.5 倍；
+# 按此把展示长度（译文）换算为需要发送的原文长度
+LANGUAGE_DENSITY = {"zh": 2.5}
+
+# 展示长度不限（如 JSON 输出）时沿用的截断长度
+DEFAULT_CLIP = {"title": 200, "summary": 800}
+
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+_SENTENCE_END_RE = re.compile(r'[.!?;](?=\s|$)|[\u3002\uff01\uff1f\uff1b]')
+
+
+def chinese_ratios(texts: List[str]) -> List[float]:
+    """批量计算中文字符占比：拼接后按 UTF-32 码点一次性比较，再按段求和"""
+    if not texts:
+        return []
+    if not NUMPY_AVAILABLE:
+        return [len(_CJK_RE.findall(text)) / len(text) if text else 0.0 for text in texts]
+
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    codes = np.frombuffer("".join(texts).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    hits = np.flatnonzero((codes - np.uint32(0x4E00)) <= np.uint32(0x9FFF - 0x4E00))
+    # 中文字符位置有序，按各段起止位置二分即得每段的中文字符数
+    ends = np.cumsum(lengths)
+    counts = np.searchsorted(hits, ends) - np.searchsorted(hits, ends - lengths)
+    return (counts / np.maximum(lengths, 1)).tolist()
+
+
+def cut_at_sentence(text: str, limit: int) -> str:
+    """截断到 limit 字以内，尽量落在句子边界，其次落在空白处"""
+    if len(text) <= limit:
+        return text
+    head = text[:limit]
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(head)]
+    if ends and ends[-1] >= limit // 2:
+        return head[:ends[-1]]
+    space = head.rfind(" ")
+    if space >= limit // 2:
+        return head[:space]
+    return head
+
+
+def length_ratio(source: str, target: str) -> float:
+    """译文字符数 / 原文字符数的估计值"""
+    return LANGUAGE_DENSITY.get(source, 1.0) / LANGUAGE_DENSITY.get(target, 1.0)
+
+
+def source_limit(field: str, rendered: Optional[int], source: str = "en", target: str = TARGET_LANGUAGE) -> int:
+    """把展示长度换算为需要发送的原文长度；rendered 为 None 表示不限"""
+    if rendered is None:
+        return DEFAULT_CLIP.get(field, DEFAULT_CLIP["title"])
+    return min(DEFAULT_CLIP.get(field, DEFAULT_CLIP["title"]), math.ceil(rendered / length_ratio(source, target)))
+
+
+class TranslationPlan:
+    """翻译前的字段与长度规划；tasks 为 (条目, 字段, 要发送的原文)，sources 为对应原文的语言"""
+
+    def __init__(self, items: Iterable[Dict], fields: List[str],
+                 limits: Optional[Dict[str, Optional[int]]] = None, target: str = TARGET_LANGUAGE):
+        # limits：字段 → 报告中展示的字数，0 表示不展示，未列出或 None 表示不限
+        limits = limits or {}
+        self.target = target
+        clips = {field: DEFAULT_CLIP.get(field, DEFAULT_CLIP["title"]) for field in fields}
+        budgets: Dict[Tuple[str, str], int] = {}
+        self.tasks: List[Tuple[Dict, str, str]] = []
+        self.sources: List[str] = []
+        self.stats = {"texts": 0, "skipped_source": 0, "skipped_text": 0, "skipped_hidden": 0,
+                      "chars_full": 0, "chars_sent": 0}
+
+        candidates: List[Tuple[Dict, str]] = []
+        for item in items:
+            for field in fields:
+                if item.get(field):
+                    candidates.append((item, field))
+
+        # 入库时已算好的中文占比直接使用（见 text_analysis.py），其余批量计算
+        ratios = [cjk_ratio(item, field) for item, field in candidates]
+        missing = [i for i, ratio in enumerate(ratios) if ratio is None]
+        for i, ratio in zip(missing, chinese_ratios([candidates[i][0][candidates[i][1]] for i in missing])):
+            ratios[i] = ratio
+        for (item, field), ratio in zip(candidates, ratios):
+            detected = "zh" if ratio > CHINESE_THRESHOLD else None
+            # 原方式：除已是目标语言（中文）的文本外，按固定长度截断后全部发送
+            self.stats["chars_full"] += min(len(item[field]), clips[field]) if detected != target else 0
+            # 源语言以检测为准：中文文本按中文处理，其余按新闻源声明的语言
+            declared = item.get("language", "en")
+            source = detected or declared
+            if source == target:
+                self.stats["skipped_source" if declared == target else "skipped_text"] += 1
+                continue
+            if limits.get(field) == 0:
+                self.stats["skipped_hidden"] += 1
+                continue
+            if (field, source) not in budgets:
+                budgets[field, source] = source_limit(field, limits.get(field), source, target)
+            text = cut_at_sentence(item[field], budgets[field, source])
+            self.tasks.append((item, field, text))
+            self.sources.append(source)
+            self.stats["texts"] += 1
+            self.stats["chars_sent"] += len(text)
+
+    def texts(self) -> List[str]:
+        return [text for _, _, text in self.tasks]
+
+    @property
+    def chars_saved(self) -> int:
+        return self.stats["chars_full"] - self.stats["chars_sent"]
+
+    def summary(self) -> str:
+        s = self.stats
+        saved = f"{self.chars_saved / s['chars_full']:.0%}" if s["chars_full"] else "0%"
+        return (f"翻译计划（{self.target}）：{s['texts']} 段 {s['chars_sent']} 字符（节省 {self.chars_saved} 字符，{saved}）；"
+                f"跳过同语言源 {s['skipped_source']} 段、已是目标语言 {s['skipped_text']} 段、"
+                f"不展示的字段 {s['skipped_hidden']} 段")
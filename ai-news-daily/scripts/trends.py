@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+公司提及趋势 - 入库时增量维护每日聚合，趋势查询无需重新扫描新闻
+每天一张表（DIR/YYYY-MM-DD.json）：按公司、公司×来源、公司×分类计数，
+并记录公司两两共同出现的次数；计数用 array 紧凑存储（base64），
+已计入的条目以链接哈希去重，重复入库不会重复计数。查询只读取涉及的天数，复杂度 O(days)。
+
+用法：
+    python scripts/fetch_ai_news.py --trends --format newsletter   # 入库并在简报中附“热门公司”
+    python scripts/trends.py mentions Anthropic --days 30
+    python scripts/trends.py top --days 7
+    python scripts/trends.py pairs OpenAI --days 30
+    python scripts/trends.py ingest --items reports/ai-daily.jsonl
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import threading
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fetch_ai_news import CACHE_DIR, COMPANY_KEYWORDS, parse_date
+
+
+def _item_hash(item: Dict) -> int:
+    key = item.get("link") or item.get("title", "")
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _pair_index(i: int, j: int) -> int:
+    """上三角（不含对角线）展平后的下标，要求 i < j"""
+    return j * (j - 1) // 2 + i
+
+
+class DayTable:
+    """单日聚合表：维度词表 + 平铺的计数数组"""
+
+    def __init__(self, day: date):
+        self.day = day
+        self.companies: List[str] = list(COMPANY_KEYWORDS)
+        self.sources: List[str] = []
+        self.categories: List[str] = []
+        self.items = 0
+        self.company = array("I", [0] * len(self.companies))
+        # 公司 × 来源、公司 × 分类：按 [company][dimension] 平铺，新维度出现时扩列
+        self.by_source = array("I")
+        self.by_category = array("I")
+        self.pairs = array("I", [0] * _pair_index(0, len(self.companies)))
+        self.seen = array("Q")
+        self._seen_set = set()
+
+    # ---------- 维度 ----------
+
+    def _company_index(self, name: str) -> int:
+        try:
+            return self.companies.index(name)
+        except ValueError:
+            pass
+        # 词表外的公司追加到末尾，平铺数组随之补零
+        self.companies.append(name)
+        self.company.append(0)
+        self.by_source.extend([0] * len(self.sources))
+        self.by_category.extend([0] * len(self.categories))
+        self.pairs.extend([0] * (len(self.companies) - 1))
+        return len(self.companies) - 1
+
+    def _column(self, dims: List[str], matrix: array, name: str) -> int:
+        if name in dims:
+            return dims.index(name)
+        # 新增一列：每个公司的行尾插入 0
+        width = len(dims)
+        dims.append(name)
+        for row in range(len(self.companies) - 1, -1, -1):
+            matrix.insert((row + 1) * width, 0)
+        return width
+
+    # ---------- 写入 ----------
+
+    def add(self, item: Dict) -> bool:
+        """计入一条新闻，已计入过的返回 False"""
+        digest = _item_hash(item)
+        if digest in self._seen_set:
+            return False
+        self._seen_set.add(digest)
+        self.seen.append(digest)
+        self.items += 1
+
+        indexes = sorted({self._company_index(c) for c in item.get("companies", [])})
+        if not indexes:
+            return True
+        source = self._column(self.sources, self.by_source, item.get("source") or "未知")
+        category = self._column(self.categories, self.by_category, item.get("category") or "general")
+        for n, i in enumerate(indexes):
+            self.company[i] += 1
+            self.by_source[i * len(self.sources) + source] += 1
+            self.by_category[i * len(self.categories) + category] += 1
+            for j in indexes[n + 1:]:
+                self.pairs[_pair_index(i, j)] += 1
+        return True
+
+    # ---------- 读取 ----------
+
+    def count(self, company: str) -> int:
+        return self.company[self.companies.index(company)] if company in self.companies else 0
+
+    def breakdown(self, company: str, by: str = "source") -> Dict[str, int]:
+        if company not in self.companies:
+            return {}
+        dims, matrix = (self.sources, self.by_source) if by == "source" else (self.categories, self.by_category)
+        row = self.companies.index(company) * len(dims)
+        return {name: matrix[row + k] for k, name in enumerate(dims) if matrix[row + k]}
+
+    def partners(self, company: str) -> Dict[str, int]:
+        if company not in self.companies:
+            return {}
+        i = self.companies.index(company)
+        result = {}
+        for j, other in enumerate(self.companies):
+            if j != i:
+                n = self.pairs[_pair_index(min(i, j), max(i, j))]
+                if n:
+                    result[other] = n
+        return result
+
+    # ---------- 序列化 ----------
+
+    def to_dict(self) -> Dict:
+        def pack(values: array) -> str:
+            return base64.b64encode(values.tobytes()).decode("ascii")
+        return {
+            "day": self.day.isoformat(),
+            "items": self.items,
+            "companies": self.companies,
+            "sources": self.sources,
+            "categories": self.categories,
+            "arrays": {name: pack(getattr(self, name))
+                       for name in ("company", "by_source", "by_category", "pairs", "seen")},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DayTable":
+        table = cls(date.fromisoformat(data["day"]))
+        table.items = data["items"]
+        table.companies = data["companies"]
+        table.sources = data["sources"]
+        table.categories = data["categories"]
+        for name, encoded in data["arrays"].items():
+            values = array(getattr(table, name).typecode)
+            values.frombytes(base64.b64decode(encoded))
+            setattr(table, name, values)
+        table._seen_set = set(table.seen)
+        return table
+
+
+class TrendStore:
+    """按天存放 DayTable，最近用到的表缓存在内存"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(CACHE_DIR, "trends")
+        self._tables: Dict[date, DayTable] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, day: date) -> str:
+        return os.path.join(self.directory, f"{day.isoformat()}.json")
+
+    def table(self, day: date) -> Optional[DayTable]:
+        if day not in self._tables:
+            path = self._path(day)
+            if not os.path.exists(path):
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                self._tables[day] = DayTable.from_dict(json.load(f))
+        return self._tables[day]
+
+    def _save(self, table: DayTable) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(table.day)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(table.to_dict(), f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+    def ingest(self, items: Iterable[Dict], today: Optional[date] = None) -> int:
+        """按发布日期计入各天的表，返回新计入的条数；日期无法解析的算作 today"""
+        today = today or date.today()
+        added = 0
+        with self._lock:
+            touched = {}
+            for item in items:
+                pub_date = item.get("_parsed_date")
+                if not isinstance(pub_date, datetime):
+                    pub_date = parse_date(item.get("published", ""))
+                day = pub_date.date() if isinstance(pub_date, datetime) else today
+                table = self.table(day) or self._tables.setdefault(day, DayTable(day))
+                if table.add(item):
+                    added += 1
+                    touched[day] = table
+            for table in touched.values():
+                self._save(table)
+        return added
+
+    def _window(self, days: int, end: Optional[date] = None) -> List[Tuple[date, Optional[DayTable]]]:
+        end = end or date.today()
+        return [(d, self.table(d)) for d in (end - timedelta(days=n) for n in range(days - 1, -1, -1))]
+
+    def mentions(self, company: str, days: int = 30, end: Optional[date] = None) -> List[Tuple[date, int]]:
+        """逐日提及次数"""
+        return [(d, t.count(company) if t else 0) for d, t in self._window(days, end)]
+
+    def breakdown(self, company: str, days: int = 30, by: str = "source", end: Optional[date] = None) -> Dict[str, int]:
+        total: Dict[str, int] = {}
+        for _, table in self._window(days, end):
+            if table:
+                for name, n in table.breakdown(company, by).items():
+                    total[name] = total.get(name, 0) + n
+        return dict(sorted(total.items(), key=lambda kv: -kv[1]))
+
+    def co_mentions(self, company: str, days: int = 30, end: Optional[date] = None) -> Dict[str, int]:
+        total: Dict[str, int] = {}
+        for _, table in self._window(days, end):
+            if table:
+                for name, n in table.partners(company).items():
+                    total[name] = total.get(name, 0) + n
+        return dict(sorted(total.items(), key=lambda kv: -kv[1]))
+
+    def trending(self, days: int = 7, baseline_days: int = 28, top: int = 5,
+                 end: Optional[date] = None) -> List[Dict]:
+        """近 days 天与之前 baseline_days 天的日均提及对比，按近期提及数与增幅排序"""
+        end = end or date.today()
+        recent: Dict[str, int] = {}
+        previous: Dict[str, int] = {}
+        for bucket, window_end, length in ((recent, end, days),
+                                           (previous, end - timedelta(days=days), baseline_days)):
+            for _, table in self._window(length, window_end):
+                if table:
+                    for company, n in zip(table.companies, table.company):
+                        if n:
+                            bucket[company] = bucket.get(company, 0) + n
+
+        rows = []
+        for company, count in recent.items():
+            before = previous.get(company, 0) * days / baseline_days
+            change = (count - before) / before if before else None
+            rows.append({"company": company, "mentions": count, "change": change})
+        rows.sort(key=lambda r: (-r["mentions"], -(r["change"] or 0), r["company"]))
+        return rows[:top]
+
+
+def _trend_label(change: Optional[float]) -> str:
+    if change is None:
+        return "新"
+    return f"↑{change:.0%}" if change >= 0 else f"↓{-change:.0%}"
+
+
+def format_trending(rows: List[Dict]) -> str:
+    """简报中的一行“热门公司”"""
+    return " · ".join(f"{row['company']} {row['mentions']} 次（{_trend_label(row['change'])}）" for row in rows)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="公司提及趋势查询")
+    parser.add_argument("--dir", help="聚合表目录（默认缓存目录下的 trends）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    mentions = sub.add_parser("mentions", help="某公司的逐日提及次数")
+    mentions.add_argument("company")
+    mentions.add_argument("--days", type=int, default=30)
+    mentions.add_argument("--by", choices=["source", "category"], help="同时按来源或分类汇总")
+
+    top = sub.add_parser("top", help="热门公司")
+    top.add_argument("--days", type=int, default=7)
+    top.add_argument("--baseline", type=int, default=28, help="对比的基线天数")
+    top.add_argument("--limit", type=int, default=10)
+
+    pairs = sub.add_parser("pairs", help="与某公司共同出现最多的公司")
+    pairs.add_argument("company")
+    pairs.add_argument("--days", type=int, default=30)
+
+    ingest = sub.add_parser("ingest", help="从 JSONL 条目文件补录")
+    ingest.add_argument("--items", required=True, help="fetch_ai_news.py --save-items 或 --output jsonl 的产出")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = TrendStore(args.dir)
+
+    if args.command == "mentions":
+        series = store.mentions(args.company, args.days)
+        for day, n in series:
+            print(f"{day.isoformat()}  {n:>5}  {'█' * min(n, 60)}")
+        print(f"\n{args.company} 最近 {args.days} 天共被提及 {sum(n for _, n in series)} 次")
+        if args.by:
+            for name, n in store.breakdown(args.company, args.days, by=args.by).items():
+                print(f"  {name:<30}{n:>6}")
+    elif args.command == "top":
+        for row in store.trending(args.days, args.baseline, args.limit):
+            print(f"{row['company']:<16}{row['mentions']:>6}  {_trend_label(row['change'])}")
+    elif args.command == "pairs":
+        for name, n in list(store.co_mentions(args.company, args.days).items())[:10]:
+            print(f"{args.company} + {name:<16}{n:>6}")
+    elif args.command == "ingest":
+        with open(args.items, "r", encoding="utf-8") as f:
+            items = [json.loads(line) for line in f if line.strip()]
+        print(f"新计入 {store.ingest(items)} 条（共读取 {len(items)} 条）")
+
+
+if __name__ == "__main__":
+    main()
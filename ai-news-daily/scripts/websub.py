@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+WebSub 推送接入 - 对声明了 hub 的新闻源改为推送，轮询作为兜底
+特点：本地 HTTP 回调服务器，订阅与租约续期，校验 X-Hub-Signature，
+推送内容直接进入常规条目处理流程；附带本地替身 hub 便于离线测试。
+
+用法：
+    python scripts/news_daemon.py --websub-callback http://my.host:8080 --websub-listen 0.0.0.0:8080
+    python scripts/websub.py hub --port 8090      # 本地替身 hub
+    python scripts/websub.py selftest             # 对本地 hub 自检订阅、推送与伪造验证
+"""
+
+import argparse
+import hashlib
+import hmac
+import re
+import secrets
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fetch_ai_news import FEEDPARSER_AVAILABLE, SOURCES, entries_to_items
+
+if FEEDPARSER_AVAILABLE:
+    import feedparser
+
+
+DEFAULT_LEASE_SECONDS = 10 * 24 * 3600
+# hub 返回的租约时长限制在此范围内
+MIN_LEASE_SECONDS = 60
+MAX_LEASE_SECONDS = 365 * 24 * 3600
+# 租约剩余不足此比例时续订
+RENEW_FRACTION = 0.1
+
+_LINK_TAG_RE = re.compile(r'<(?:atom:)?link\b[^>]*>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'(\w+)\s*=\s*["\']([^"\']*)["\']')
+_LINK_HEADER_RE = re.compile(r'<([^>]+)>\s*;\s*rel="?([^";,]+)"?')
+
+
+def discover_hub(feed_text: str, link_header: str = "") -> Tuple[Optional[str], Optional[str]]:
+    """从 Link 响应头或 RSS/Atom 的 <link rel="hub"> 中找出 (hub, self)"""
+    hub = topic = None
+    for url, rel in _LINK_HEADER_RE.findall(link_header or ""):
+        if rel == "hub" and not hub:
+            hub = url
+        elif rel == "self" and not topic:
+            topic = url
+
+    for tag in _LINK_TAG_RE.findall(feed_text[:20000] if feed_text else ""):
+        attrs = dict((k.lower(), v) for k, v in _ATTR_RE.findall(tag))
+        if attrs.get("rel") == "hub" and not hub:
+            hub = attrs.get("href")
+        elif attrs.get("rel") == "self" and not topic:
+            topic = attrs.get("href")
+    return hub, topic
+
+
+def sign(secret: str, body: bytes, algorithm: str = "sha256") -> str:
+    digest = hmac.new(secret.encode("utf-8"), body, getattr(hashlib, algorithm)).hexdigest()
+    return f"{algorithm}={digest}"
+
+
+def verify_signature(secret: str, body: bytes, header: Optional[str]) -> bool:
+    """校验 X-Hub-Signature（支持 sha1/sha256/sha384/sha512）"""
+    if not header or "=" not in header:
+        return False
+    algorithm, _ = header.split("=", 1)
+    if algorithm not in ("sha1", "sha256", "sha384", "sha512"):
+        return False
+    return hmac.compare_digest(sign(secret, body, algorithm), header)
+
+
+def _post_form(url: str, fields: Dict[str, str], timeout: int = 15) -> int:
+    data = urllib.parse.urlencode(fields).encode("utf-8")
+    req = urllib.request.Request(url, data=data, method="POST", headers={
+        "Content-Type": "application/x-www-form-urlencoded",
+        "User-Agent": "Mozilla/5.0 (compatible; AI News Bot)",
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, OSError):
+        return 0
+
+
+class Subscription:
+    """一个新闻源的 WebSub 订阅"""
+
+    def __init__(self, source_key: str, hub: str, topic: str):
+        self.source_key = source_key
+        self.hub = hub
+        self.topic = topic
+        self.secret = secrets.token_hex(16)
+        self.state = "pending"
+        self.lease_seconds = DEFAULT_LEASE_SECONDS
+        self.expires_at = 0.0
+        # 已向 hub 发出、尚待验证的请求（subscribe / unsubscribe）；验证回调必须与之对应
+        self.pending: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.state == "active" and self.expires_at > time.time()
+
+    def needs_renewal(self, now: float) -> bool:
+        return self.state != "active" or self.expires_at - now < self.lease_seconds * RENEW_FRACTION
+
+
+class WebSubSubscriber:
+    """回调服务器 + 订阅管理；收到推送后交给 on_items(source_key, items)"""
+
+    def __init__(self, callback_base: str, listen: Tuple[str, int],
+                 on_items: Callable[[str, List[Dict]], None],
+                 lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 resolve: Optional[Callable[[str], Optional[Dict]]] = None):
+        self.callback_base = callback_base.rstrip("/")
+        # 源名 → 源配置；常驻进程传入注册表查询，默认只认内置 SOURCES
+        self.resolve = resolve or SOURCES.get
+        self.listen = listen
+        self.on_items = on_items
+        self.lease_seconds = lease_seconds
+        self.subscriptions: Dict[str, Subscription] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self.stats = {"pushes": 0, "rejected": 0, "items": 0}
+
+    def callback_url(self, source_key: str) -> str:
+        return f"{self.callback_base}/websub/{urllib.parse.quote(source_key)}"
+
+    # ---------- 订阅 ----------
+
+    def subscribe(self, source_key: str, hub: str, topic: str) -> bool:
+        """向 hub 发送订阅请求；hub 随后会回调验证"""
+        sub = self.subscriptions.get(source_key)
+        if sub is None or sub.hub != hub or sub.topic != topic:
+            sub = Subscription(source_key, hub, topic)
+            self.subscriptions[source_key] = sub
+        sub.lease_seconds = self.lease_seconds
+        # hub 可能在响应之前就回调验证，先记下请求
+        sub.pending = "subscribe"
+        status = _post_form(hub, {
+            "hub.mode": "subscribe",
+            "hub.topic": topic,
+            "hub.callback": self.callback_url(source_key),
+            "hub.secret": sub.secret,
+            "hub.lease_seconds": str(self.lease_seconds),
+        })
+        if status not in (202, 204):
+            sub.pending = None
+            print(f"  ✗ {(self.resolve(source_key) or {}).get('name', source_key)} 订阅失败：HTTP {status}")
+            return False
+        return True
+
+    def unsubscribe(self, source_key: str) -> bool:
+        """向 hub 发送退订请求；hub 回调验证后订阅才失效"""
+        sub = self.subscriptions.get(source_key)
+        if sub is None:
+            return False
+        sub.pending = "unsubscribe"
+        status = _post_form(sub.hub, {
+            "hub.mode": "unsubscribe",
+            "hub.topic": sub.topic,
+            "hub.callback": self.callback_url(source_key),
+        })
+        if status not in (202, 204):
+            sub.pending = None
+            return False
+        return True
+
+    def maybe_subscribe(self, source_key: str, feed_text: str, link_header: str = "") -> bool:
+        """轮询时发现 hub 则订阅（已订阅且租约充足时跳过）"""
+        hub, topic = discover_hub(feed_text, link_header)
+        if not hub:
+            return False
+        topic = topic or self.resolve(source_key)["url"]
+        sub = self.subscriptions.get(source_key)
+        if sub and not sub.needs_renewal(time.time()):
+            return True
+        return self.subscribe(source_key, hub, topic)
+
+    def is_pushed(self, source_key: str) -> bool:
+        sub = self.subscriptions.get(source_key)
+        return bool(sub and sub.active)
+
+    def renew_due(self) -> None:
+        now = time.time()
+        for key, sub in list(self.subscriptions.items()):
+            if sub.state == "active" and sub.needs_renewal(now):
+                self.subscribe(key, sub.hub, sub.topic)
+
+    # ---------- 回调处理 ----------
+
+    def _handle_verify(self, source_key: str, params: Dict[str, str]) -> Tuple[int, bytes]:
+        """hub 的验证回调：只确认本端发出过的请求，伪造的 subscribe / unsubscribe / denied 一律 404"""
+        sub = self.subscriptions.get(source_key)
+        mode = params.get("hub.mode")
+        if not sub or params.get("hub.topic") != sub.topic:
+            return 404, b""
+        if mode == "denied":
+            if sub.pending != "subscribe":
+                return 404, b""
+            sub.pending = None
+            sub.state = "denied"
+            return 200, b""
+        if mode not in ("subscribe", "unsubscribe") or mode != sub.pending:
+            return 404, b""
+        sub.pending = None
+        if mode == "subscribe":
+            sub.state = "active"
+            try:
+                lease = int(params.get("hub.lease_seconds") or sub.lease_seconds)
+            except ValueError:
+                lease = sub.lease_seconds
+            sub.lease_seconds = min(max(lease, MIN_LEASE_SECONDS), MAX_LEASE_SECONDS)
+            sub.expires_at = time.time() + sub.lease_seconds
+        else:
+            sub.state = "unsubscribed"
+        return 200, params.get("hub.challenge", "").encode("utf-8")
+
+    def _handle_push(self, source_key: str, body: bytes, signature: Optional[str]) -> int:
+        sub = self.subscriptions.get(source_key)
+        if not sub or not sub.active or not verify_signature(sub.secret, body, signature):
+            # 未生效的订阅或签名不符：规范要求仍返回 2xx，但丢弃内容
+            self.stats["rejected"] += 1
+            return 202
+        if not FEEDPARSER_AVAILABLE:
+            return 202
+        feed = feedparser.parse(body)
+        items = entries_to_items(feed.entries, self.resolve(source_key))
+        self.stats["pushes"] += 1
+        self.stats["items"] += len(items)
+        self.on_items(source_key, items)
+        return 202
+
+    def _make_handler(self):
+        subscriber = self
+
+        class CallbackHandler(BaseHTTPRequestHandler):
+            def _source_key(self) -> Optional[str]:
+                path = urllib.parse.urlparse(self.path).path
+                if not path.startswith("/websub/"):
+                    return None
+                return urllib.parse.unquote(path[len("/websub/"):])
+
+            def do_GET(self):
+                key = self._source_key()
+                query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(self.path).query))
+                status, body = subscriber._handle_verify(key, query) if key else (404, b"")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                key = self._source_key()
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                status = 404
+                if key and subscriber.resolve(key) is not None:
+                    status = subscriber._handle_push(key, body, self.headers.get("X-Hub-Signature"))
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return CallbackHandler
+
+    # ---------- 生命周期 ----------
+
+    def start(self, renew_interval: float = 3600) -> None:
+        self._server = ThreadingHTTPServer(self.listen, self._make_handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._renew_loop, args=(renew_interval,), daemon=True).start()
+        print(f"WebSub 回调服务已启动：{self.listen[0]}:{self._server.server_address[1]}")
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1] if self._server else self.listen[1]
+
+    def _renew_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.renew_due()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class LocalHub:
+    """本地替身 hub：接收订阅、回调验证、向订阅者分发带签名的内容"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.subscribers: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _verify(self, params: Dict[str, str]) -> None:
+        challenge = secrets.token_hex(8)
+        query = urllib.parse.urlencode({
+            "hub.mode": params["hub.mode"],
+            "hub.topic": params["hub.topic"],
+            "hub.challenge": challenge,
+            "hub.lease_seconds": params.get("hub.lease_seconds", str(DEFAULT_LEASE_SECONDS)),
+        })
+        callback = params["hub.callback"]
+        sep = "&" if "?" in callback else "?"
+        try:
+            with urllib.request.urlopen(f"{callback}{sep}{query}", timeout=10) as resp:
+                ok = resp.status == 200 and resp.read().decode("utf-8") == challenge
+        except urllib.error.URLError:
+            ok = False
+        if not ok:
+            return
+        with self._lock:
+            topic_subs = self.subscribers.setdefault(params["hub.topic"], {})
+            if params["hub.mode"] == "subscribe":
+                topic_subs[callback] = {"secret": params.get("hub.secret", "")}
+            else:
+                topic_subs.pop(callback, None)
+
+    def publish(self, topic: str, body: bytes, content_type: str = "application/rss+xml") -> int:
+        """向该 topic 的全部订阅者推送内容，返回成功数"""
+        with self._lock:
+            targets = list(self.subscribers.get(topic, {}).items())
+        delivered = 0
+        for callback, info in targets:
+            headers = {"Content-Type": content_type, "Link": f'<{self.url}>; rel="hub", <{topic}>; rel="self"'}
+            if info["secret"]:
+                headers["X-Hub-Signature"] = sign(info["secret"], body)
+            req = urllib.request.Request(callback, data=body, method="POST", headers=headers)
+            try:
+                with urllib.request.urlopen(req, timeout=10) as resp:
+                    delivered += 1 if 200 <= resp.status < 300 else 0
+            except urllib.error.URLError:
+                pass
+        return delivered
+
+    def publish_url(self, topic: str) -> int:
+        """抓取 topic 的当前内容并分发"""
+        try:
+            with urllib.request.urlopen(topic, timeout=15) as resp:
+                body = resp.read()
+                content_type = resp.headers.get("Content-Type", "application/rss+xml")
+        except urllib.error.URLError:
+            return 0
+        return self.publish(topic, body, content_type)
+
+    def _make_handler(self):
+        hub = self
+
+        class HubHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                params = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode("utf-8")))
+                if params.get("hub.mode") == "publish" and params.get("hub.url"):
+                    # 发布通知：hub 抓取 topic 后分发
+                    self.send_response(204)
+                    self.end_headers()
+                    threading.Thread(target=hub.publish_url, args=(params["hub.url"],), daemon=True).start()
+                    return
+                if params.get("hub.mode") not in ("subscribe", "unsubscribe") or \
+                        not params.get("hub.topic") or not params.get("hub.callback"):
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                self.send_response(202)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                # 与规范一致：先返回 202，再异步验证
+                threading.Thread(target=hub._verify, args=(params,), daemon=True).start()
+
+            def log_message(self, *args):
+                pass
+
+        return HubHandler
+
+    def start(self) -> None:
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def parse_listen(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "0.0.0.0", int(port)
+
+
+_SELFTEST_FEED = b"""<?xml version="1.0"?><rss version="2.0"><channel><title>selftest</title>
+<item><title>OpenAI releases a new model</title><link>https://example.com/selftest/1</link>
+<description>Pushed through the local hub.</description></item></channel></rss>"""
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+def selftest() -> List[str]:
+    """对本地替身 hub 走一遍订阅、推送、伪造请求和退订，返回失败项（空列表表示全部通过）"""
+    failures: List[str] = []
+
+    def check(ok: bool, name: str) -> None:
+        print(f"  {'✓' if ok else '✗'} {name}")
+        if not ok:
+            failures.append(name)
+
+    def get(url: str) -> Tuple[int, bytes]:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, b""
+
+    key = next(iter(SOURCES))
+    received: List[Dict] = []
+    hub = LocalHub()
+    hub.start()
+    subscriber = WebSubSubscriber("http://127.0.0.1", ("127.0.0.1", 0),
+                                  lambda _key, items: received.extend(items))
+    subscriber.start()
+    subscriber.callback_base = f"http://127.0.0.1:{subscriber.port}"
+    topic = f"{hub.url}feeds/selftest.xml"
+    callback = subscriber.callback_url(key)
+    try:
+        # 尚未发出请求时，伪造的订阅确认不被接受
+        subscriber.subscriptions[key] = Subscription(key, hub.url, topic)
+        status, _ = get(f"{callback}?hub.mode=subscribe&hub.topic={urllib.parse.quote(topic)}&hub.challenge=x")
+        check(status == 404 and not subscriber.is_pushed(key), "拒绝未发出的订阅确认")
+
+        check(subscriber.subscribe(key, hub.url, topic) and _wait_for(lambda: subscriber.is_pushed(key)),
+              "订阅经 hub 验证后生效")
+
+        check(hub.publish(topic, _SELFTEST_FEED) == 1 and _wait_for(lambda: len(received) == 1),
+              "签名推送入库")
+
+        forged = urllib.request.Request(callback, data=_SELFTEST_FEED, method="POST",
+                                        headers={"X-Hub-Signature": sign("wrong", _SELFTEST_FEED)})
+        urllib.request.urlopen(forged, timeout=5).close()
+        check(subscriber.stats["rejected"] == 1 and len(received) == 1, "丢弃签名不符的推送")
+
+        status, body = get(f"{callback}?hub.mode=unsubscribe&hub.topic={urllib.parse.quote(topic)}&hub.challenge=x")
+        check(status == 404 and body != b"x" and subscriber.is_pushed(key), "拒绝伪造的退订验证")
+
+        check(subscriber.unsubscribe(key) and _wait_for(lambda: not subscriber.is_pushed(key)),
+              "退订经 hub 验证后生效")
+
+        hub.publish(topic, _SELFTEST_FEED)
+        check(len(received) == 1, "退订后不再收到推送")
+    finally:
+        subscriber.stop()
+        hub.stop()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSub 工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    hub = sub.add_parser("hub", help="运行本地替身 hub")
+    hub.add_argument("--host", default="127.0.0.1")
+    hub.add_argument("--port", type=int, default=8090)
+    sub.add_parser("selftest", help="对本地替身 hub 自检订阅、推送与伪造验证（失败时退出码 1）")
+    args = parser.parse_args()
+
+    if args.command == "selftest":
+        failures = selftest()
+        print("自检通过" if not failures else f"自检失败 {len(failures)} 项")
+        sys.exit(1 if failures else 0)
+
+    if args.command == "hub":
+        local_hub = LocalHub(args.host, args.port)
+        print(f"本地 hub 已启动：{local_hub.url}")
+        try:
+            local_hub._server.serve_forever()
+        except KeyboardInterrupt:
+            local_hub.stop()
+
+
+if __name__ == "__main__":
+    main()